@@ -0,0 +1,71 @@
+import json
+import os
+
+# Gas used per contract operation, as measured by tests/test_gas_regression.py
+DEFAULT_GAS_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "gas_baseline.json")
+DEFAULT_GAS_REPORT_PATH = "gas_report.json"
+# Relative increase of the gas used which is reported as a regression
+DEFAULT_GAS_THRESHOLD = 0.01
+
+def get_gas_baseline_path():
+    return os.environ.get("GAS_BASELINE_PATH", DEFAULT_GAS_BASELINE_PATH)
+
+# Every pytest-xdist worker writes its own report, as it only measures part of the operations
+def get_gas_report_path():
+    path = os.environ.get("GAS_REPORT_PATH", DEFAULT_GAS_REPORT_PATH)
+    if "PYTEST_XDIST_WORKER" in os.environ:
+        root, extension = os.path.splitext(path)
+        path = f"{root}.{os.environ['PYTEST_XDIST_WORKER']}{extension}"
+    return path
+
+def get_gas_threshold():
+    if "GAS_THRESHOLD" in os.environ and os.environ["GAS_THRESHOLD"] != "":
+        return float(os.environ["GAS_THRESHOLD"])
+    return DEFAULT_GAS_THRESHOLD
+
+def should_update_baseline():
+    return "GAS_UPDATE_BASELINE" in os.environ and os.environ["GAS_UPDATE_BASELINE"] != ""
+
+def read_gas_report(path):
+    try:
+        with open(path) as report_file:
+            return json.load(report_file)["gas_used"]
+    except FileNotFoundError:
+        return None
+
+def write_gas_report(path, gas_used, threshold=None, regressions=None):
+    report = {"gas_used": dict(sorted(gas_used.items()))}
+    if threshold is not None:
+        report["threshold"] = threshold
+    if regressions is not None:
+        report["regressions"] = regressions
+    with open(path, "w") as report_file:
+        json.dump(report, report_file, indent=4)
+        report_file.write("\n")
+
+# Compare the measured gas against the baseline
+# Returns the operations of which the gas used increased by more than the threshold, operations without a baseline are skipped
+def compare_gas(gas_used, baseline, threshold=DEFAULT_GAS_THRESHOLD):
+    regressions = {}
+    for operation, gas in sorted(gas_used.items()):
+        if operation not in baseline:
+            continue
+        if gas > baseline[operation] * (1 + threshold):
+            regressions[operation] = {
+                "baseline": baseline[operation],
+                "gas_used": gas,
+                "increase": (gas - baseline[operation]) / baseline[operation],
+            }
+    return regressions
+
+# Merge the measured gas into the baseline, operations which were not measured in this run keep their recorded value
+def update_gas_baseline(path, gas_used):
+    baseline = read_gas_report(path) or {}
+    baseline.update(gas_used)
+    write_gas_report(path, baseline)
+
+def format_regressions(regressions):
+    return "\n".join(
+        f"{operation}: {regression['baseline']} -> {regression['gas_used']} gas ({regression['increase']:+.2%})"
+        for operation, regression in regressions.items()
+    )
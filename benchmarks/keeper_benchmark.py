@@ -0,0 +1,217 @@
+import argparse
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from eth_account import Account
+
+from web3 import Web3
+
+from benchmarks.rpc_stub import DEPLOY_TRANSACTION
+from benchmarks.rpc_stub import RNG_WITNET_ADDRESS
+from benchmarks.rpc_stub import ChainState
+from benchmarks.rpc_stub import RpcStub
+
+from util.award import complete_award
+from util.award import fetch_random_numbers
+from util.award import start_award
+
+from util.contract_registry import get_contract
+
+from util.event_index import get_event_index_path
+from util.event_index import get_indexed_request_ids
+from util.event_index import open_event_index
+from util.event_index import sync_event_index
+
+from util.fee_estimator import FeeEstimator
+from util.fee_estimator import GasLimitCache
+
+from util.helper_functions import get_provider_options
+from util.helper_functions import setup_web3_provider
+
+from util.multicall import MULTICALL3_ADDRESS
+from util.multicall import get_multicall_address
+from util.multicall import get_request_states
+from util.multicall import multicall
+
+from util.provider import FailoverHTTPProvider
+
+from util.rpc_metrics import RpcMetrics
+
+from util.transaction_sender import TransactionSender
+
+# Benchmarks the RPC cost of a full award cycle of the keeper against a local JSON-RPC stand-in
+# Run with: python -m benchmarks.keeper_benchmark --requests 1000 --failed 50 --strategies 5 --output results.json
+
+def get_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Run start_award, fetch_random_numbers and complete_award against a stub serving the given chain state
+def run_benchmark(chain_state, latency=0, log_fetch_concurrency=4):
+    stub = RpcStub(chain_state, latency=latency)
+    metrics = RpcMetrics()
+
+    w3_provider = Web3(FailoverHTTPProvider([stub.uri]))
+    w3_provider.middleware_onion.add(metrics.middleware, "rpc_metrics")
+
+    transaction_sender = TransactionSender(
+        w3_provider,
+        Account.create(),
+        fee_estimator=FeeEstimator(w3_provider, gas_limit_cache=GasLimitCache()),
+    )
+
+    results = {"phases": {}}
+    with tempfile.TemporaryDirectory() as index_directory:
+        network_config = {
+            "event_index_path": os.path.join(index_directory, "event_index.db"),
+            "log_fetch_concurrency": log_fetch_concurrency,
+            "multicall_address": MULTICALL3_ADDRESS,
+            "prize_strategy_addresses": list(chain_state.strategies.keys()),
+            "rng_witnet_address": RNG_WITNET_ADDRESS,
+            "rng_witnet_deploy_transaction": DEPLOY_TRANSACTION,
+        }
+
+        def measure(phase, function, *arguments):
+            stub_requests = sum(stub.requests.values())
+            stub_contract_calls = stub.contract_calls
+            tracemalloc.start()
+            start_time = time.perf_counter()
+            try:
+                return function(*arguments)
+            finally:
+                seconds = time.perf_counter() - start_time
+                _, peak_memory = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                results["phases"][phase] = {
+                    "seconds": seconds,
+                    "peak_memory_bytes": peak_memory,
+                    "http_requests": sum(stub.requests.values()) - stub_requests,
+                    "contract_calls": stub.contract_calls - stub_contract_calls,
+                    "rpc_calls": metrics.reset(),
+                }
+
+        try:
+            awards_started = measure("start_award", start_award, network_config, w3_provider, transaction_sender, {})
+            measure("fetch_random_numbers", fetch_random_numbers, network_config, w3_provider, transaction_sender, {})
+            measure("complete_award", complete_award, network_config, w3_provider, awards_started, transaction_sender, {})
+        finally:
+            stub.close()
+
+    phases = results["phases"].values()
+    results["total"] = {
+        "seconds": sum(phase["seconds"] for phase in phases),
+        "peak_memory_bytes": max(phase["peak_memory_bytes"] for phase in phases),
+        "http_requests": sum(phase["http_requests"] for phase in phases),
+        "contract_calls": sum(phase["contract_calls"] for phase in phases),
+        "rpc_calls": {
+            method: sum(phase["rpc_calls"]["methods"].get(method, {}).get("count", 0) for phase in phases)
+            for method in sorted(set(method for phase in phases for method in phase["rpc_calls"]["methods"]))
+        },
+    }
+    results["outcome"] = {
+        "requests": len(chain_state.requests),
+        "completed_requests": sum(1 for request in chain_state.requests if request["complete"]),
+        "awards": sum(strategy["awards"] for strategy in chain_state.strategies.values()),
+    }
+    return results
+
+# Snapshot the request and prize strategy state of a live deployment so it can be replayed with --state
+def record_chain_state(network, config_path):
+    network_config = json.load(open(config_path))[network]
+    w3_provider = setup_web3_provider(network, network_config["provider"], **get_provider_options(network_config))
+    rng_witnet = get_contract(w3_provider, "RngWitnet", network_config["rng_witnet_address"])
+
+    chain_id = w3_provider.eth.chain_id
+    event_index = open_event_index(get_event_index_path(network_config))
+    sync_event_index(event_index, chain_id, w3_provider, rng_witnet, network_config["rng_witnet_deploy_transaction"])
+    failed_request_ids = get_indexed_request_ids(event_index, chain_id, rng_witnet.address, "RandomNumberFailed")
+
+    request_count = rng_witnet.functions.requestCount().call()
+    request_states = get_request_states(w3_provider, rng_witnet, range(1, request_count + 1), get_multicall_address(network_config), include_random_number=True)
+
+    chain_state = ChainState([], {}, 1)
+    for request_id, request_state in request_states.items():
+        chain_state.block_number += 1
+        chain_state.add_request(failed=request_id in failed_request_ids)
+        chain_state.requests[-1]["fetchable"] = request_state["fetchable"]
+        if request_state["complete"]:
+            chain_state.complete_request(request_id)
+
+    prize_strategy_addresses = network_config["prize_strategy_addresses"]
+    calls = [
+        (get_contract(w3_provider, "PrizeStrategy", address), function_name, [])
+        for address in prize_strategy_addresses
+        for function_name in ("canStartAward", "isRngRequested", "getLastRngRequestId")
+    ]
+    results = multicall(w3_provider, calls, get_multicall_address(network_config))
+    for index, address in enumerate(prize_strategy_addresses):
+        can_start_award, is_rng_requested, request_id = results[3 * index:3 * index + 3]
+        chain_state.strategies[Web3.toChecksumAddress(address)] = {
+            "prize_period_over": bool(can_start_award or is_rng_requested),
+            "requested": bool(is_rng_requested),
+            "request_id": request_id or 0,
+            "awards": 0,
+        }
+
+    chain_state.block_number += 1
+    return chain_state
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RPC cost of a keeper award cycle")
+    parser.add_argument("--requests", type=int, default=1000, help="Number of past RNG requests")
+    parser.add_argument("--failed", type=int, default=50, help="Number of past RNG requests which failed")
+    parser.add_argument("--strategies", type=int, default=5, help="Number of prize strategies ready to be awarded")
+    parser.add_argument("--latency", type=float, default=0, help="Seconds added to every JSON-RPC response")
+    parser.add_argument("--log-fetch-concurrency", type=int, default=4)
+    parser.add_argument("--state", help="Replay a chain state saved with --save-state or --record instead of a synthetic one")
+    parser.add_argument("--save-state", help="Save the chain state before the benchmark runs")
+    parser.add_argument("--record", metavar="NETWORK", help="Record the chain state of NETWORK from config.json into --save-state and exit")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if arguments.record:
+        assert arguments.save_state, "--record requires --save-state"
+        with open(arguments.save_state, "w") as state_file:
+            json.dump(record_chain_state(arguments.record, "config.json").to_json(), state_file)
+        return
+
+    if arguments.state:
+        with open(arguments.state) as state_file:
+            chain_state = ChainState.from_json(json.load(state_file))
+    else:
+        chain_state = ChainState.synthetic(arguments.requests, arguments.failed, arguments.strategies)
+
+    if arguments.save_state:
+        with open(arguments.save_state, "w") as state_file:
+            json.dump(chain_state.to_json(), state_file)
+
+    scenario = {
+        "state": arguments.state,
+        "requests": len(chain_state.requests),
+        "failed": sum(1 for request in chain_state.requests if request["failed"]),
+        "strategies": len(chain_state.strategies),
+        "latency": arguments.latency,
+        "log_fetch_concurrency": arguments.log_fetch_concurrency,
+    }
+    results = {
+        "commit": get_commit(),
+        "scenario": scenario,
+        **run_benchmark(chain_state, latency=arguments.latency, log_fetch_concurrency=arguments.log_fetch_concurrency),
+    }
+
+    print(json.dumps(results["total"], indent=4))
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(results, output_file, indent=4)
+
+if __name__ == "__main__":
+    main()
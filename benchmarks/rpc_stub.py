@@ -0,0 +1,443 @@
+import json
+import threading
+import time
+
+from collections import Counter
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import rlp
+
+from eth_abi import decode_abi
+from eth_abi import encode_abi
+
+from eth_account import Account
+
+from web3 import Web3
+
+from util.multicall import MULTICALL3_ADDRESS
+
+CHAIN_ID = 1337
+
+RNG_WITNET_ADDRESS = "0x00000000000000000000000000000000000a11ce"
+DEPLOY_TRANSACTION = "0x" + "de" * 32
+
+BASE_FEE = Web3.toWei(20, "gwei")
+PRIORITY_FEE = Web3.toWei(1, "gwei")
+
+# Gas used by the transactions the keeper sends
+GAS_USED = {
+    "fetchRandomness(uint32)": 80000,
+    "fetchRandomnessBatch(uint32[])": 30000,
+    "startAward()": 250000,
+    "completeAward()": 150000,
+    "cancelAward()": 60000,
+}
+
+def _selector(signature):
+    return Web3.keccak(text=signature)[:4].hex()
+
+def _topic(signature):
+    return Web3.keccak(text=signature).hex()
+
+def _uint_topic(value):
+    return "0x" + value.to_bytes(32, "big").hex()
+
+def _hex(data):
+    return "0x" + data.hex()
+
+def _to_bytes(data):
+    return bytes.fromhex(data[2:] if data.startswith("0x") else data)
+
+# Gas used per request settled by fetchRandomnessBatch on top of its base cost
+FETCH_BATCH_GAS_PER_REQUEST = 50000
+
+# RequestStatus of a request in the chain state, as returned by getRequestStatuses
+def _request_status(request):
+    if request is None:
+        return 0
+    if request["complete"]:
+        return 3
+    if request["failed"]:
+        return 4
+    return 2 if request["fetchable"] else 1
+
+def _request_statuses(state, from_id, to_id):
+    return bytes(
+        _request_status(state.requests[request_id - 1] if 1 <= request_id <= len(state.requests) else None)
+        for request_id in range(from_id, to_id + 1)
+    )
+
+# Contract calls are answered with (argument types, return types, handler) per 4-byte selector
+RNG_WITNET_VIEWS = {
+    _selector("requestCount()"): ([], ["uint32"], lambda state, arguments: [len(state.requests)]),
+    _selector("getLastRequestId()"): ([], ["uint32"], lambda state, arguments: [len(state.requests)]),
+    _selector("isRngFetchable(uint32)"): (["uint32"], ["bool"], lambda state, arguments: [state.get_request(arguments[0])["fetchable"]]),
+    _selector("isRequestComplete(uint32)"): (["uint32"], ["bool"], lambda state, arguments: [state.get_request(arguments[0])["complete"]]),
+    _selector("randomNumber(uint32)"): (["uint32"], ["uint256"], lambda state, arguments: [state.get_request(arguments[0])["random_number"]]),
+    _selector("getRequestStatuses(uint32,uint32)"): (["uint32", "uint32"], ["bytes"], lambda state, arguments: [_request_statuses(state, *arguments)]),
+}
+
+PRIZE_STRATEGY_VIEWS = {
+    _selector("canStartAward()"): (["bool"], lambda state, strategy: [not strategy["requested"] and strategy["prize_period_over"]]),
+    _selector("canCompleteAward()"): (["bool"], lambda state, strategy: [strategy["requested"] and state.get_request(strategy["request_id"])["complete"]]),
+    _selector("isRngRequested()"): (["bool"], lambda state, strategy: [strategy["requested"]]),
+    _selector("isRngTimedOut()"): (["bool"], lambda state, strategy: [False]),
+    _selector("getLastRngRequestId()"): (["uint32"], lambda state, strategy: [strategy["request_id"]]),
+}
+
+AGGREGATE3 = _selector("aggregate3((address,bool,bytes)[])")
+
+class Revert(Exception):
+    pass
+
+# In-memory chain state of one RngWitnet deployment and its prize strategies
+# Every transaction is mined in its own block as soon as it is received
+class ChainState:
+    def __init__(self, requests, strategies, block_number, logs=None):
+        self.requests = requests
+        self.strategies = strategies
+        self.block_number = block_number
+        self.logs = logs if logs is not None else []
+
+        self.transactions = {}
+        self.receipts = {}
+        self.nonces = Counter()
+
+    # Build a chain with `request_count` fetched requests of which `failed_count` failed and `strategy_count`
+    # prize strategies which are ready to start an award
+    @classmethod
+    def synthetic(cls, request_count, failed_count, strategy_count):
+        state = cls([], {}, 1)
+        for request_id in range(1, request_count + 1):
+            state.block_number += 1
+            state.add_request(failed=request_id <= failed_count)
+            if request_id > failed_count:
+                state.complete_request(request_id)
+        for index in range(strategy_count):
+            state.strategies[Web3.toChecksumAddress("0x" + f"{index + 1:040x}")] = {
+                "prize_period_over": True,
+                "requested": False,
+                "request_id": 0,
+                "awards": 0,
+            }
+        state.block_number += 1
+        return state
+
+    # Replay a state which was saved with to_json
+    @classmethod
+    def from_json(cls, content):
+        return cls(
+            [dict(request) for request in content["requests"]],
+            {address: dict(strategy) for address, strategy in content["strategies"].items()},
+            content["block_number"],
+            content["logs"],
+        )
+
+    def to_json(self):
+        return {
+            "requests": self.requests,
+            "strategies": self.strategies,
+            "block_number": self.block_number,
+            "logs": self.logs,
+        }
+
+    def get_request(self, request_id):
+        if request_id < 1 or request_id > len(self.requests):
+            return {"fetchable": False, "complete": False, "failed": False, "random_number": 0}
+        return self.requests[request_id - 1]
+
+    def add_request(self, failed=False):
+        request_id = len(self.requests) + 1
+        self.requests.append({"fetchable": True, "complete": False, "failed": failed, "random_number": 0})
+        self._log(RNG_WITNET_ADDRESS, [_topic("RngRequested(uint32,uint256)"), _uint_topic(request_id), _uint_topic(request_id)], b"")
+        if failed:
+            self._log(RNG_WITNET_ADDRESS, [_topic("RandomNumberFailed(uint32)"), _uint_topic(request_id)], b"")
+        return request_id
+
+    def complete_request(self, request_id):
+        request = self.get_request(request_id)
+        request["complete"] = True
+        request["random_number"] = int.from_bytes(Web3.keccak(request_id.to_bytes(32, "big")), "big")
+        self._log(RNG_WITNET_ADDRESS, [_topic("RandomNumberCompleted(uint32,uint256)"), _uint_topic(request_id)], encode_abi(["uint256"], [request["random_number"]]))
+
+    def call(self, to, data):
+        to = Web3.toChecksumAddress(to)
+        selector, arguments = data[:10], _to_bytes(data[10:])
+
+        if to == Web3.toChecksumAddress(MULTICALL3_ADDRESS) and selector == AGGREGATE3:
+            calls, = decode_abi(["(address,bool,bytes)[]"], arguments)
+            results = []
+            for target, allow_failure, call_data in calls:
+                try:
+                    results.append((True, self.call(target, _hex(call_data))))
+                except Revert:
+                    if not allow_failure:
+                        raise
+                    results.append((False, b""))
+            return encode_abi(["(bool,bytes)[]"], [results])
+
+        if to == Web3.toChecksumAddress(RNG_WITNET_ADDRESS) and selector in RNG_WITNET_VIEWS:
+            argument_types, return_types, handler = RNG_WITNET_VIEWS[selector]
+            return encode_abi(return_types, handler(self, decode_abi(argument_types, arguments)))
+
+        if to in self.strategies and selector in PRIZE_STRATEGY_VIEWS:
+            return_types, handler = PRIZE_STRATEGY_VIEWS[selector]
+            return encode_abi(return_types, handler(self, self.strategies[to]))
+
+        raise Revert(f"Unknown call {selector} to {to}")
+
+    def send_raw_transaction(self, raw_transaction):
+        raw_transaction = _to_bytes(raw_transaction)
+        sender = Account.recover_transaction(raw_transaction)
+        if raw_transaction[0] == 2:
+            chain_id, nonce, priority_fee, max_fee, gas, to, value, data = rlp.decode(raw_transaction[1:])[:8]
+        else:
+            nonce, gas_price, gas, to, value, data = rlp.decode(raw_transaction)[:6]
+        nonce = int.from_bytes(nonce, "big")
+
+        if nonce != self.nonces[sender]:
+            raise ValueError("nonce too low" if nonce < self.nonces[sender] else "nonce too high")
+        self.nonces[sender] += 1
+
+        transaction_hash = Web3.keccak(raw_transaction).hex()
+        self.block_number += 1
+        first_log = len(self.logs)
+        to = Web3.toChecksumAddress(to)
+        try:
+            gas_used = self._execute(to, _hex(data))
+            status = 1
+        except Revert:
+            del self.logs[first_log:]
+            gas_used, status = 30000, 0
+
+        logs = []
+        for log in self.logs[first_log:]:
+            log["transactionHash"] = transaction_hash
+            logs.append(log)
+
+        self.transactions[transaction_hash] = {
+            "hash": transaction_hash,
+            "blockNumber": hex(self.block_number),
+            "from": sender,
+            "to": to,
+            "nonce": hex(nonce),
+            "input": _hex(data),
+        }
+        self.receipts[transaction_hash] = {
+            "transactionHash": transaction_hash,
+            "transactionIndex": "0x0",
+            "blockHash": self._block_hash(self.block_number),
+            "blockNumber": hex(self.block_number),
+            "from": sender,
+            "to": to,
+            "cumulativeGasUsed": hex(gas_used),
+            "gasUsed": hex(gas_used),
+            "effectiveGasPrice": hex(BASE_FEE + PRIORITY_FEE),
+            "contractAddress": None,
+            "logs": logs,
+            "logsBloom": "0x" + "00" * 256,
+            "status": hex(status),
+            "type": "0x2",
+        }
+        return transaction_hash
+
+    def get_logs(self, log_filter):
+        addresses = log_filter.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        if addresses is not None:
+            addresses = set(address.lower() for address in addresses)
+
+        topics = log_filter.get("topics") or []
+        topic0 = topics[0] if len(topics) > 0 else None
+        if isinstance(topic0, str):
+            topic0 = [topic0]
+
+        from_block = int(log_filter.get("fromBlock", "0x0"), 16)
+        to_block = self.block_number if log_filter.get("toBlock", "latest") == "latest" else int(log_filter["toBlock"], 16)
+
+        return [
+            log for log in self.logs
+            if from_block <= int(log["blockNumber"], 16) <= to_block
+            and (addresses is None or log["address"].lower() in addresses)
+            and (topic0 is None or log["topics"][0] in topic0)
+        ]
+
+    def get_transaction(self, transaction_hash):
+        if transaction_hash == DEPLOY_TRANSACTION:
+            return {"hash": DEPLOY_TRANSACTION, "blockNumber": "0x1", "input": "0x", "nonce": "0x0"}
+        return self.transactions.get(transaction_hash)
+
+    def fee_history(self, block_count, reward_percentiles):
+        block_count = min(int(block_count, 16) if isinstance(block_count, str) else block_count, self.block_number)
+        return {
+            "oldestBlock": hex(self.block_number - block_count + 1),
+            "baseFeePerGas": [hex(BASE_FEE)] * (block_count + 1),
+            "gasUsedRatio": [0.5] * block_count,
+            "reward": [[hex(PRIORITY_FEE)] * len(reward_percentiles)] * block_count,
+        }
+
+    def estimate_gas(self, transaction):
+        data = transaction.get("data", transaction.get("input", ""))
+        if data.startswith(_selector("fetchRandomnessBatch(uint32[])")):
+            request_ids, = decode_abi(["uint32[]"], _to_bytes(data[10:]))
+            return GAS_USED["fetchRandomnessBatch(uint32[])"] + FETCH_BATCH_GAS_PER_REQUEST * len(request_ids)
+        for signature, gas_used in GAS_USED.items():
+            if data.startswith(_selector(signature)):
+                return gas_used
+        return 100000
+
+    def _execute(self, to, data):
+        selector = data[:10]
+        if to == Web3.toChecksumAddress(RNG_WITNET_ADDRESS) and selector == _selector("fetchRandomness(uint32)"):
+            request_id, = decode_abi(["uint32"], _to_bytes(data[10:]))
+            if not self.get_request(request_id)["fetchable"]:
+                raise Revert("randomnessNotAvailable")
+            self._fetch_randomness(request_id)
+            return GAS_USED["fetchRandomness(uint32)"]
+
+        if to == Web3.toChecksumAddress(RNG_WITNET_ADDRESS) and selector == _selector("fetchRandomnessBatch(uint32[])"):
+            request_ids, = decode_abi(["uint32[]"], _to_bytes(data[10:]))
+            # Requests which are not fetchable, already complete or failed are skipped
+            settled = [
+                request_id for request_id in request_ids
+                if self.get_request(request_id)["fetchable"] and not self.get_request(request_id)["complete"] and not self.get_request(request_id)["failed"]
+            ]
+            for request_id in settled:
+                self._fetch_randomness(request_id)
+            return GAS_USED["fetchRandomnessBatch(uint32[])"] + FETCH_BATCH_GAS_PER_REQUEST * len(settled)
+
+        if to in self.strategies:
+            strategy = self.strategies[to]
+            if selector == _selector("startAward()"):
+                if strategy["requested"] or not strategy["prize_period_over"]:
+                    raise Revert("cannot start award")
+                strategy.update(requested=True, request_id=self.add_request(), prize_period_over=False)
+                return GAS_USED["startAward()"]
+            if selector == _selector("completeAward()"):
+                if not strategy["requested"] or not self.get_request(strategy["request_id"])["complete"]:
+                    raise Revert("cannot complete award")
+                strategy.update(requested=False, awards=strategy["awards"] + 1)
+                return GAS_USED["completeAward()"]
+
+        raise Revert(f"Unknown transaction {selector} to {to}")
+
+    def _fetch_randomness(self, request_id):
+        if self.get_request(request_id)["failed"]:
+            self._log(RNG_WITNET_ADDRESS, [_topic("RandomNumberFailed(uint32)"), _uint_topic(request_id)], b"")
+        else:
+            self.complete_request(request_id)
+
+    def _log(self, address, topics, data):
+        log_index = 0
+        if len(self.logs) > 0 and int(self.logs[-1]["blockNumber"], 16) == self.block_number:
+            log_index = int(self.logs[-1]["logIndex"], 16) + 1
+        self.logs.append({
+            "address": Web3.toChecksumAddress(address),
+            "topics": topics,
+            "data": _hex(data),
+            "blockNumber": hex(self.block_number),
+            "blockHash": self._block_hash(self.block_number),
+            "transactionHash": "0x" + len(self.logs).to_bytes(32, "big").hex(),
+            "transactionIndex": "0x0",
+            "logIndex": hex(log_index),
+            "removed": False,
+        })
+
+    def _block_hash(self, block_number):
+        return Web3.keccak(block_number.to_bytes(32, "big")).hex()
+
+# Local JSON-RPC stand-in for a node serving a ChainState
+# Every request is delayed by `latency` seconds to emulate a remote node and counted per method
+# Transactions are signed for any chain id, so every stub can serve its own chain id
+class RpcStub:
+    def __init__(self, chain_state, latency=0, chain_id=CHAIN_ID):
+        self.chain_state = chain_state
+        self.latency = latency
+        self.chain_id = chain_id
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        # Number of contract calls answered, counting every call aggregated in a multicall separately
+        self.contract_calls = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(stub.latency)
+
+                response = {"jsonrpc": "2.0", "id": request["id"]}
+                try:
+                    response["result"] = stub.handle(request["method"], request.get("params", []))
+                except Revert as err:
+                    response["error"] = {"code": 3, "message": f"execution reverted: {err}"}
+                except ValueError as err:
+                    response["error"] = {"code": -32000, "message": str(err)}
+
+                body = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.uri = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, method, params):
+        with self.lock:
+            self.requests[method] += 1
+            state = self.chain_state
+
+            if method == "eth_chainId":
+                return hex(self.chain_id)
+            if method == "net_version":
+                return str(self.chain_id)
+            if method == "eth_blockNumber":
+                return hex(state.block_number)
+            if method == "eth_call":
+                self.contract_calls += 1
+                return _hex(state.call(params[0]["to"], params[0].get("data", params[0].get("input"))))
+            if method == "eth_estimateGas":
+                return hex(state.estimate_gas(params[0]))
+            if method == "eth_feeHistory":
+                return state.fee_history(params[0], params[2])
+            if method == "eth_gasPrice":
+                return hex(BASE_FEE + PRIORITY_FEE)
+            if method == "eth_maxPriorityFeePerGas":
+                return hex(PRIORITY_FEE)
+            if method == "eth_getTransactionCount":
+                return hex(state.nonces[Web3.toChecksumAddress(params[0])])
+            if method == "eth_sendRawTransaction":
+                return state.send_raw_transaction(params[0])
+            if method == "eth_getTransactionByHash":
+                return state.get_transaction(params[0])
+            if method == "eth_getTransactionReceipt":
+                return state.receipts.get(params[0])
+            if method == "eth_getLogs":
+                return state.get_logs(params[0])
+            if method == "eth_getBlockByNumber":
+                block_number = state.block_number if params[0] in ("latest", "pending") else int(params[0], 16)
+                return {
+                    "number": hex(block_number),
+                    "hash": state._block_hash(block_number),
+                    "baseFeePerGas": hex(BASE_FEE),
+                    "gasLimit": hex(30000000),
+                    "timestamp": hex(1600000000 + 12 * block_number),
+                    "transactions": [],
+                }
+
+            raise ValueError(f"Method {method} is not supported by the stub")
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
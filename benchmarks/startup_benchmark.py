@@ -0,0 +1,54 @@
+import argparse
+import importlib.util
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Benchmarks the time from starting the interpreter until the keeper is ready to make its first RPC call
+# Run with: python -m benchmarks.startup_benchmark --runs 10 --output startup.json
+
+# Code executed in a fresh interpreter per entry point
+ENTRY_POINTS = {
+    # Lower bound: starting the interpreter itself
+    "python": "pass",
+    # keeper.py with everything its award, daemon and fetch commands import
+    "keeper": "import keeper; import dotenv, eth_account, util.award, util.helper_functions, util.logger, util.rpc_metrics, util.transaction_sender",
+    # brownie run loads the project, which compiles the contracts if the build artifacts are missing or outdated
+    "brownie": "import brownie; brownie.project.load('.')",
+}
+
+def measure_startup(code, runs):
+    durations = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start_time)
+    return {
+        "runs": runs,
+        "min": min(durations),
+        "median": statistics.median(durations),
+        "max": max(durations),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the startup time of the keeper entry points")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters started per entry point")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    arguments = parser.parse_args()
+
+    results = {}
+    for entry_point, code in ENTRY_POINTS.items():
+        if entry_point == "brownie" and importlib.util.find_spec("brownie") is None:
+            print(f"{entry_point:<8} skipped, brownie is not installed")
+            continue
+        results[entry_point] = measure_startup(code, arguments.runs)
+        print(f"{entry_point:<8} median {results[entry_point]['median']:.3f}s (min {results[entry_point]['min']:.3f}s, max {results[entry_point]['max']:.3f}s)")
+
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(results, output_file, indent=4)
+
+if __name__ == "__main__":
+    main()
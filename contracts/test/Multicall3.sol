@@ -0,0 +1,46 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity >=0.7.0 <0.9.0;
+
+pragma abicoder v2;
+
+/// @notice Minimal subset of Multicall3 (https://github.com/mds1/multicall) used to test batched reads on a local chain
+contract Multicall3 {
+    struct Call3 {
+        address target;
+        bool allowFailure;
+        bytes callData;
+    }
+
+    struct Result {
+        bool success;
+        bytes returnData;
+    }
+
+    /// @notice Aggregate calls, ensuring each returns success if required
+    /// @param calls An array of Call3 structs
+    /// @return returnData An array of Result structs
+    function aggregate3(Call3[] calldata calls) public payable returns (Result[] memory returnData) {
+        uint256 length = calls.length;
+        returnData = new Result[](length);
+        for (uint256 i = 0; i < length; i++) {
+            Result memory result = returnData[i];
+            Call3 calldata calli = calls[i];
+            (result.success, result.returnData) = calli.target.call(calli.callData);
+            require(calli.allowFailure || result.success, "Multicall3: call failed");
+        }
+    }
+
+    /// @notice Returns the ETH balance of a given address
+    /// @param addr The address to query
+    /// @return balance The balance of the address
+    function getEthBalance(address addr) public view returns (uint256 balance) {
+        balance = addr.balance;
+    }
+
+    /// @notice Returns the block number
+    /// @return blockNumber The current block number
+    function getBlockNumber() public view returns (uint256 blockNumber) {
+        blockNumber = block.number;
+    }
+}
@@ -0,0 +1,107 @@
+// SPDX-License-Identifier: GPL-3.0
+
+pragma solidity >=0.7.0 <0.9.0;
+
+import "../RngInterface.sol";
+
+/// @notice Minimal stand-in for the award cycle of a PoolTogether MultipleWinners prize strategy
+contract PrizeStrategyMock {
+    event PrizePoolAwardStarted(address indexed operator, address indexed prizePool, uint32 indexed rngRequestId, uint32 rngLockBlock);
+    event PrizePoolAwarded(address indexed operator, uint256 randomNumber);
+    event PrizePoolAwardCancelled(address indexed operator, address indexed prizePool, uint32 indexed rngRequestId, uint32 rngLockBlock);
+
+    /// @dev The RNG service used to draw the winners
+    RNGInterface public rng;
+
+    /// @dev The duration of a prize period in seconds
+    uint256 public prizePeriodSeconds;
+
+    /// @dev The timestamp at which the current prize period ends
+    uint256 public prizePeriodEndAt;
+
+    /// @dev Seconds after which a pending RNG request can be cancelled
+    uint32 public rngRequestTimeout;
+
+    /// @dev The random number used by the last completed award
+    uint256 public lastRandomNumber;
+
+    /// @dev The number of completed awards
+    uint256 public awardCount;
+
+    uint32 internal rngRequestId;
+    uint32 internal rngLockBlock;
+    uint256 internal rngRequestedAt;
+
+    constructor(RNGInterface _rng, uint256 _prizePeriodSeconds, uint32 _rngRequestTimeout) {
+        rng = _rng;
+        prizePeriodSeconds = _prizePeriodSeconds;
+        prizePeriodEndAt = block.timestamp + _prizePeriodSeconds;
+        rngRequestTimeout = _rngRequestTimeout;
+    }
+
+    function isPrizePeriodOver() public view returns (bool) {
+        return block.timestamp >= prizePeriodEndAt;
+    }
+
+    function isRngRequested() public view returns (bool) {
+        return rngRequestId != 0;
+    }
+
+    function isRngCompleted() public view returns (bool) {
+        return rng.isRequestComplete(rngRequestId);
+    }
+
+    function isRngTimedOut() public view returns (bool) {
+        return isRngRequested() && block.timestamp > rngRequestedAt + rngRequestTimeout;
+    }
+
+    function canStartAward() public view returns (bool) {
+        return isPrizePeriodOver() && !isRngRequested();
+    }
+
+    function canCompleteAward() public view returns (bool) {
+        return isRngRequested() && isRngCompleted();
+    }
+
+    function getLastRngRequestId() external view returns (uint32) {
+        return rngRequestId;
+    }
+
+    function getLastRngLockBlock() external view returns (uint32) {
+        return rngLockBlock;
+    }
+
+    function startAward() external {
+        require(canStartAward(), "PrizeStrategyMock/cannot-start-award");
+
+        (rngRequestId, rngLockBlock) = rng.requestRandomNumber();
+        rngRequestedAt = block.timestamp;
+
+        emit PrizePoolAwardStarted(msg.sender, address(this), rngRequestId, rngLockBlock);
+    }
+
+    function completeAward() external {
+        require(canCompleteAward(), "PrizeStrategyMock/cannot-complete-award");
+
+        lastRandomNumber = rng.randomNumber(rngRequestId);
+        awardCount++;
+        prizePeriodEndAt = block.timestamp + prizePeriodSeconds;
+        _resetRng();
+
+        emit PrizePoolAwarded(msg.sender, lastRandomNumber);
+    }
+
+    function cancelAward() external {
+        require(isRngTimedOut(), "PrizeStrategyMock/rng-not-timedout");
+
+        emit PrizePoolAwardCancelled(msg.sender, address(this), rngRequestId, rngLockBlock);
+
+        _resetRng();
+    }
+
+    function _resetRng() internal {
+        delete rngRequestId;
+        delete rngLockBlock;
+        delete rngRequestedAt;
+    }
+}
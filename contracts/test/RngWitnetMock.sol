@@ -2,6 +2,7 @@
 
 pragma solidity >=0.7.0 <0.9.0;
 
+import "@openzeppelin/contracts/utils/math/SafeCast.sol";
 import "@witnet/witnet-solidity-bridge/contracts/UsingWitnet.sol";
 
 import "../RngInterface.sol";
@@ -22,26 +23,41 @@ contract RngWitnetMock is RNGInterface, UsingWitnet, Ownable {
     error balanceTooLow(uint256 _balance, uint256 _fee);
     error randomnessNotAvailable(uint256 _queryId);
 
+    /// @dev The Witnet Request id of a request and whether its random number has been fetched or failed, packed in a single storage slot
+    /// @dev Witnet Request ids are sequential, so they fit in 64 bits
+    struct Request {
+        uint64 witnetRequestId;
+        bool fetched;
+        bool failed;
+    }
+
+    /// @dev Status of a request as returned by getRequestStatuses
+    enum RequestStatus {
+        NotRequested,
+        Pending,
+        Fetchable,
+        Completed,
+        Failed
+    }
+
     /// @dev Low-level Witnet Data Request composed on construction
     WitnetRequestRandomness public witnetRandomnessRequest;
 
-    /// @dev The maximum allowed request fee for the Witnet RNG to prevent accidentally draining the contract
-    uint256 public maxFee;
-
     /// @dev A counter for the number of requests made used for request ids
+    /// @dev Declared after witnetRandomnessRequest so both share a storage slot, requestRandomNumber reads both
     uint32 public requestCount;
 
+    /// @dev The maximum allowed request fee for the Witnet RNG to prevent accidentally draining the contract
+    uint256 public maxFee;
+
     /// @dev The addresses which are allowed to request random numbers
     mapping(address => bool) allowedRequester;
 
     /// @dev A list of random numbers from past requests mapped by request id
     mapping(uint32 => uint256) internal randomNumbers;
 
-    /// @dev A list of bools to check whether the random number has been fetched
-    mapping(uint32 => bool) internal randomNumberFetched;
-
-    /// @dev A mapping from internal request ids to Witnet Request ids
-    mapping(uint32 => uint256) internal witnetRequestIds;
+    /// @dev A mapping from internal request ids to the Witnet Request id and the fetched and failed flags of the request
+    mapping(uint32 => Request) internal requests;
 
     /// @dev Mock variables to test the required and maximum reward
     uint256 internal __mockGas;
@@ -52,6 +68,9 @@ contract RngWitnetMock is RNGInterface, UsingWitnet, Ownable {
 
     mapping(uint256 => uint32) internal __mockLockBlocks;
 
+    /// @dev Mock variable to test failed randomness requests
+    bool internal __mockFailure;
+
     /// @dev Public constructor
     constructor(
         WitnetRequestBoard _witnetRequestBoard,
@@ -114,6 +133,33 @@ contract RngWitnetMock is RNGInterface, UsingWitnet, Ownable {
         emit RequesterRemoved(_requester);
     }
 
+    /// @notice Allows owner to add multiple addresses which can generate an RNG request in one transaction
+    /// @param _requesters The addresses that can generate an RNG request
+    function addAllowedRequesters(address[] calldata _requesters) external onlyOwner {
+        for (uint256 i = 0; i < _requesters.length; i++) {
+            allowedRequester[_requesters[i]] = true;
+
+            emit RequesterAdded(_requesters[i]);
+        }
+    }
+
+    /// @notice Allows owner to remove multiple addresses which can generate an RNG request in one transaction
+    /// @param _requesters The addresses that can no longer generate an RNG request
+    function removeAllowedRequesters(address[] calldata _requesters) external onlyOwner {
+        for (uint256 i = 0; i < _requesters.length; i++) {
+            delete allowedRequester[_requesters[i]];
+
+            emit RequesterRemoved(_requesters[i]);
+        }
+    }
+
+    /// @notice Checks whether an address is allowed to generate an RNG request
+    /// @param _requester The address to check
+    /// @return isAllowed True if the address can generate an RNG request
+    function isAllowedRequester(address _requester) external view returns (bool isAllowed) {
+        return allowedRequester[_requester];
+    }
+
     /// @notice Gets the last request id used by the RNG service
     /// @return requestId The last request id used in the last request
     function getLastRequestId() external view override returns (uint32 requestId) {
@@ -157,7 +203,7 @@ contract RngWitnetMock is RNGInterface, UsingWitnet, Ownable {
     /// @param requestId The ID of the request used to get the results of the RNG service
     /// @return isFetchable True if the request has completed and a random number can be fetched
     function isRngFetchable(uint32 requestId) external view returns (bool isFetchable) {
-        uint _queryId = witnetRequestIds[requestId];
+        uint _queryId = requests[requestId].witnetRequestId;
         return _queryId != 0 && _witnetCheckResultAvailabilityMock(_queryId);
     }
 
@@ -166,8 +212,31 @@ contract RngWitnetMock is RNGInterface, UsingWitnet, Ownable {
     /// @param requestId The ID of the request used to get the results of the RNG service
     /// @return isCompleted True if the request has completed and a random number is available, false otherwise
     function isRequestComplete(uint32 requestId) external view override returns (bool isCompleted) {
-        uint _queryId = witnetRequestIds[requestId];
-        return _queryId != 0 && _witnetCheckResultAvailabilityMock(_queryId) && randomNumberFetched[requestId];
+        Request memory _request = requests[requestId];
+        return _request.witnetRequestId != 0 && _witnetCheckResultAvailabilityMock(_request.witnetRequestId) && _request.fetched;
+    }
+
+    /// @notice Gets the status of all requests in a range of request ids in a single call
+    /// @dev Request ids above the request count are reported as not requested
+    /// @param _from The first request id of the range
+    /// @param _to The last request id of the range, inclusive
+    /// @return statuses One RequestStatus byte per request id in the range
+    function getRequestStatuses(uint32 _from, uint32 _to) external view returns (bytes memory statuses) {
+        if (_from > _to)
+            return statuses;
+
+        statuses = new bytes(uint256(_to) - _from + 1);
+        for (uint256 i = 0; i < statuses.length; i++) {
+            Request memory _request = requests[uint32(_from + i)];
+            RequestStatus _status = RequestStatus.NotRequested;
+            if (_request.fetched)
+                _status = RequestStatus.Completed;
+            else if (_request.failed)
+                _status = RequestStatus.Failed;
+            else if (_request.witnetRequestId != 0)
+                _status = _witnetCheckResultAvailabilityMock(_request.witnetRequestId) ? RequestStatus.Fetchable : RequestStatus.Pending;
+            statuses[i] = bytes1(uint8(_status));
+        }
     }
 
     /// @notice Gets the random number produced by the 3rd-party service
@@ -194,8 +263,8 @@ contract RngWitnetMock is RNGInterface, UsingWitnet, Ownable {
         // Post the raw randomness request
         uint256 _witnetQueryId = ++__witnetQueryId;
 
-        // Save a mapping of internal query ids to Witnet query ids
-        witnetRequestIds[requestId] = _witnetQueryId;
+        // Save a mapping of internal query ids to Witnet query ids, reverting instead of truncating ids which do not fit in 64 bits
+        requests[requestId] = Request(SafeCast.toUint64(_witnetQueryId), false, false);
 
         emit RngRequested(requestId, _witnetQueryId);
     }
@@ -205,21 +274,44 @@ contract RngWitnetMock is RNGInterface, UsingWitnet, Ownable {
     /// @param requestId The ID of the request of which to fetch the random number
     function fetchRandomness(uint32 requestId) external
     {
-        uint _queryId = witnetRequestIds[requestId];
+        Request storage _request = requests[requestId];
 
         // Check whether the randomness request has already been resolved
-        if (!_witnetCheckResultAvailabilityMock(_queryId))
-            revert randomnessNotAvailable(_queryId);
+        if (!_witnetCheckResultAvailabilityMock(_request.witnetRequestId))
+            revert randomnessNotAvailable(_request.witnetRequestId);
+
+        _fetchRandomness(requestId, _request);
+    }
 
+    /// @notice Function to fetch the randomness of multiple requests in one transaction
+    /// @dev Requests which do not exist, are not resolved yet or were already fetched or failed are skipped instead of reverting
+    /// @param requestIds The IDs of the requests of which to fetch the random numbers
+    function fetchRandomnessBatch(uint32[] calldata requestIds) external
+    {
+        for (uint256 i = 0; i < requestIds.length; i++) {
+            Request storage _request = requests[requestIds[i]];
+            if (_request.witnetRequestId == 0 || _request.fetched || _request.failed || !_witnetCheckResultAvailabilityMock(_request.witnetRequestId))
+                continue;
+
+            _fetchRandomness(requestIds[i], _request);
+        }
+    }
+
+    /// @dev Reads the result of a resolved randomness request and stores the random number if the request succeeded
+    /// @param requestId The ID of the request of which to fetch the random number
+    /// @param _request The storage record of the request
+    function _fetchRandomness(uint32 requestId, Request storage _request) internal
+    {
         // Low-level interaction with the WitnetRequestBoard as to deserialize the result,
         // and check whether the randomness request failed or succeeded:
-        (bool _success, bytes32 _randomness) = _readResponseResultMock(_queryId);
+        (bool _success, bytes32 _randomness) = _readResponseResultMock(_request.witnetRequestId);
         if (_success) {
             uint256 randomness = uint256(_randomness);
             randomNumbers[requestId] = randomness;
-            randomNumberFetched[requestId] = true;
+            _request.fetched = true;
             emit RandomNumberCompleted(requestId, randomness);
         } else {
+            _request.failed = true;
             emit RandomNumberFailed(requestId);
         }
     }
@@ -233,6 +325,12 @@ contract RngWitnetMock is RNGInterface, UsingWitnet, Ownable {
 
     /// Mock functions
 
+    /// @notice Allows owner to let all mock randomness requests fail or succeed when they are fetched
+    /// @param _mockFailure True if fetching randomness should report a failed request
+    function setMockFailure(bool _mockFailure) external onlyOwner {
+        __mockFailure = _mockFailure;
+    }
+
     /// @notice Mock reward estimation function which returns the value passed to the constructor
     /// @return Required reward
     function _witnetEstimateRewardMock() internal view returns (uint256) {
@@ -256,6 +354,6 @@ contract RngWitnetMock is RNGInterface, UsingWitnet, Ownable {
     /// @return A true random number: https://dilbert.com/strip/2001-10-25
     function _readResponseResultMock(uint256 _queryId) internal view returns (bool, bytes32) {
         uint random_number = 9;
-        return (true, bytes32(random_number));
+        return (!__mockFailure, bytes32(random_number));
     }
 }
@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+
+# Command line interface for the keeper which only depends on web3 and the ABIs shipped in abis/
+# Brownie, and with it the compiled contracts, is not loaded, so the first RPC call is made within a second of starting
+# The brownie scripts are still used for deployments and administration
+# Run with: python keeper.py award --network goerli
+# Without --network, every network in config.json is served by one process, see run_networks
+
+# Networks of which the account is read from PRIVATE_KEY_TESTNET instead of PRIVATE_KEY_MAINNET
+TESTNETS = ["goerli"]
+
+def get_private_key(network):
+    private_key_variable = "PRIVATE_KEY_TESTNET" if network in TESTNETS else "PRIVATE_KEY_MAINNET"
+    private_key = os.getenv(private_key_variable)
+    assert private_key is not None and private_key != "", f"Need to set {private_key_variable} to sign transactions on {network}"
+    return private_key
+
+# Set up an independent provider, RPC metrics, signer and transaction sender, and with it a nonce state, for a network
+# Modules are imported on first use, so --help and argument errors return immediately
+def setup_keeper(network, network_config):
+    from eth_account import Account
+
+    from util.helper_functions import get_provider_options
+    from util.helper_functions import setup_web3_provider
+
+    from util.rpc_metrics import RpcMetrics
+    from util.rpc_metrics import start_metrics_export
+
+    from util.transaction_sender import get_transaction_sender
+
+    rpc_metrics = RpcMetrics()
+    w3_provider = setup_web3_provider(network, network_config["provider"], rpc_metrics=rpc_metrics, **get_provider_options(network_config))
+    start_metrics_export(network_config, rpc_metrics)
+
+    account = Account.from_key(get_private_key(network))
+    transaction_sender = get_transaction_sender(network_config, w3_provider, account)
+
+    return network_config, w3_provider, transaction_sender
+
+def run_network(command, network, network_config):
+    command(*setup_keeper(network, network_config))
+
+# Run a blocking function in a daemon thread named after the network and return a future for its result
+# The keeper is built on blocking web3 calls, a thread per network lets the event loop wait for all networks at once
+# and daemon threads do not keep a long-running command alive once the process is interrupted
+def run_in_thread(loop, name, function, *arguments):
+    future = loop.create_future()
+
+    def set_result(result, error):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def target():
+        try:
+            result = function(*arguments)
+        except BaseException as err:
+            loop.call_soon_threadsafe(set_result, None, err)
+        else:
+            loop.call_soon_threadsafe(set_result, result, None)
+
+    threading.Thread(target=target, name=name, daemon=True).start()
+    return future
+
+# Run the command for all networks concurrently, so a slow confirmation on one network never delays another one
+# A network which fails is logged and does not stop the others, returns the networks which failed
+async def run_networks(command, network_configs):
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *[run_in_thread(loop, network, run_network, command, network, network_config) for network, network_config in network_configs.items()],
+        return_exceptions=True,
+    )
+
+    failed_networks = []
+    for network, result in zip(network_configs, results):
+        if isinstance(result, BaseException):
+            logging.error(f"Keeper for {network} failed", exc_info=result)
+            failed_networks.append(network)
+    return failed_networks
+
+def award(network_config, w3_provider, transaction_sender):
+    from util.award import run_award_cycle
+
+    run_award_cycle(network_config, w3_provider, transaction_sender)
+
+def daemon(network_config, w3_provider, transaction_sender):
+    from util.award import run_award_daemon
+
+    run_award_daemon(network_config, w3_provider, transaction_sender)
+
+def fetch(network_config, w3_provider, transaction_sender):
+    from util.award import fetch_random_numbers
+
+    # Fees and gas limits are filled in per transaction by the fee estimator
+    fetch_random_numbers(network_config, w3_provider, transaction_sender, {})
+
+COMMANDS = {
+    "award": (award, "Run a full cycle of prize awarding"),
+    "daemon": (daemon, "Watch the prize strategies and act on every new block"),
+    "fetch": (fetch, "Fetch all outstanding random numbers"),
+}
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="PoolTogether keeper for RngWitnet")
+    parser.add_argument("command", choices=COMMANDS, help=", ".join(f"{name}: {description}" for name, (_, description) in COMMANDS.items()))
+    parser.add_argument("--network", action="append", help="Network section of the configuration file, e.g. ethereum, polygon or goerli, can be repeated (default: all networks)")
+    parser.add_argument("--config", default="config.json", help="Path of the configuration file")
+    args = parser.parse_args(arguments)
+
+    from dotenv import load_dotenv
+
+    from util.logger import get_logger_options
+    from util.logger import setup_stdout_logger
+
+    load_dotenv()
+
+    with open(args.config) as config_file:
+        script_config = json.load(config_file)
+    networks = args.network if args.network else list(script_config)
+    for network in networks:
+        assert network in script_config, f"Network configuration for {network} not found"
+    network_configs = {network: script_config[network] for network in networks}
+
+    # All networks share the logger, which is configured by the first network
+    setup_stdout_logger(**get_logger_options(network_configs[networks[0]]))
+
+    command, _ = COMMANDS[args.command]
+    failed_networks = asyncio.run(run_networks(command, network_configs))
+    if len(failed_networks) > 0:
+        sys.exit(f"Keeper failed for {', '.join(failed_networks)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,17 @@
 import json
-import logging
-import time
 
-from brownie import RngWitnet, RngWitnetMock
+from brownie import RngWitnet, RngWitnetMock, web3
 
 from util.logger import setup_stdout_logger
 
+from util.network_functions import deploy_and_publish
 from util.network_functions import get_account
 from util.network_functions import get_network
 from util.network_functions import is_local_network
 from util.network_functions import is_testnet
 
+from util.transaction_sender import get_transaction_sender
+
 def main(_witnet_request_randomness_address="", _mockGas=0, _mockReward=0):
     setup_stdout_logger()
 
@@ -37,12 +38,12 @@ def main(_witnet_request_randomness_address="", _mockGas=0, _mockReward=0):
 
     account = get_account()
 
-    transaction_parameters = {"from": account}
-    if network_config["priority_fee"] != "" and network_config["max_fee"] != "":
-        transaction_parameters["priority_fee"] = network_config["priority_fee"]
-        transaction_parameters["max_fee"] = network_config["max_fee"]
-
     if is_local_network():
+        transaction_parameters = {"from": account}
+        if network_config["priority_fee"] != "" and network_config["max_fee"] != "":
+            transaction_parameters["priority_fee"] = network_config["priority_fee"]
+            transaction_parameters["max_fee"] = network_config["max_fee"]
+
         return RngWitnetMock.deploy(
             network_config["witnet_request_board_address"],
             witnet_request_randomness_address,
@@ -51,17 +52,10 @@ def main(_witnet_request_randomness_address="", _mockGas=0, _mockReward=0):
             transaction_parameters,
         )
     else:
-        while True:
-            try:
-                return RngWitnet.deploy(
-                    network_config["witnet_request_board_address"],
-                    witnet_request_randomness_address,
-                    transaction_parameters,
-                    publish_source=True,
-                )
-            except ValueError as e:
-                if e.args[0] in ("transaction underpriced", "replacement transaction underpriced"):
-                    logging.warning("Transaction underpriced, retrying in 60 seconds")
-                    time.sleep(60)
-                    continue
-                raise
+        # The deployment is replaced with a higher fee if it is not mined within the configured number of blocks
+        return deploy_and_publish(
+            get_transaction_sender(network_config, web3, account),
+            RngWitnet,
+            network_config["witnet_request_board_address"],
+            witnet_request_randomness_address,
+        )
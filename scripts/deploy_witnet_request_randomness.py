@@ -1,15 +1,16 @@
 import json
-import logging
-import time
 
-from brownie import WitnetRequestRandomness
+from brownie import WitnetRequestRandomness, web3
 
 from util.logger import setup_stdout_logger
 
+from util.network_functions import deploy_and_publish
 from util.network_functions import get_account
 from util.network_functions import get_network
 from util.network_functions import is_local_network
 
+from util.transaction_sender import get_transaction_sender
+
 def main():
     setup_stdout_logger()
 
@@ -22,25 +23,18 @@ def main():
 
     account = get_account()
 
-    transaction_parameters = {"from": account}
-    if network_config["priority_fee"] != "" and network_config["max_fee"] != "":
-        transaction_parameters["priority_fee"] = network_config["priority_fee"]
-        transaction_parameters["max_fee"] = network_config["max_fee"]
-
-    return WitnetRequestRandomness.deploy(
-        transaction_parameters,
-        publish_source=not is_local_network(),
-    )
-
-    while True:
-        try:
-            return WitnetRequestRandomness.deploy(
-                transaction_parameters,
-                publish_source=not is_local_network(),
-            )
-        except ValueError as e:
-            if e.args[0] in ("transaction underpriced", "replacement transaction underpriced"):
-                logging.warning("Transaction underpriced, retrying in 60 seconds")
-                time.sleep(60)
-                continue
-            raise
+    if is_local_network():
+        transaction_parameters = {"from": account}
+        if network_config["priority_fee"] != "" and network_config["max_fee"] != "":
+            transaction_parameters["priority_fee"] = network_config["priority_fee"]
+            transaction_parameters["max_fee"] = network_config["max_fee"]
+
+        return WitnetRequestRandomness.deploy(
+            transaction_parameters,
+        )
+    else:
+        # The deployment is replaced with a higher fee if it is not mined within the configured number of blocks
+        return deploy_and_publish(
+            get_transaction_sender(network_config, web3, account),
+            WitnetRequestRandomness,
+        )
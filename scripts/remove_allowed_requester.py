@@ -1,10 +1,20 @@
 import json
 
-from brownie import accounts, config, Contract, RngWitnet
+from brownie import web3
+
+from web3 import Web3
+
+from util.contract_registry import get_contract
+from util.contract_registry import has_function
+
+from util.multicall import batch_call
+from util.multicall import get_multicall_address
 
 from util.network_functions import get_account
 from util.network_functions import get_network
 
+from util.transaction_sender import get_transaction_sender
+
 def main():
     network = get_network()
 
@@ -14,18 +24,28 @@ def main():
 
     # Grab an RngWitnet deployment
     assert network_config["rng_witnet_address"] != "", "An RngWitnet contract address is required"
-    abi = json.loads(open("build/contracts/RngWitnet.json").read())["abi"]
-    rng_witnet = Contract.from_abi("RngWitnet", network_config["rng_witnet_address"], abi)
+    rng_witnet = get_contract(web3, "RngWitnet", network_config["rng_witnet_address"])
 
     account = get_account()
-
-    transaction_parameters = {"from": account}
-    if network_config["priority_fee"] != "" and network_config["max_fee"] != "":
-        transaction_parameters["priority_fee"] = network_config["priority_fee"]
-        transaction_parameters["max_fee"] = network_config["max_fee"]
-
-    for address in network_config["remove_requesters"]:
-        rng_witnet.removeAllowedRequester(
-            address,
-            transaction_parameters,
-        )
+    transaction_sender = get_transaction_sender(network_config, web3, account)
+
+    addresses = list(dict.fromkeys(Web3.toChecksumAddress(address) for address in network_config["remove_requesters"]))
+
+    # Only send the addresses of which the state has to change, older deployments cannot be queried so all addresses are sent
+    if has_function(web3, rng_witnet, "isAllowedRequester"):
+        allowed = batch_call(web3, rng_witnet, "isAllowedRequester", [[address] for address in addresses], get_multicall_address(network_config))
+        addresses = [address for address, is_allowed in zip(addresses, allowed) if is_allowed]
+        if len(addresses) == 0:
+            print("All requesters were already removed")
+            return
+
+    # Update all requesters in a single transaction, older deployments only have the single requester functions
+    # Calling the batch function on those would revert without a reason
+    if has_function(web3, rng_witnet, "removeAllowedRequesters"):
+        transactions = [(addresses, transaction_sender.send(rng_witnet.functions.removeAllowedRequesters(addresses), {}))]
+    else:
+        transactions = [([address], transaction_sender.send(rng_witnet.functions.removeAllowedRequester(address), {})) for address in addresses]
+
+    receipts = transaction_sender.wait_for_receipts([transaction_hash for _, transaction_hash in transactions])
+    for (requesters, _), receipt in zip(transactions, receipts):
+        print(f"Removing requesters {', '.join(requesters)} {'succeeded' if receipt['status'] == 1 else 'reverted'}")
@@ -1,11 +1,17 @@
 import json
 import time
 
-from brownie import accounts, config, Contract, RngWitnet
+from brownie import web3
+
+from web3.logs import DISCARD
+
+from util.contract_registry import get_contract
 
 from util.network_functions import get_account
 from util.network_functions import get_network
 
+from util.transaction_sender import get_transaction_sender
+
 # This script serves as an example for the steps required to fetch a random number.
 # It only works if you add yourself as an allowed requester to the contract.
 
@@ -18,36 +24,25 @@ def main():
 
     # Grab an RngWitnet deployment
     assert network_config["rng_witnet_address"] != "", "An RngWitnet contract address is required"
-    abi = json.loads(open("build/contracts/RngWitnet.json").read())["abi"]
-    rng_witnet = Contract.from_abi("RngWitnet", network_config["rng_witnet_address"], abi)
+    rng_witnet = get_contract(web3, "RngWitnet", network_config["rng_witnet_address"])
 
     # Request random number
     account = get_account()
+    transaction_sender = get_transaction_sender(network_config, web3, account)
 
-    transaction_parameters = {"from": account}
-    if network_config["priority_fee"] != "" and network_config["max_fee"] != "":
-        transaction_parameters["priority_fee"] = network_config["priority_fee"]
-        transaction_parameters["max_fee"] = network_config["max_fee"]
-    transaction_parameters["gas_limit"] = 300000
-
-    txn = rng_witnet.requestRandomNumber(
-        transaction_parameters,
-    )
-    contract_request_id = txn.events["RngRequested"]["requestId"]
-    witnet_request_id = txn.events["RngRequested"]["witnetRequestId"]
+    receipt = transaction_sender.wait_for_receipt(transaction_sender.send(rng_witnet.functions.requestRandomNumber(), {}))
+    rng_requested = rng_witnet.events.RngRequested().processReceipt(receipt, errors=DISCARD)[0]
+    contract_request_id = rng_requested["args"]["requestId"]
+    witnet_request_id = rng_requested["args"]["witnetRequestId"]
     print(f"Randomness request {contract_request_id} => {witnet_request_id}")
 
     # Wait while the RNG request is being executed
     while True:
-        is_request_fetchable = rng_witnet.isRngFetchable(contract_request_id)
+        is_request_fetchable = rng_witnet.functions.isRngFetchable(contract_request_id).call()
         print(f"Is RNG request {contract_request_id} fetchable: {is_request_fetchable}")
         if is_request_fetchable:
             break
         time.sleep(30)
 
     # Fetch the randomness into the contract
-    del transaction_parameters["gas_limit"]
-    rng_witnet.fetchRandomness(
-        contract_request_id,
-        transaction_parameters,
-    )
+    transaction_sender.wait_for_receipt(transaction_sender.send(rng_witnet.functions.fetchRandomness(contract_request_id), {}))
@@ -1,10 +1,14 @@
 import json
 
-from brownie import accounts, config, Contract, RngWitnet, Wei
+from brownie import Wei, web3
+
+from util.contract_registry import get_contract
 
 from util.network_functions import get_account
 from util.network_functions import get_network
 
+from util.transaction_sender import get_transaction_sender
+
 def main():
     network = get_network()
 
@@ -14,17 +18,14 @@ def main():
 
     # Grab an RngWitnet deployment
     assert network_config["rng_witnet_address"] != "", "An RngWitnet contract address is required"
-    abi = json.loads(open("build/contracts/RngWitnet.json").read())["abi"]
-    rng_witnet = Contract.from_abi("RngWitnet", network_config["rng_witnet_address"], abi)
+    rng_witnet = get_contract(web3, "RngWitnet", network_config["rng_witnet_address"])
 
     account = get_account()
+    transaction_sender = get_transaction_sender(network_config, web3, account)
 
-    transaction_parameters = {"from": account}
-    if network_config["priority_fee"] != "" and network_config["max_fee"] != "":
-        transaction_parameters["priority_fee"] = network_config["priority_fee"]
-        transaction_parameters["max_fee"] = network_config["max_fee"]
-
-    rng_witnet.setMaxFee(
-        Wei(network_config["max_data_request_fee"]),
-        transaction_parameters,
+    transaction_hash = transaction_sender.send(
+        rng_witnet.functions.setMaxFee(Wei(network_config["max_data_request_fee"])),
+        {},
     )
+    receipt = transaction_sender.wait_for_receipt(transaction_hash)
+    print(f"Setting the maximum fee {'succeeded' if receipt['status'] == 1 else 'reverted'}")
@@ -1,10 +1,29 @@
 import json
 
-from brownie import accounts, config, Contract, RngWitnet
+from brownie import web3
+
+from util.contract_registry import get_contract
 
 from util.network_functions import get_account
 from util.network_functions import get_network
 
+from util.transaction_sender import get_transaction_sender
+
+from util.witnet_request import WitnessingParameters
+from util.witnet_request import get_request_hash
+from util.witnet_request import get_total_witnessing_collateral
+from util.witnet_request import get_total_witnessing_fee
+from util.witnet_request import malleate_bytecode
+
+# Witnessing parameters to set
+WITNESSING_PARAMETERS = WitnessingParameters(
+    num_witnesses=8,
+    min_witnessing_consensus=51,
+    witnessing_collateral=10 ** 10,
+    witnessing_reward=10 ** 8,
+    witnessing_unitary_fee=10 ** 6, # commit and reveal inclusion fees
+)
+
 def main():
     network = get_network()
 
@@ -14,29 +33,40 @@ def main():
 
     # Grab an RngWitnet deployment
     assert network_config["rng_witnet_address"] != "", "An RngWitnet contract address is required"
-    abi = json.loads(open("build/contracts/RngWitnet.json").read())["abi"]
-    rng_witnet = Contract.from_abi("RngWitnet", network_config["rng_witnet_address"], abi)
+    rng_witnet = get_contract(web3, "RngWitnet", network_config["rng_witnet_address"])
 
-    print(f"RngWitnet deployment: {rng_witnet}")
+    print(f"RngWitnet deployment: {rng_witnet.address}")
 
     # Print owner of Witnet randomness request instantation
-    abi = json.loads(open("build/contracts/WitnetRequestRandomness.json").read())["abi"]
-    witnet_randomness_request = Contract.from_abi("WitnetRequestRandomness", rng_witnet.witnetRandomnessRequest(), abi)
-    print(f"Owner of the Witnet Randomness Request: {witnet_randomness_request.owner()}")
+    witnet_randomness_request = get_contract(web3, "WitnetRequestRandomness", rng_witnet.functions.witnetRandomnessRequest().call())
+    print(f"Owner of the Witnet Randomness Request: {witnet_randomness_request.functions.owner().call()}")
+
+    # Validate and preview the witnessing parameters without touching the chain
+    bytecode = malleate_bytecode(WITNESSING_PARAMETERS)
+    request_hash = get_request_hash(bytecode)
+    print(f"Witnessing parameters: {dict(WITNESSING_PARAMETERS._asdict())}")
+    print(f"Request bytecode: 0x{bytecode.hex()}")
+    print(f"Request hash: 0x{request_hash.hex()}")
+    print(f"Total witnessing fee: {get_total_witnessing_fee(WITNESSING_PARAMETERS)}")
+    print(f"Total witnessing collateral: {get_total_witnessing_collateral(WITNESSING_PARAMETERS)}")
+
+    if witnet_randomness_request.functions.hash().call() == request_hash:
+        print("The witnessing parameters are already set")
+        return
 
     # Set witnessing parameters
     account = get_account()
+    transaction_sender = get_transaction_sender(network_config, web3, account)
 
-    transaction_parameters = {"from": account}
-    if network_config["priority_fee"] != "" and network_config["max_fee"] != "":
-        transaction_parameters["priority_fee"] = network_config["priority_fee"]
-        transaction_parameters["max_fee"] = network_config["max_fee"]
-
-    witnet_randomness_request.setWitnessingParameters(
-        10 ** 10,   # collateral
-        10 ** 8,    # witness reward
-        10 ** 6,    # commit and reveal inclusion fees
-        8,          # witnesses
-        51,         # consensus percentage
-        transaction_parameters,
+    transaction_hash = transaction_sender.send(
+        witnet_randomness_request.functions.setWitnessingParameters(
+            WITNESSING_PARAMETERS.witnessing_collateral,
+            WITNESSING_PARAMETERS.witnessing_reward,
+            WITNESSING_PARAMETERS.witnessing_unitary_fee,
+            WITNESSING_PARAMETERS.num_witnesses,
+            WITNESSING_PARAMETERS.min_witnessing_consensus,
+        ),
+        {},
     )
+    receipt = transaction_sender.wait_for_receipt(transaction_hash)
+    print(f"Setting the witnessing parameters {'succeeded' if receipt['status'] == 1 else 'reverted'}")
@@ -0,0 +1,41 @@
+import pytest
+
+# Contracts shared by the test modules, deployed once per module
+# Modules using them revert the chain after every test with an autouse fixture depending on fn_isolation
+# Brownie is imported on first use, so the tests which do not need a chain also run without it
+
+@pytest.fixture(scope="module")
+def multicall3(module_isolation):
+    from brownie import Multicall3
+
+    from util.network_functions import get_account
+
+    account = get_account()
+    return Multicall3.deploy({"from": account})
+
+@pytest.fixture(scope="module")
+def witnet_request_randomness(module_isolation):
+    from scripts.deploy_witnet_request_randomness import main as deploy_witnet_request_randomness
+
+    return deploy_witnet_request_randomness()
+
+# RngWitnetMock which is funded, accepts requests from the deployer and pays at most 0.01 ether per request
+@pytest.fixture(scope="module")
+def rng_witnet(witnet_request_randomness):
+    from scripts.deploy_rng_witnet import main as deploy_rng_witnet
+
+    from util.network_functions import get_account
+
+    account = get_account()
+
+    rng_witnet = deploy_rng_witnet(
+        _witnet_request_randomness_address=witnet_request_randomness,
+        _mockGas=1E8,
+        _mockReward=1E9,
+    )
+
+    account.transfer(rng_witnet, "1 ether")
+    rng_witnet.addAllowedRequester(account, {"from": account})
+    rng_witnet.setMaxFee("0.01 ether", {"from": account})
+
+    return rng_witnet
@@ -0,0 +1,156 @@
+import pytest
+
+from brownie import PrizeStrategyMock, web3
+from brownie.network.state import Chain
+
+from util.award_daemon import AWAITING_RNG
+from util.award_daemon import AwardDaemon
+from util.award_daemon import CANCELLING
+from util.award_daemon import COMPLETING
+from util.award_daemon import IDLE
+from util.award_daemon import STARTING
+
+from util.network_functions import get_account
+
+from util.transaction_sender import TransactionSender
+
+# Contracts are deployed once per module and every test runs against a snapshot of the chain which is reverted afterwards
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+@pytest.fixture(scope="module")
+def prize_strategy(rng_witnet):
+    account = get_account()
+
+    # Prize periods of one hour and an RNG request timeout of half an hour
+    prize_strategy = PrizeStrategyMock.deploy(rng_witnet, 3600, 1800, {"from": account})
+    rng_witnet.addAllowedRequester(prize_strategy, {"from": account})
+
+    return prize_strategy
+
+def _end_prize_period():
+    chain = Chain()
+    chain.sleep(3600)
+    chain.mine(1)
+
+@pytest.fixture
+def award_daemon(multicall3, rng_witnet, prize_strategy):
+    account = get_account()
+
+    return AwardDaemon(
+        web3,
+        rng_witnet.address,
+        [prize_strategy.address],
+        TransactionSender(web3, account),
+        {},
+        multicall_address=multicall3.address,
+    )
+
+# Check that one award cycle runs through all states of the state machine
+def test_award_cycle(award_daemon, prize_strategy):
+    prize_strategy_address = prize_strategy.address
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.states[prize_strategy_address] == IDLE
+
+    _end_prize_period()
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.states[prize_strategy_address] == STARTING
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.states[prize_strategy_address] == AWAITING_RNG
+    assert prize_strategy.isRngRequested() == True
+
+    # The mock RNG result is only available after 10 blocks
+    Chain().mine(10)
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.states[prize_strategy_address] == AWAITING_RNG
+    assert len(award_daemon.pending_fetches) == 1
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.states[prize_strategy_address] == COMPLETING
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.states[prize_strategy_address] == IDLE
+    assert prize_strategy.awardCount() == 1
+    assert prize_strategy.lastRandomNumber() == 9
+
+# Check that an award started outside of the daemon is picked up
+def test_resume_started_award(award_daemon, prize_strategy):
+    account = get_account()
+
+    _end_prize_period()
+    prize_strategy.startAward({"from": account})
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.states[prize_strategy.address] == AWAITING_RNG
+
+# Check that a timed out RNG request is cancelled
+def test_cancel_timed_out_award(award_daemon, prize_strategy):
+    account = get_account()
+    chain = Chain()
+
+    _end_prize_period()
+    prize_strategy.startAward({"from": account})
+    request_id = prize_strategy.getLastRngRequestId()
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.states[prize_strategy.address] == AWAITING_RNG
+
+    chain.sleep(1801)
+    chain.mine(1)
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.states[prize_strategy.address] == CANCELLING
+
+    # The prize period is still over, so a new award is started as soon as the cancellation is confirmed
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.states[prize_strategy.address] == STARTING
+    assert prize_strategy.getLastRngRequestId() == request_id + 1
+
+# Check that a request of which the random number failed is not fetched again on every block
+def test_failed_request_not_fetched_again(award_daemon, prize_strategy, rng_witnet):
+    account = get_account()
+
+    _end_prize_period()
+    prize_strategy.startAward({"from": account})
+    request_id = prize_strategy.getLastRngRequestId()
+    rng_witnet.setMockFailure(True, {"from": account})
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.states[prize_strategy.address] == AWAITING_RNG
+
+    # The mock RNG result is only available after 10 blocks
+    Chain().mine(10)
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert len(award_daemon.pending_fetches) == 1
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.failed_requests == {request_id}
+    assert len(award_daemon.pending_fetches) == 0
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert len(award_daemon.pending_fetches) == 0
+    assert award_daemon.states[prize_strategy.address] == AWAITING_RNG
+
+# Check that a request which failed before the daemon started, e.g. fetched by another keeper, is not fetched again
+def test_request_failed_elsewhere_not_fetched(award_daemon, prize_strategy, rng_witnet):
+    account = get_account()
+
+    _end_prize_period()
+    prize_strategy.startAward({"from": account})
+    request_id = prize_strategy.getLastRngRequestId()
+    rng_witnet.setMockFailure(True, {"from": account})
+
+    # The mock RNG result is only available after 10 blocks
+    Chain().mine(10)
+    rng_witnet.fetchRandomness(request_id, {"from": account})
+
+    award_daemon.process_block(web3.eth.blockNumber)
+    assert award_daemon.failed_requests == {request_id}
+    assert len(award_daemon.pending_fetches) == 0
+    assert award_daemon.states[prize_strategy.address] == AWAITING_RNG
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+from web3.exceptions import TransactionNotFound
+
+from util.award import complete_award
+from util.award import resume_awards
+
+from util.award_daemon import AWAITING_RNG
+from util.award_daemon import COMPLETING
+from util.award_daemon import IDLE
+from util.award_daemon import STARTING
+
+from util.award_journal import AwardJournal
+
+CHAIN_ID = 5
+PRIZE_STRATEGIES = ["0x" + f"{index:040x}" for index in range(1, 5)]
+
+# Stands in for a web3 provider of which only transactions and receipts are requested
+class ReceiptProvider:
+    def __init__(self, receipts, pending=()):
+        self.receipts = receipts
+        self.pending = set(pending)
+        self.requested = []
+        self.eth = SimpleNamespace(get_transaction=self.get_transaction, get_transaction_receipt=self.get_transaction_receipt)
+
+    def get_transaction(self, transaction_hash):
+        if transaction_hash in self.pending:
+            return {"hash": transaction_hash, "blockNumber": None}
+        if transaction_hash in self.receipts:
+            return {"hash": transaction_hash, "blockNumber": 1}
+        raise TransactionNotFound(transaction_hash)
+
+    def get_transaction_receipt(self, transaction_hash):
+        self.requested.append(transaction_hash)
+        if transaction_hash not in self.receipts:
+            raise TransactionNotFound(transaction_hash)
+        return self.receipts[transaction_hash]
+
+# Check that the latest state of every strategy which is not idle survives reopening the journal
+def test_replay(tmp_path):
+    path = str(tmp_path / "award_journal.jsonl")
+
+    award_journal = AwardJournal(path)
+    award_journal.record(CHAIN_ID, PRIZE_STRATEGIES[0], STARTING, "0x01", 7)
+    award_journal.record(CHAIN_ID, PRIZE_STRATEGIES[0], AWAITING_RNG)
+    award_journal.record(CHAIN_ID, PRIZE_STRATEGIES[1], STARTING, "0x02", 8)
+    award_journal.record(CHAIN_ID, PRIZE_STRATEGIES[1], IDLE)
+    award_journal.record(1, PRIZE_STRATEGIES[2], COMPLETING, "0x03", 1)
+    award_journal.close()
+
+    # A record torn by a crash is ignored
+    with open(path, "a") as journal_file:
+        journal_file.write('{"chain_id": 5, "prize_str')
+
+    award_journal = AwardJournal(path)
+    pending = award_journal.get_pending(CHAIN_ID)
+    assert {address.lower(): record["state"] for address, record in pending.items()} == {PRIZE_STRATEGIES[0]: AWAITING_RNG}
+    assert len(award_journal.get_pending(1)) == 1
+
+    # Reopening compacts the journal to the strategies which are not idle
+    with open(path) as journal_file:
+        assert len(journal_file.readlines()) == 2
+
+# Check that only the in-flight transactions are looked up when resuming
+def test_resume_awards(tmp_path):
+    award_journal = AwardJournal(str(tmp_path / "award_journal.jsonl"))
+    award_journal.record(CHAIN_ID, PRIZE_STRATEGIES[0], AWAITING_RNG)
+    award_journal.record(CHAIN_ID, PRIZE_STRATEGIES[1], STARTING, "0x02", 8)
+    award_journal.record(CHAIN_ID, PRIZE_STRATEGIES[2], STARTING, "0x03", 9)
+    award_journal.record(CHAIN_ID, PRIZE_STRATEGIES[3], COMPLETING, "0x04", 10)
+
+    w3_provider = ReceiptProvider({"0x02": {"status": 1}, "0x04": {"status": 1}})
+    awards_started = resume_awards(award_journal, w3_provider, CHAIN_ID)
+
+    assert sorted(w3_provider.requested) == ["0x02", "0x03", "0x04"]
+    # The award of which the startAward transaction is unknown is checked on-chain by complete_award
+    assert sorted(address.lower() for address in awards_started) == PRIZE_STRATEGIES[:3]
+    states = {address.lower(): record["state"] for address, record in award_journal.get_pending(CHAIN_ID).items()}
+    assert states == {PRIZE_STRATEGIES[0]: AWAITING_RNG, PRIZE_STRATEGIES[1]: AWAITING_RNG, PRIZE_STRATEGIES[2]: STARTING}
+
+# Check that an award of which the startAward transaction is still pending is not reset for lacking an RNG request
+def test_complete_award_keeps_pending_start(tmp_path, monkeypatch):
+    award_journal = AwardJournal(str(tmp_path / "award_journal.jsonl"))
+    award_journal.record(CHAIN_ID, PRIZE_STRATEGIES[0], STARTING, "0x01", 7)
+    award_journal.record(CHAIN_ID, PRIZE_STRATEGIES[1], STARTING, "0x02", 8)
+
+    # No award can be completed and no RNG request was made yet
+    monkeypatch.setattr("util.award.check_prize_strategies", lambda network_config, w3_provider, addresses, view: {address: False for address in addresses})
+
+    w3_provider = ReceiptProvider({}, pending=["0x01"])
+    awards_started = resume_awards(award_journal, w3_provider, CHAIN_ID)
+    transaction_sender = SimpleNamespace(chain_id=CHAIN_ID, wait_for_receipts=lambda transaction_hashes: [])
+    complete_award({}, w3_provider, awards_started, transaction_sender, {}, award_journal)
+
+    # The dropped startAward transaction is reset, the pending one is resumed by the next run
+    states = {address.lower(): record["state"] for address, record in award_journal.get_pending(CHAIN_ID).items()}
+    assert states == {PRIZE_STRATEGIES[0]: STARTING}
@@ -0,0 +1,66 @@
+import json
+
+from brownie import RngWitnet, web3
+
+from web3 import Web3
+
+from util.constants import maxFeeTooLow
+
+from util.contract_registry import decode_error
+from util.contract_registry import get_contract
+from util.contract_registry import get_event_topics
+from util.contract_registry import get_function_selectors
+from util.contract_registry import has_function
+from util.contract_registry import load_abi
+
+# Check that every ABI is only parsed once
+def test_load_abi_once():
+    assert load_abi("RngWitnet") is load_abi("RngWitnet")
+    assert load_abi("PrizeStrategy") is load_abi("PrizeStrategy")
+
+# Check that contract objects are memoized per provider and address
+def test_get_contract_memoized():
+    address = "0x60F5E215070540604B69c5249eE606B310548135"
+    rng_witnet = get_contract(web3, "RngWitnet", address)
+
+    assert get_contract(web3, "RngWitnet", address.lower()) is rng_witnet
+    assert get_contract(web3, "PrizeStrategy", address) is not rng_witnet
+
+    # Another provider for the same chain gets contracts which send their calls through it
+    w3_provider = Web3(web3.provider)
+    assert get_contract(w3_provider, "RngWitnet", address) is not rng_witnet
+    assert get_contract(w3_provider, "RngWitnet", address).web3 is w3_provider
+
+# Check the precomputed topic and selector tables
+def test_selector_tables():
+    event_topics = get_event_topics("RngWitnet")
+    assert event_topics[Web3.keccak(text="RandomNumberFailed(uint32)").hex()]["name"] == "RandomNumberFailed"
+
+    function_selectors = get_function_selectors("PrizeStrategy")
+    assert function_selectors[Web3.keccak(text="canStartAward()")[:4].hex()]["name"] == "canStartAward"
+
+    # Tuple arguments are hashed as their component types, not as tuple
+    function_selectors = get_function_selectors("Multicall3")
+    assert function_selectors["0x82ad56cb"]["name"] == "aggregate3"
+
+# Check that functions are only found in the code of deployments which implement them
+def test_has_function(multicall3, rng_witnet):
+    rng_witnet_web3 = get_contract(web3, "RngWitnet", rng_witnet.address)
+    assert has_function(web3, rng_witnet_web3, "addAllowedRequesters")
+    assert has_function(web3, rng_witnet_web3, "isAllowedRequester")
+
+    assert not has_function(web3, get_contract(web3, "RngWitnet", multicall3.address), "addAllowedRequesters")
+
+# Check decoding revert data of a custom error
+def test_decode_error():
+    revert_data = f"{maxFeeTooLow}{1:064x}{2:064x}"
+
+    assert decode_error("RngWitnet", revert_data) == ("maxFeeTooLow", {"_maxFee": 1, "_fee": 2})
+    assert decode_error("RngWitnet", "0x12345678") is None
+
+# Check that the shipped RngWitnet ABI matches the compiled contract
+def test_shipped_abi():
+    def signatures(abi):
+        return sorted(json.dumps(entry, sort_keys=True) for entry in abi)
+
+    assert signatures(load_abi("RngWitnet")) == signatures(RngWitnet.abi)
@@ -0,0 +1,171 @@
+import threading
+
+from types import SimpleNamespace
+
+import pytest
+
+from web3 import Web3
+
+from util.contract_registry import load_abi
+
+from util.event_fetcher import RawEvent
+from util.event_fetcher import decode_raw_log
+from util.event_fetcher import get_event_abis
+from util.event_fetcher import iter_raw_events
+from util.event_fetcher import iter_raw_logs
+
+RNG_WITNET_ADDRESS = "0x60F5E215070540604B69c5249eE606B310548135"
+
+FAKE_TOPIC = "0x" + "ab" * 32
+
+# Stands in for a web3 provider of which eth_getLogs rejects ranges like node API providers do
+class FakeRangeProvider:
+    def __init__(self, logs_per_block, max_range=None, max_results=None, suggest_range=False):
+        self.logs_per_block = logs_per_block
+        self.max_range = max_range
+        self.max_results = max_results
+        self.suggest_range = suggest_range
+        self.calls = []
+        self.lock = threading.Lock()
+        self.eth = SimpleNamespace(get_logs=self.get_logs)
+
+    def get_logs(self, log_filter):
+        from_block, to_block = log_filter["fromBlock"], log_filter["toBlock"]
+        with self.lock:
+            self.calls.append((from_block, to_block))
+
+        if self.max_range is not None and to_block - from_block + 1 > self.max_range:
+            message = "block range is too wide"
+            if self.suggest_range:
+                message = f"Log response size exceeded. this block range should work: [{hex(from_block)}, {hex(from_block + self.max_range - 1)}]"
+            raise ValueError({"code": -32005, "message": message})
+
+        logs = [
+            {"blockNumber": block, "logIndex": log_index}
+            for block in range(from_block, to_block + 1)
+            for log_index in range(self.logs_per_block.get(block, 0))
+        ]
+        if self.max_results is not None and len(logs) > self.max_results:
+            raise ValueError({"code": -32005, "message": f"query returned more than {self.max_results} results"})
+        return logs
+
+def _get_logs(w3_provider, from_block, to_block, **kwargs):
+    return list(iter_raw_logs(w3_provider, RNG_WITNET_ADDRESS, [FAKE_TOPIC], from_block, to_block, **kwargs))
+
+def _block_order(logs):
+    return [(log["blockNumber"], log["logIndex"]) for log in logs]
+
+# Check that all logs are returned in block order when ranges are fetched concurrently
+def test_concurrent_ranges_in_order():
+    w3_provider = FakeRangeProvider({block: 1 for block in range(0, 1000, 7)})
+
+    logs = _get_logs(w3_provider, 0, 999, max_workers=4, initial_window=50)
+
+    assert _block_order(logs) == sorted(_block_order(logs))
+    assert len(logs) == len(range(0, 1000, 7))
+
+# Check that ranges which exceed the provider's block range cap are split
+def test_shrink_on_range_cap():
+    w3_provider = FakeRangeProvider({block: 1 for block in range(0, 10000, 100)}, max_range=1000)
+
+    logs = _get_logs(w3_provider, 0, 9999, initial_window=100000)
+
+    assert len(logs) == 100
+    assert _block_order(logs) == sorted(_block_order(logs))
+
+# Check that ranges returning too many results are split
+def test_shrink_on_result_limit():
+    w3_provider = FakeRangeProvider({block: 10 for block in range(0, 500)}, max_results=1000)
+
+    logs = _get_logs(w3_provider, 0, 499, initial_window=500)
+
+    assert len(logs) == 5000
+    assert _block_order(logs) == sorted(_block_order(logs))
+
+# Check that the range suggested in the error message is used to split
+def test_suggested_range():
+    w3_provider = FakeRangeProvider({0: 1, 299: 1}, max_range=300, suggest_range=True)
+
+    logs = _get_logs(w3_provider, 0, 999, max_workers=1, initial_window=1000)
+
+    assert len(logs) == 2
+    assert w3_provider.calls[1] == (0, 299)
+
+# Check that the window grows while responses are small
+def test_grow_window():
+    w3_provider = FakeRangeProvider({})
+
+    _get_logs(w3_provider, 0, 9999, max_workers=1, initial_window=100, max_window=10000)
+
+    windows = [to_block - from_block + 1 for from_block, to_block in w3_provider.calls]
+    assert windows[:4] == [100, 200, 400, 800]
+
+# Check that errors which are unrelated to the range size are raised
+def test_raise_unrelated_errors():
+    class FailingProvider(FakeRangeProvider):
+        def get_logs(self, log_filter):
+            raise ValueError({"code": -32000, "message": "execution reverted"})
+
+    with pytest.raises(ValueError):
+        _get_logs(FailingProvider({}), 0, 100)
+
+def _topic(signature):
+    return Web3.keccak(text=signature)
+
+def _uint_topic(value):
+    return value.to_bytes(32, "big")
+
+# Stands in for a web3 provider which filters raw logs on block range and topic0 like eth_getLogs
+class FakeLogProvider:
+    def __init__(self, logs):
+        self.logs = logs
+        self.filters = []
+        self.eth = SimpleNamespace(get_logs=self.get_logs)
+
+    def get_logs(self, log_filter):
+        self.filters.append(log_filter)
+        logs = [
+            log for log in self.logs
+            if log_filter["fromBlock"] <= log["blockNumber"] <= log_filter["toBlock"]
+            and "0x" + bytes(log["topics"][0]).hex() in log_filter["topics"][0]
+        ]
+        return sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"]))
+
+def _log(block_number, topics, data=b""):
+    return {"blockNumber": block_number, "logIndex": 0, "transactionHash": bytes([block_number]) * 32, "topics": topics, "data": "0x" + data.hex()}
+
+# Check that indexed arguments are decoded from the topics and the data only when asked for
+def test_decode_raw_log():
+    event_abis = get_event_abis(load_abi("RngWitnet"), ["RandomNumberCompleted", "RequesterAdded", "RngRequested"])
+
+    completed = _log(7, [_topic("RandomNumberCompleted(uint32,uint256)"), _uint_topic(3)], _uint_topic(2 ** 255))
+    assert decode_raw_log(completed, event_abis) == RawEvent("RandomNumberCompleted", 7, 0, "0x" + "07" * 32, (3, None))
+    assert decode_raw_log(completed, event_abis, decode_data=True).args == (3, 2 ** 255)
+
+    requested = _log(8, [_topic("RngRequested(uint32,uint256)"), _uint_topic(4), _uint_topic(1234)])
+    assert decode_raw_log(requested, event_abis).args == (4, 1234)
+
+    requester_added = _log(9, [_topic("RequesterAdded(address)"), bytes(12) + bytes.fromhex(RNG_WITNET_ADDRESS[2:])])
+    assert decode_raw_log(requester_added, event_abis).args == (RNG_WITNET_ADDRESS,)
+
+# Check that several events are fetched with a single eth_getLogs per range and other events are filtered out
+def test_iter_raw_events():
+    logs = [
+        _log(block, [_topic("RngRequested(uint32,uint256)"), _uint_topic(block), _uint_topic(block * 10)])
+        for block in range(0, 100, 10)
+    ] + [
+        _log(block, [_topic("RandomNumberFailed(uint32)"), _uint_topic(block)])
+        for block in range(5, 100, 10)
+    ] + [
+        _log(block, [_topic("MaxFeeSet(uint256)"), _uint_topic(1)])
+        for block in range(0, 100, 3)
+    ]
+    w3_provider = FakeLogProvider(logs)
+    event_abis = get_event_abis(load_abi("RngWitnet"), ["RngRequested", "RandomNumberFailed"])
+
+    events = list(iter_raw_events(w3_provider, RNG_WITNET_ADDRESS, event_abis, 0, 99, max_workers=1, initial_window=50))
+
+    assert len(w3_provider.filters) == 2
+    assert all(log_filter["address"] == RNG_WITNET_ADDRESS for log_filter in w3_provider.filters)
+    assert [event.event_name for event in events] == ["RngRequested", "RandomNumberFailed"] * 10
+    assert [event.args[0] for event in events] == list(range(0, 100, 5))
@@ -0,0 +1,74 @@
+import pytest
+
+from brownie import web3
+from brownie.network.state import Chain
+
+from util.event_index import get_indexed_events
+from util.event_index import get_indexed_request_ids
+from util.event_index import open_event_index
+from util.event_index import sync_event_index
+
+from util.network_functions import get_account
+
+# Contracts are deployed once per module and every test runs against a snapshot of the chain which is reverted afterwards
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+@pytest.fixture
+def event_index(tmp_path):
+    return open_event_index(str(tmp_path / "event_index.db"))
+
+def _sync(event_index, rng_witnet):
+    rng_witnet_web3 = web3.eth.contract(address=rng_witnet.address, abi=rng_witnet.abi)
+    sync_event_index(event_index, web3.eth.chain_id, web3, rng_witnet_web3, rng_witnet.tx.txid)
+
+# Check that all RngWitnet events since deployment are indexed
+def test_sync_event_index(event_index, rng_witnet):
+    account = get_account()
+
+    rng_witnet.requestRandomNumber({"from": account})
+    rng_witnet.requestRandomNumber({"from": account})
+
+    _sync(event_index, rng_witnet)
+
+    chain_id = web3.eth.chain_id
+    assert get_indexed_request_ids(event_index, chain_id, rng_witnet.address, "RngRequested") == {1, 2}
+    assert len(get_indexed_events(event_index, chain_id, rng_witnet.address, "RequesterAdded")) == 1
+    assert get_indexed_events(event_index, chain_id, rng_witnet.address, "MaxFeeSet")[0]["args"]["maxFee"] == 1E16
+
+# Check that a second sync only adds new events and does not duplicate rescanned ones
+def test_incremental_sync(event_index, rng_witnet):
+    account = get_account()
+
+    rng_witnet.requestRandomNumber({"from": account})
+    _sync(event_index, rng_witnet)
+
+    Chain().mine(10)
+    rng_witnet.fetchRandomness(1, {"from": account})
+    rng_witnet.requestRandomNumber({"from": account})
+    _sync(event_index, rng_witnet)
+
+    chain_id = web3.eth.chain_id
+    assert get_indexed_request_ids(event_index, chain_id, rng_witnet.address, "RngRequested") == {1, 2}
+    assert get_indexed_request_ids(event_index, chain_id, rng_witnet.address, "RandomNumberCompleted") == {1}
+    assert len(get_indexed_events(event_index, chain_id, rng_witnet.address, "RngRequested")) == 2
+
+    last_block = event_index.execute("SELECT last_block FROM checkpoints").fetchone()[0]
+    assert last_block == web3.eth.blockNumber
+
+# Check that events from reorganized blocks are dropped on the next sync
+def test_reorg(event_index, rng_witnet):
+    account = get_account()
+    chain = Chain()
+
+    chain.snapshot()
+    rng_witnet.requestRandomNumber({"from": account})
+    _sync(event_index, rng_witnet)
+
+    # Replace the block containing the request with an empty block
+    chain.revert()
+    chain.mine(1)
+    _sync(event_index, rng_witnet)
+
+    assert get_indexed_request_ids(event_index, web3.eth.chain_id, rng_witnet.address, "RngRequested") == set()
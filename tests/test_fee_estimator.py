@@ -0,0 +1,123 @@
+import json
+
+from web3 import Web3
+
+from util.fee_estimator import DEFAULT_GAS_LIMITS
+from util.fee_estimator import FeeEstimator
+from util.fee_estimator import GasLimitCache
+from util.fee_estimator import get_inclusion_percentile
+
+class FakeEth:
+    chain_id = 1
+
+    def __init__(self, fee_history):
+        self._fee_history = fee_history
+        self.percentiles = []
+
+    def fee_history(self, block_count, newest_block, reward_percentiles):
+        self.percentiles.append(reward_percentiles)
+        if isinstance(self._fee_history, Exception):
+            raise self._fee_history
+        return self._fee_history
+
+class FakeWeb3:
+    def __init__(self, fee_history):
+        self.eth = FakeEth(fee_history)
+
+GWEI = 10 ** 9
+
+FEE_HISTORY = {
+    "baseFeePerGas": [20 * GWEI, 22 * GWEI, 24 * GWEI, 32 * GWEI],
+    "gasUsedRatio": [0.5, 0.0, 0.9],
+    "reward": [[2 * GWEI], [0], [4 * GWEI]],
+}
+
+def test_inclusion_percentile():
+    assert get_inclusion_percentile(1) == 90
+    assert get_inclusion_percentile(4) == 60
+    assert get_inclusion_percentile(100) == 20
+
+# Check that empty blocks are ignored and the max fee covers the base fee rising until the target block
+def test_fees_from_fee_history():
+    w3_provider = FakeWeb3(FEE_HISTORY)
+    fee_estimator = FeeEstimator(w3_provider, target_blocks=2)
+
+    fees = fee_estimator.get_fees()
+
+    assert w3_provider.eth.percentiles == [[75]]
+    assert fees["maxPriorityFeePerGas"] == 3 * GWEI
+    assert fees["maxFeePerGas"] == 32 * GWEI * 81 // 64 + 3 * GWEI
+
+# Check that the configured fees cap the estimated fees
+def test_fees_capped():
+    fee_estimator = FeeEstimator(FakeWeb3(FEE_HISTORY), max_priority_fee=1 * GWEI, max_fee=30 * GWEI)
+
+    assert fee_estimator.get_fees() == {"maxPriorityFeePerGas": 1 * GWEI, "maxFeePerGas": 30 * GWEI}
+
+# Check that the configured fees are used when the node does not support eth_feeHistory
+def test_fees_without_fee_history():
+    fee_estimator = FeeEstimator(FakeWeb3(ValueError({"code": -32601, "message": "method not found"})), max_priority_fee=1 * GWEI, max_fee=30 * GWEI)
+
+    assert fee_estimator.get_fees() == {"maxPriorityFeePerGas": 1 * GWEI, "maxFeePerGas": 30 * GWEI}
+
+CONTRACT_ADDRESS = "0x" + "11" * 20
+OTHER_CONTRACT_ADDRESS = "0x" + "22" * 20
+
+# Check that the gas limit is learned from receipts per contract and persisted between runs
+def test_gas_limit_cache(tmp_path):
+    path = str(tmp_path / "gas_limits.json")
+    selector = list(DEFAULT_GAS_LIMITS.keys())[0]
+
+    gas_limit_cache = GasLimitCache(path, margin=1.5, samples=2)
+    assert gas_limit_cache.get_gas_limit(1, CONTRACT_ADDRESS, selector) == DEFAULT_GAS_LIMITS[selector]
+    assert gas_limit_cache.get_gas_limit(1, CONTRACT_ADDRESS, "0x12345678") is None
+
+    for gas_used in (100000, 200000, 150000):
+        gas_limit_cache.record(1, CONTRACT_ADDRESS, selector, gas_used)
+
+    assert gas_limit_cache.get_gas_limit(1, CONTRACT_ADDRESS, selector) == 300000
+    assert gas_limit_cache.get_gas_limit(1, OTHER_CONTRACT_ADDRESS, selector) == DEFAULT_GAS_LIMITS[selector]
+    assert json.load(open(path)) == {"1": {Web3.toChecksumAddress(CONTRACT_ADDRESS): {selector: [200000, 150000]}}}
+
+    gas_limit_cache = GasLimitCache(path, margin=1.5)
+    assert gas_limit_cache.get_gas_limit(1, CONTRACT_ADDRESS, selector) == 300000
+    assert gas_limit_cache.get_gas_limit(5, CONTRACT_ADDRESS, selector) == DEFAULT_GAS_LIMITS[selector]
+
+# Check that samples of a cache written before they were kept per contract are dropped
+def test_gas_limit_cache_without_contracts(tmp_path):
+    path = tmp_path / "gas_limits.json"
+    path.write_text(json.dumps({"1": {"0x12345678": [100000]}}))
+
+    gas_limit_cache = GasLimitCache(str(path))
+    assert gas_limit_cache.get_gas_limit(1, CONTRACT_ADDRESS, "0x12345678") is None
+
+
+# Check that only successful transactions are learned from
+def test_record_receipt():
+    fee_estimator = FeeEstimator(FakeWeb3(FEE_HISTORY), gas_limit_cache=GasLimitCache())
+
+    fee_estimator.record_receipt({"to": CONTRACT_ADDRESS, "data": "0x12345678"}, {"status": 0, "gasUsed": 21000})
+    assert fee_estimator.get_gas_limit(CONTRACT_ADDRESS, "0x12345678") is None
+
+    fee_estimator.record_receipt({"to": CONTRACT_ADDRESS, "data": "0x12345678"}, {"status": 1, "gasUsed": 40000})
+    assert fee_estimator.get_gas_limit(CONTRACT_ADDRESS, "0x12345678") == 50000
+    assert fee_estimator.get_gas_limit(OTHER_CONTRACT_ADDRESS, "0x12345678") is None
+
+# Check that a transaction which ran out of gas raises the gas limit of its function
+def test_record_receipt_out_of_gas():
+    fee_estimator = FeeEstimator(FakeWeb3(FEE_HISTORY), gas_limit_cache=GasLimitCache())
+
+    fee_estimator.record_receipt({"to": CONTRACT_ADDRESS, "data": "0x12345678"}, {"status": 1, "gasUsed": 40000})
+    fee_estimator.record_receipt({"to": CONTRACT_ADDRESS, "data": "0x12345678", "gas": 50000}, {"status": 0, "gasUsed": 30000})
+    assert fee_estimator.get_gas_limit(CONTRACT_ADDRESS, "0x12345678") == 50000
+
+    fee_estimator.record_receipt({"to": CONTRACT_ADDRESS, "data": "0x12345678", "gas": 50000}, {"status": 0, "gasUsed": 50000})
+    assert fee_estimator.get_gas_limit(CONTRACT_ADDRESS, "0x12345678") == 62500
+
+# Check that contract creations are not learned from, the start of their init code is no function selector
+def test_record_receipt_contract_creation():
+    fee_estimator = FeeEstimator(FakeWeb3(FEE_HISTORY), gas_limit_cache=GasLimitCache())
+
+    fee_estimator.record_receipt({"data": "0x6080604052"}, {"status": 1, "gasUsed": 500000})
+    fee_estimator.record_receipt({"to": None, "data": "0x6080604052"}, {"status": 1, "gasUsed": 500000})
+    assert fee_estimator.get_gas_limit(CONTRACT_ADDRESS, "0x60806040") is None
@@ -0,0 +1,147 @@
+import os
+
+import pytest
+
+from brownie.network.state import Chain
+
+from benchmarks.gas_report import compare_gas
+from benchmarks.gas_report import format_regressions
+from benchmarks.gas_report import get_gas_baseline_path
+from benchmarks.gas_report import get_gas_report_path
+from benchmarks.gas_report import get_gas_threshold
+from benchmarks.gas_report import read_gas_report
+from benchmarks.gas_report import should_update_baseline
+from benchmarks.gas_report import update_gas_baseline
+from benchmarks.gas_report import write_gas_report
+
+from util.network_functions import get_account
+
+from util.witnet_request import WitnessingParameters
+
+# Witnessing parameters of which the varints are encoded in one byte and in the maximum number of bytes
+WITNESSING_PARAMETER_SETS = {
+    "small": WitnessingParameters(2, 51, 10 ** 9, 1, 0),
+    "default": WitnessingParameters(16, 51, 10 ** 9, 5 * 10 ** 5, 10 ** 5),
+    "large": WitnessingParameters(125, 99, 2 ** 64 - 1, 2 ** 64 - 1, 2 ** 64 - 1),
+}
+
+# Number of requests settled in a single fetchRandomnessBatch transaction
+BATCH_SIZES = (1, 10)
+
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+@pytest.fixture(scope="module")
+def gas_used(module_isolation):
+    if should_update_baseline() and "PYTEST_XDIST_WORKER" in os.environ:
+        pytest.fail("Record the gas baseline without -n, the workers would overwrite each other's measurements")
+
+    gas_used = {}
+    yield gas_used
+
+    # Write the report of the tests which ran in this module, the tests themselves fail on a regression
+    baseline_path = get_gas_baseline_path()
+    threshold = get_gas_threshold()
+    regressions = compare_gas(gas_used, read_gas_report(baseline_path) or {}, threshold)
+    write_gas_report(get_gas_report_path(), gas_used, threshold, regressions)
+
+    # Only the measured operations are updated, so a subset selected with -k does not drop the others
+    if should_update_baseline():
+        update_gas_baseline(baseline_path, gas_used)
+
+# Record the gas used by an operation and compare it against the baseline, unless a new baseline is recorded
+def _record_gas(gas_used, operation, gas):
+    gas_used[operation] = gas
+    if should_update_baseline():
+        return
+
+    baseline_path = get_gas_baseline_path()
+    baseline = read_gas_report(baseline_path)
+    assert baseline is not None, f"No gas baseline found at {baseline_path}, record it with GAS_UPDATE_BASELINE=1"
+    assert operation in baseline, f"No gas baseline for {operation} in {baseline_path}, record it with GAS_UPDATE_BASELINE=1"
+
+    threshold = get_gas_threshold()
+    regressions = compare_gas({operation: gas}, baseline, threshold)
+    assert not regressions, f"Gas used increased by more than {threshold:.2%}:\n{format_regressions(regressions)}"
+
+def _request_random_numbers(rng_witnet, requests):
+    account = get_account()
+
+    transactions = [rng_witnet.requestRandomNumber({"from": account}) for _ in range(requests)]
+    Chain().mine(10)
+
+    return [transaction.return_value[0] for transaction in transactions]
+
+def test_deployment_gas(gas_used, witnet_request_randomness, rng_witnet):
+    _record_gas(gas_used, "WitnetRequestRandomness.deploy", witnet_request_randomness.tx.gas_used)
+    # Includes cloning and initializing the randomness request
+    _record_gas(gas_used, "RngWitnetMock.deploy", rng_witnet.tx.gas_used)
+
+def test_clone_gas(gas_used, witnet_request_randomness):
+    account = get_account()
+
+    # Both clone functions initialize the clone and transfer its ownership
+    _record_gas(gas_used, "WitnetRequestRandomness.clone", witnet_request_randomness.clone({"from": account}).gas_used)
+    _record_gas(gas_used, "WitnetRequestRandomness.cloneDeterministic", witnet_request_randomness.cloneDeterministic("0x" + "01" * 32, {"from": account}).gas_used)
+
+@pytest.mark.parametrize("name", WITNESSING_PARAMETER_SETS)
+def test_set_witnessing_parameters_gas(gas_used, witnet_request_randomness, name):
+    parameters = WITNESSING_PARAMETER_SETS[name]
+
+    transaction = witnet_request_randomness.setWitnessingParameters(
+        parameters.witnessing_collateral,
+        parameters.witnessing_reward,
+        parameters.witnessing_unitary_fee,
+        parameters.num_witnesses,
+        parameters.min_witnessing_consensus,
+        {"from": get_account()},
+    )
+    _record_gas(gas_used, f"WitnetRequestRandomness.setWitnessingParameters[{name}]", transaction.gas_used)
+
+def test_request_random_number_gas(gas_used, rng_witnet):
+    account = get_account()
+
+    # The first request initializes the request counter, later requests only update it
+    _record_gas(gas_used, "RngWitnet.requestRandomNumber[first]", rng_witnet.requestRandomNumber({"from": account}).gas_used)
+    _record_gas(gas_used, "RngWitnet.requestRandomNumber", rng_witnet.requestRandomNumber({"from": account}).gas_used)
+
+def test_fetch_randomness_gas(gas_used, rng_witnet):
+    account = get_account()
+
+    completed_request_id, failed_request_id = _request_random_numbers(rng_witnet, 2)
+
+    _record_gas(gas_used, "RngWitnet.fetchRandomness[completed]", rng_witnet.fetchRandomness(completed_request_id, {"from": account}).gas_used)
+
+    rng_witnet.setMockFailure(True, {"from": account})
+    transaction = rng_witnet.fetchRandomness(failed_request_id, {"from": account})
+    assert "RandomNumberFailed" in transaction.events
+    _record_gas(gas_used, "RngWitnet.fetchRandomness[failed]", transaction.gas_used)
+
+@pytest.mark.parametrize("batch_size", BATCH_SIZES)
+def test_fetch_randomness_batch_gas(gas_used, rng_witnet, batch_size):
+    account = get_account()
+
+    request_ids = _request_random_numbers(rng_witnet, batch_size)
+
+    transaction = rng_witnet.fetchRandomnessBatch(request_ids, {"from": account})
+    assert len(transaction.events["RandomNumberCompleted"]) == batch_size
+    _record_gas(gas_used, f"RngWitnet.fetchRandomnessBatch[{batch_size}]", transaction.gas_used)
+
+def test_gas_regression_threshold():
+    baseline = {"requestRandomNumber": 100000, "fetchRandomness": 50000}
+
+    assert compare_gas({"requestRandomNumber": 101000, "fetchRandomness": 40000, "clone": 1}, baseline, 0.01) == {}
+
+    regressions = compare_gas({"requestRandomNumber": 101001, "fetchRandomness": 50000}, baseline, 0.01)
+    assert list(regressions) == ["requestRandomNumber"]
+    assert regressions["requestRandomNumber"]["baseline"] == 100000
+    assert regressions["requestRandomNumber"]["gas_used"] == 101001
+
+def test_update_gas_baseline(tmp_path):
+    baseline_path = tmp_path / "gas_baseline.json"
+
+    update_gas_baseline(baseline_path, {"requestRandomNumber": 100000, "fetchRandomness": 50000})
+    update_gas_baseline(baseline_path, {"fetchRandomness": 40000})
+
+    assert read_gas_report(baseline_path) == {"fetchRandomness": 40000, "requestRandomNumber": 100000}
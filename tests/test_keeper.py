@@ -0,0 +1,56 @@
+import asyncio
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from benchmarks.startup_benchmark import ENTRY_POINTS
+
+from keeper import get_private_key
+from keeper import main
+from keeper import run_networks
+
+# Check that nothing on the path of the keeper commands loads brownie
+def test_keeper_without_brownie():
+    code = f"import sys; {ENTRY_POINTS['keeper']}; assert 'brownie' not in sys.modules, 'brownie was imported'"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+# Check that the account of a network is read from the testnet or mainnet private key
+def test_get_private_key(monkeypatch):
+    monkeypatch.setenv("PRIVATE_KEY_TESTNET", "0x01")
+    monkeypatch.setenv("PRIVATE_KEY_MAINNET", "0x02")
+    assert get_private_key("goerli") == "0x01"
+    assert get_private_key("polygon") == "0x02"
+
+    monkeypatch.delenv("PRIVATE_KEY_MAINNET")
+    with pytest.raises(AssertionError):
+        get_private_key("ethereum")
+
+# Check that unknown commands are rejected before anything is set up
+def test_unknown_command():
+    with pytest.raises(SystemExit):
+        main(["start", "--network", "goerli"])
+
+# Check that networks run concurrently and that a failing network does not stop the others
+def test_run_networks(monkeypatch):
+    monkeypatch.setattr("keeper.setup_keeper", lambda network, network_config: (network_config, None, None))
+
+    polygon_done = threading.Event()
+    completed_networks = []
+
+    def command(network_config, w3_provider, transaction_sender):
+        if network_config["name"] == "goerli":
+            raise ValueError("provider unavailable")
+        if network_config["name"] == "ethereum":
+            # Only finishes if polygon is not waiting for ethereum
+            assert polygon_done.wait(timeout=10)
+        else:
+            polygon_done.set()
+        completed_networks.append(threading.current_thread().name)
+
+    network_configs = {network: {"name": network} for network in ["ethereum", "polygon", "goerli"]}
+    failed_networks = asyncio.run(run_networks(command, network_configs))
+
+    assert failed_networks == ["goerli"]
+    assert completed_networks == ["polygon", "ethereum"]
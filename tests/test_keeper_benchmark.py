@@ -0,0 +1,22 @@
+from benchmarks.keeper_benchmark import run_benchmark
+
+from benchmarks.rpc_stub import ChainState
+
+# Check that a full award cycle against the stub fetches all new requests and completes all awards
+def test_award_cycle():
+    chain_state = ChainState.synthetic(request_count=20, failed_count=3, strategy_count=2)
+
+    results = run_benchmark(chain_state)
+
+    assert results["outcome"] == {"requests": 22, "completed_requests": 19, "awards": 2}
+    assert set(results["phases"].keys()) == {"start_award", "fetch_random_numbers", "complete_award"}
+    # Two startAward, one fetchRandomnessBatch settling both new requests and two completeAward transactions
+    assert results["total"]["rpc_calls"]["eth_sendRawTransaction"] == 5
+
+# Check that a saved chain state is replayed as is
+def test_replay_chain_state():
+    chain_state = ChainState.synthetic(request_count=5, failed_count=1, strategy_count=1)
+
+    replayed_chain_state = ChainState.from_json(chain_state.to_json())
+
+    assert replayed_chain_state.to_json() == chain_state.to_json()
@@ -0,0 +1,81 @@
+import atexit
+import json
+import logging
+
+import pytest
+
+from util.logger import get_log_queue
+from util.logger import log_span
+from util.logger import setup_stdout_logger
+
+# Restore the handlers of the root logger after every test
+@pytest.fixture(autouse=True)
+def root_handlers():
+    logger = logging.getLogger()
+    handlers = list(logger.handlers)
+    yield
+    logger.handlers = handlers
+
+# Set up the logger inside the test, so its console handler writes to the captured stdout
+def _setup_json_logger():
+    listener = setup_stdout_logger(log_format="json", log_queue=True)
+    atexit.unregister(listener.stop)
+    return listener
+
+# Stopping the listener flushes all queued records to stdout
+def _read_lines(listener, capsys):
+    listener.stop()
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+# Check that records are written as one JSON object per line by the listener thread
+def test_json_lines(capsys):
+    listener = _setup_json_logger()
+
+    logging.info("Started award for prize strategy at 0x01\n")
+    logging.warning("Multi\nline")
+
+    lines = _read_lines(listener, capsys)
+    assert [(line["level"], line["message"]) for line in lines] == [("INFO", "Started award for prize strategy at 0x01"), ("WARNING", "Multi\nline")]
+    assert all(line["thread"] == "MainThread" and line["time"].endswith("Z") for line in lines)
+
+# Check that timing spans are logged with their duration and fields, also if the block raises
+def test_log_span(capsys):
+    listener = _setup_json_logger()
+
+    with log_span("start_award") as span:
+        span["awards_started"] = 2
+
+    with pytest.raises(ValueError):
+        with log_span("complete_award", block_number=10):
+            raise ValueError("reverted")
+
+    start_award, complete_award = _read_lines(listener, capsys)
+    assert start_award["span"] == "start_award"
+    assert start_award["awards_started"] == 2
+    assert start_award["duration"] >= 0
+    assert complete_award["level"] == "ERROR"
+    assert complete_award["block_number"] == 10
+    assert complete_award["error"] == "ValueError"
+
+# Check that the exception of a record survives the queue and is logged separately from the message
+def test_exception(capsys):
+    listener = _setup_json_logger()
+
+    try:
+        raise ValueError("reverted")
+    except ValueError:
+        logging.exception("Failed to process block %d", 10)
+
+    line, = _read_lines(listener, capsys)
+    assert line["message"] == "Failed to process block 10"
+    assert line["exception"].startswith("Traceback")
+    assert line["exception"].endswith("ValueError: reverted")
+
+# Check that the queue is only enabled by values which mean true, also when they are given as strings
+def test_get_log_queue():
+    assert get_log_queue({}) == False
+    assert get_log_queue({"log_queue": ""}) == False
+    assert get_log_queue({"log_queue": True}) == True
+    assert get_log_queue({"log_queue": "true"}) == True
+    assert get_log_queue({"log_queue": "false"}) == False
+    assert get_log_queue({"log_queue": "0"}) == False
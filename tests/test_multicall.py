@@ -0,0 +1,80 @@
+import pytest
+
+from brownie import web3
+from brownie.network.state import Chain
+
+from util.multicall import batch_call
+from util.multicall import get_request_states
+from util.multicall import multicall
+
+from util.network_functions import get_account
+
+# Contracts are deployed once per module and every test runs against a snapshot of the chain which is reverted afterwards
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+@pytest.fixture(scope="module")
+def rng_witnet_with_requests(rng_witnet):
+    account = get_account()
+
+    # Launch three requests of which only the first one is fetched
+    for _ in range(3):
+        rng_witnet.requestRandomNumber({"from": account})
+    Chain().mine(10)
+    rng_witnet.fetchRandomness(1, {"from": account})
+
+    return rng_witnet
+
+def _web3_contract(brownie_contract):
+    return web3.eth.contract(address=brownie_contract.address, abi=brownie_contract.abi)
+
+# Check that batched request states match the individual eth_calls
+def test_get_request_states(multicall3, rng_witnet_with_requests):
+    rng_witnet_web3 = _web3_contract(rng_witnet_with_requests)
+
+    request_ids = range(1, rng_witnet_with_requests.requestCount() + 1)
+    request_states = get_request_states(web3, rng_witnet_web3, request_ids, multicall3.address, include_random_number=True)
+
+    assert list(request_states.keys()) == [1, 2, 3]
+    for request_id, request_state in request_states.items():
+        assert request_state["complete"] == rng_witnet_with_requests.isRequestComplete(request_id)
+        assert request_state["fetchable"] == rng_witnet_with_requests.isRngFetchable(request_id)
+        assert request_state["random_number"] == rng_witnet_with_requests.randomNumber(request_id)
+
+    assert request_states[1]["complete"] == True
+    assert request_states[2]["complete"] == False
+    assert request_states[2]["fetchable"] == True
+
+# Check that calls are split over multiple aggregated eth_calls without changing the result order
+def test_multicall_batches(multicall3, rng_witnet_with_requests):
+    rng_witnet_web3 = _web3_contract(rng_witnet_with_requests)
+
+    calls = [(rng_witnet_web3, "isRequestComplete", [request_id]) for request_id in (1, 2, 3, 1, 2)]
+    assert multicall(web3, calls, multicall3.address, batch_size=2) == [True, False, False, True, False]
+
+# Check that a reverting call does not make the whole batch revert
+def test_multicall_allows_failure(multicall3, rng_witnet_with_requests):
+    rng_witnet_web3 = _web3_contract(rng_witnet_with_requests)
+
+    # Functions which are not implemented by the mock revert
+    prize_strategy_web3 = web3.eth.contract(address=rng_witnet_with_requests.address, abi=[{
+        "inputs": [],
+        "name": "canStartAward",
+        "outputs": [{"name": "", "type": "bool"}],
+        "stateMutability": "view",
+        "type": "function",
+    }])
+
+    results = multicall(web3, [
+        (prize_strategy_web3, "canStartAward", []),
+        (rng_witnet_web3, "requestCount", []),
+    ], multicall3.address)
+
+    assert results == [None, 3]
+
+# Check calling the same function with different arguments
+def test_batch_call(multicall3, rng_witnet_with_requests):
+    rng_witnet_web3 = _web3_contract(rng_witnet_with_requests)
+
+    assert batch_call(web3, rng_witnet_web3, "randomNumber", [[1], [2]], multicall3.address) == [9, 0]
@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+from web3 import Web3
+
+from util.provider import FailoverHTTPProvider
+
+# Local JSON-RPC stub which answers eth_blockNumber with a fixed block number
+# The first `failures` requests are answered with the given HTTP status code and every response is delayed by `delay`
+class StubServer:
+    def __init__(self, block_number, failures=0, status_code=429, delay=0):
+        self.block_number = block_number
+        self.failures = failures
+        self.status_code = status_code
+        self.delay = delay
+        self.requests = 0
+        self.connections = set()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests += 1
+                stub.connections.add(self.client_address)
+                time.sleep(stub.delay)
+
+                if stub.requests <= stub.failures:
+                    self._respond(stub.status_code, b"")
+                else:
+                    response = {"jsonrpc": "2.0", "id": request["id"], "result": hex(stub.block_number)}
+                    self._respond(200, json.dumps(response).encode())
+
+            def _respond(self, status_code, body):
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.uri = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub_servers():
+    servers = []
+    yield servers
+    for server in servers:
+        server.close()
+
+def _stub(stub_servers, *args, **kwargs):
+    server = StubServer(*args, **kwargs)
+    stub_servers.append(server)
+    return server
+
+def _unused_uri():
+    return "http://127.0.0.1:1"
+
+# Check that rate limited requests are retried on the same endpoint
+def test_retry_rate_limited(stub_servers):
+    server = _stub(stub_servers, 100, failures=2, status_code=429)
+    w3 = Web3(FailoverHTTPProvider([server.uri], retries=3, backoff=0.01))
+
+    assert w3.eth.block_number == 100
+    assert server.requests == 3
+
+# Check that the error is raised once all retries are exhausted
+def test_retries_exhausted(stub_servers):
+    server = _stub(stub_servers, 100, failures=10, status_code=503)
+    w3 = Web3(FailoverHTTPProvider([server.uri], retries=2, backoff=0.01))
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        w3.eth.block_number
+    assert server.requests == 3
+
+# Check failing over to the next endpoint when the first one is down or keeps failing
+def test_failover(stub_servers):
+    failing_server = _stub(stub_servers, 100, failures=10, status_code=500)
+    server = _stub(stub_servers, 200)
+    w3 = Web3(FailoverHTTPProvider([_unused_uri(), failing_server.uri, server.uri], retries=1, backoff=0.01))
+
+    assert w3.eth.block_number == 200
+
+# Check that a slow endpoint is hedged by the next endpoint
+def test_hedged_read(stub_servers):
+    slow_server = _stub(stub_servers, 100, delay=2)
+    fast_server = _stub(stub_servers, 200)
+    w3 = Web3(FailoverHTTPProvider([slow_server.uri, fast_server.uri], hedge_delay=0.1))
+
+    start = time.time()
+    assert w3.eth.block_number == 200
+    assert time.time() - start < 1
+
+# Check that the first endpoint is used without hedging when it answers in time
+def test_hedged_read_fast_primary(stub_servers):
+    server = _stub(stub_servers, 100)
+    backup_server = _stub(stub_servers, 200)
+    w3 = Web3(FailoverHTTPProvider([server.uri, backup_server.uri], hedge_delay=1))
+
+    assert w3.eth.block_number == 100
+    assert backup_server.requests == 0
+
+# Check that consecutive requests reuse the same keep-alive connection
+def test_connection_reuse(stub_servers):
+    server = _stub(stub_servers, 100)
+    w3 = Web3(FailoverHTTPProvider([server.uri]))
+
+    for _ in range(5):
+        assert w3.eth.block_number == 100
+    assert len(server.connections) == 1
@@ -0,0 +1,69 @@
+import pytest
+
+from brownie import web3
+
+from scripts.deploy_witnet_request_randomness import main as deploy_witnet_request_randomness
+
+from util.network_functions import get_account
+
+from util.request_fee import RequestFeeCurve
+
+# Contracts are deployed once per module and every test runs against a snapshot of the chain which is reverted afterwards
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+@pytest.fixture
+def request_fee_curve(multicall3, rng_witnet):
+    request_fee_curve = RequestFeeCurve(
+        web3,
+        web3.eth.contract(address=rng_witnet.address, abi=rng_witnet.abi),
+        multicall3.address,
+    )
+    request_fee_curve.refresh()
+    return request_fee_curve
+
+# Check that the fitted fee curve matches getRequestFee
+def test_request_fee(rng_witnet, request_fee_curve):
+    assert request_fee_curve.slope == 1E8
+    assert request_fee_curve.intercept == 0
+
+    for gas_price in (1, 7 * 10 ** 9, 123456789012):
+        assert request_fee_curve.get_request_fee(gas_price) == rng_witnet.getRequestFee(gas_price)
+
+    assert request_fee_curve.max_fee == 10 ** 16
+    assert request_fee_curve.balance == 10 ** 18
+
+# Check that the reverts of requestRandomNumber are predicted
+def test_request_error(request_fee_curve):
+    # A request costs 1E8 * 1E7 = 0.001 ether
+    assert request_fee_curve.get_request_error(10 ** 7) is None
+    assert request_fee_curve.get_request_error(10 ** 8).startswith("maxFeeTooLow")
+
+    # The balance suffices for 1000 requests
+    assert request_fee_curve.get_request_error(10 ** 7, requests=1000) is None
+    assert request_fee_curve.get_request_error(10 ** 7, requests=1001).startswith("balanceTooLow")
+
+# Check that the fee curve is only sampled again if the randomness request changed
+def test_update(rng_witnet, request_fee_curve):
+    account = get_account()
+
+    sampled_block = request_fee_curve.sampled_block
+    calls = request_fee_curve.get_state_calls()
+
+    rng_witnet.setMaxFee("0.02 ether", {"from": account})
+    request_fee_curve.update(_read_state(request_fee_curve, calls), sampled_block + 1)
+    assert request_fee_curve.sampled_block == sampled_block
+    assert request_fee_curve.max_fee == 2 * 10 ** 16
+
+    # A new request contract, unlike the one of the witnet_request_randomness fixture which is already set
+    rng_witnet.setWitnetRequestRandomness(deploy_witnet_request_randomness(), {"from": account})
+    request_fee_curve.update(_read_state(request_fee_curve, calls), sampled_block + 2)
+    assert request_fee_curve.sampled_block == sampled_block + 2
+
+    # A stale fee curve is sampled again
+    request_fee_curve.update(_read_state(request_fee_curve, calls), sampled_block + 2 + request_fee_curve.refresh_blocks)
+    assert request_fee_curve.sampled_block == sampled_block + 2 + request_fee_curve.refresh_blocks
+
+def _read_state(request_fee_curve, calls):
+    return [contract.functions[function_name](*arguments).call() for contract, function_name, arguments in calls]
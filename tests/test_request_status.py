@@ -0,0 +1,90 @@
+import pytest
+
+from brownie import RngWitnetLegacyMock, web3
+from brownie.network.state import Chain
+
+from util.network_functions import get_account
+
+from util.request_status import COMPLETED
+from util.request_status import FAILED
+from util.request_status import FETCHABLE
+from util.request_status import NOT_REQUESTED
+from util.request_status import PENDING
+from util.request_status import get_request_statuses
+from util.request_status import get_requests_to_fetch
+
+# Contracts are deployed once per module and every test runs against a snapshot of the chain which is reverted afterwards
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+@pytest.fixture(scope="module")
+def rng_witnet(rng_witnet):
+    return _with_requests(rng_witnet)
+
+# RngWitnetMock before getRequestStatuses was added
+@pytest.fixture(scope="module")
+def rng_witnet_legacy(rng_witnet, witnet_request_randomness):
+    account = get_account()
+
+    rng_witnet_legacy = RngWitnetLegacyMock.deploy(rng_witnet.witnet(), witnet_request_randomness, 1E8, 1E9, {"from": account})
+    account.transfer(rng_witnet_legacy, "1 ether")
+    rng_witnet_legacy.addAllowedRequester(account, {"from": account})
+    rng_witnet_legacy.setMaxFee("0.01 ether", {"from": account})
+
+    return _with_requests(rng_witnet_legacy)
+
+# Launch three requests of which the first one is fetched and the last one is not available yet
+def _with_requests(rng_witnet):
+    account = get_account()
+
+    rng_witnet.requestRandomNumber({"from": account})
+    rng_witnet.requestRandomNumber({"from": account})
+    Chain().mine(10)
+    rng_witnet.fetchRandomness(1, {"from": account})
+    rng_witnet.requestRandomNumber({"from": account})
+
+    return rng_witnet
+
+def _web3_contract(brownie_contract, abi):
+    return web3.eth.contract(address=brownie_contract.address, abi=abi)
+
+# Check that the statuses of a range of requests are read in one call
+def test_get_request_statuses(rng_witnet):
+    assert list(rng_witnet.getRequestStatuses(1, 4)) == [COMPLETED, FETCHABLE, PENDING, NOT_REQUESTED]
+    assert list(rng_witnet.getRequestStatuses(2, 1)) == []
+
+    # Ranges are split over multiple calls
+    request_statuses = get_request_statuses(_web3_contract(rng_witnet, rng_witnet.abi), 1, 4, range_size=3)
+    assert request_statuses == {1: COMPLETED, 2: FETCHABLE, 3: PENDING, 4: NOT_REQUESTED}
+
+# Check that a request of which the random number failed is reported as failed and not fetched again
+def test_failed_request_status(multicall3, rng_witnet):
+    account = get_account()
+
+    rng_witnet.setMockFailure(True, {"from": account})
+    rng_witnet.fetchRandomness(2, {"from": account})
+
+    assert list(rng_witnet.getRequestStatuses(1, 4)) == [COMPLETED, FAILED, PENDING, NOT_REQUESTED]
+
+    requests_to_fetch, failed_request_ids = get_requests_to_fetch({}, web3, _web3_contract(rng_witnet, rng_witnet.abi), multicall3.address)
+    assert requests_to_fetch == [3]
+    assert failed_request_ids == {2}
+
+# Check that the pending requests are found with and without getRequestStatuses
+def test_get_requests_to_fetch(tmp_path, multicall3, rng_witnet, rng_witnet_legacy):
+    requests_to_fetch, failed_request_ids = get_requests_to_fetch({}, web3, _web3_contract(rng_witnet, rng_witnet.abi), multicall3.address)
+    assert requests_to_fetch == [2, 3]
+    assert failed_request_ids == set()
+
+    # Older deployments fall back to the event index
+    rng_witnet_legacy_web3 = _web3_contract(rng_witnet_legacy, rng_witnet.abi)
+    assert get_request_statuses(rng_witnet_legacy_web3, 1, 3) is None
+
+    network_config = {
+        "event_index_path": str(tmp_path / "event_index.db"),
+        "rng_witnet_deploy_transaction": rng_witnet_legacy.tx.txid,
+    }
+    requests_to_fetch, failed_request_ids = get_requests_to_fetch(network_config, web3, rng_witnet_legacy_web3, multicall3.address)
+    assert requests_to_fetch == [2, 3]
+    assert failed_request_ids == set()
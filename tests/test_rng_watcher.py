@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from brownie import web3
+from brownie.network.state import Chain
+
+from util.network_functions import get_account
+
+from util.rng_watcher import watch_requests
+
+# Contracts are deployed once per module and every test runs against a snapshot of the chain which is reverted afterwards
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+def _watch(multicall3, rng_witnet, request_ids, fetched, timeout=None):
+    account = get_account()
+
+    def on_fetchable(fetchable_request_ids):
+        fetched.append(fetchable_request_ids)
+        for request_id in fetchable_request_ids:
+            rng_witnet.fetchRandomness(request_id, {"from": account})
+
+    rng_witnet_web3 = web3.eth.contract(address=rng_witnet.address, abi=rng_witnet.abi)
+    return asyncio.run(watch_requests(web3, rng_witnet_web3, request_ids, on_fetchable, multicall3.address, poll_interval=0.1, timeout=timeout))
+
+# Check that all requests which are fetchable in the same block are handed over together
+def test_watch_fetchable_requests(multicall3, rng_witnet):
+    account = get_account()
+
+    for _ in range(3):
+        rng_witnet.requestRandomNumber({"from": account})
+    Chain().mine(10)
+
+    fetched = []
+    assert _watch(multicall3, rng_witnet, [1, 2, 3], fetched) == set()
+
+    assert fetched == [[1, 2, 3]]
+    for request_id in [1, 2, 3]:
+        assert rng_witnet.isRequestComplete(request_id) == True
+
+# Check that fetchable requests are fetched without waiting for requests which are still pending
+def test_watch_timeout(multicall3, rng_witnet):
+    account = get_account()
+
+    rng_witnet.requestRandomNumber({"from": account})
+    Chain().mine(10)
+    rng_witnet.requestRandomNumber({"from": account})
+
+    fetched = []
+    assert _watch(multicall3, rng_witnet, [1, 2], fetched, timeout=1) == {2}
+
+    assert fetched == [[1]]
+    assert rng_witnet.isRequestComplete(1) == True
+    assert rng_witnet.isRequestComplete(2) == False
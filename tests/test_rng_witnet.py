@@ -14,11 +14,16 @@ from util.constants import randomnessNotAvailable
 
 from util.network_functions import get_account
 
-@pytest.fixture
-def witnet_request_randomness():
+# Contracts are deployed once per module and every test runs against a snapshot of the chain which is reverted afterwards
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+@pytest.fixture(scope="module")
+def witnet_request_randomness(module_isolation):
     return deploy_witnet_request_randomness()
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def rng_witnet(witnet_request_randomness):
     return deploy_rng_witnet(
         _witnet_request_randomness_address=witnet_request_randomness,
@@ -184,6 +189,25 @@ def test_remove_allowed_requester(rng_witnet_with_requester):
             {"from": account}
         )
 
+# Check that we can add and remove multiple requesters in a single transaction
+def test_allowed_requesters(rng_witnet):
+    account = get_account()
+    requesters = [get_account(index=index) for index in range(1, 4)]
+
+    assert not any(rng_witnet.isAllowedRequester(requester) for requester in requesters)
+
+    transaction = rng_witnet.addAllowedRequesters(requesters, {"from": account})
+    assert [event["requester"] for event in transaction.events["RequesterAdded"]] == requesters
+    assert all(rng_witnet.isAllowedRequester(requester) for requester in requesters)
+
+    transaction = rng_witnet.removeAllowedRequesters(requesters[:2], {"from": account})
+    assert [event["requester"] for event in transaction.events["RequesterRemoved"]] == requesters[:2]
+    assert [rng_witnet.isAllowedRequester(requester) for requester in requesters] == [False, False, True]
+
+    # Only the owner can manage requesters
+    with brownie.reverts():
+        rng_witnet.addAllowedRequesters([account], {"from": requesters[2]})
+
 # Check that we can request a random number
 def test_is_rng_fetchable(rng_witnet_with_requester):
     chain = Chain()
@@ -252,3 +276,31 @@ def test_is_request_complete(rng_witnet_with_requester):
 
     # The true random number is always 9: https://dilbert.com/strip/2001-10-25
     assert rng_witnet_with_requester.randomNumber(requestId) == 9
+
+# Check that a batch only settles the requests which are available and not fetched yet
+def test_fetch_randomness_batch(rng_witnet_with_requester):
+    chain = Chain()
+
+    account = get_account()
+
+    # Set the maximum fee
+    test_set_max_fee(rng_witnet_with_requester)
+
+    # Three requests which will be available and one which will not
+    for _ in range(3):
+        rng_witnet_with_requester.requestRandomNumber({"from": account})
+    chain.mine(10)
+    rng_witnet_with_requester.requestRandomNumber({"from": account})
+
+    # Request 1 is fetched on its own, request 99 does not exist
+    rng_witnet_with_requester.fetchRandomness(1, {"from": account})
+
+    transaction = rng_witnet_with_requester.fetchRandomnessBatch([1, 2, 3, 4, 99], {"from": account})
+    assert [event["requestId"] for event in transaction.events["RandomNumberCompleted"]] == [2, 3]
+    assert [rng_witnet_with_requester.isRequestComplete(request_id) for request_id in range(1, 5)] == [True, True, True, False]
+
+    chain.mine(10)
+
+    transaction = rng_witnet_with_requester.fetchRandomnessBatch([1, 2, 3, 4], {"from": account})
+    assert [event["requestId"] for event in transaction.events["RandomNumberCompleted"]] == [4]
+    assert rng_witnet_with_requester.randomNumber(4) == 9
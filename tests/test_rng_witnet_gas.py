@@ -0,0 +1,57 @@
+import pytest
+
+from brownie import RngWitnetLegacyMock
+from brownie.network.state import Chain
+
+from util.network_functions import get_account
+
+# Number of requests of which the gas used is averaged
+REQUESTS = 5
+
+# Contracts are deployed once per module and every test runs against a snapshot of the chain which is reverted afterwards
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+# RngWitnetMock before the per-request state was packed into a single storage slot, set up like rng_witnet
+@pytest.fixture(scope="module")
+def rng_witnet_legacy(rng_witnet, witnet_request_randomness):
+    account = get_account()
+
+    rng_witnet_legacy = RngWitnetLegacyMock.deploy(rng_witnet.witnet(), witnet_request_randomness, 1E8, 1E9, {"from": account})
+    account.transfer(rng_witnet_legacy, "1 ether")
+    rng_witnet_legacy.addAllowedRequester(account, {"from": account})
+    rng_witnet_legacy.setMaxFee("0.01 ether", {"from": account})
+
+    return rng_witnet_legacy
+
+def _measure_gas(rng_witnet):
+    account = get_account()
+
+    request_transactions = [rng_witnet.requestRandomNumber({"from": account}) for _ in range(REQUESTS)]
+    Chain().mine(10)
+    fetch_transactions = [rng_witnet.fetchRandomness(request_id, {"from": account}) for request_id in range(1, REQUESTS + 1)]
+
+    return {
+        "requestRandomNumber": sum(transaction.gas_used for transaction in request_transactions) // REQUESTS,
+        "fetchRandomness": sum(transaction.gas_used for transaction in fetch_transactions) // REQUESTS,
+    }
+
+# Compare the gas used by requestRandomNumber and fetchRandomness with and without the packed request record
+# Run with pytest -s to print the comparison
+def test_packed_request_gas(rng_witnet, rng_witnet_legacy):
+    legacy_gas = _measure_gas(rng_witnet_legacy)
+    packed_gas = _measure_gas(rng_witnet)
+
+    for function_name in legacy_gas:
+        print(f"{function_name}: {legacy_gas[function_name]} -> {packed_gas[function_name]} gas ({packed_gas[function_name] - legacy_gas[function_name]:+d})")
+
+    assert packed_gas["requestRandomNumber"] <= legacy_gas["requestRandomNumber"]
+    # The fetched flag is written to the slot which was already read instead of to a fresh slot
+    assert packed_gas["fetchRandomness"] < legacy_gas["fetchRandomness"] - 15000
+
+    # The view semantics are unchanged
+    for request_id in range(1, REQUESTS + 1):
+        assert rng_witnet.isRequestComplete(request_id) == rng_witnet_legacy.isRequestComplete(request_id) == True
+        assert rng_witnet.isRngFetchable(request_id) == rng_witnet_legacy.isRngFetchable(request_id) == True
+        assert rng_witnet.randomNumber(request_id) == rng_witnet_legacy.randomNumber(request_id)
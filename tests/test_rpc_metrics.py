@@ -0,0 +1,66 @@
+import json
+
+from eth_abi import encode_abi
+
+from web3 import Web3
+
+from util.rpc_metrics import AGGREGATE3_SELECTOR
+from util.rpc_metrics import RpcMetrics
+from util.rpc_metrics import get_function_name
+
+GET_BLOCK_NUMBER = Web3.keccak(text="getBlockNumber()")[:4].hex()
+GET_ETH_BALANCE = Web3.keccak(text="getEthBalance(address)")[:4].hex()
+
+def _make_request(method, params):
+    if method == "eth_getLogs":
+        return {"jsonrpc": "2.0", "id": 1, "error": {"code": -32005, "message": "query returned more than 10000 results"}}
+    return {"jsonrpc": "2.0", "id": 1, "result": "0x1"}
+
+# Check that selectors with tuple arguments resolve to their function name
+def test_get_function_name():
+    assert AGGREGATE3_SELECTOR == "0x82ad56cb"
+    assert get_function_name(AGGREGATE3_SELECTOR) == "aggregate3"
+    assert get_function_name("0x12345678") == "0x12345678"
+
+# Check that requests are counted per method and per contract function, including calls aggregated in a multicall
+def test_record_requests():
+    rpc_metrics = RpcMetrics()
+    make_request = rpc_metrics.middleware(_make_request, None)
+
+    aggregated_calls = [
+        ("0x" + "00" * 20, True, bytes.fromhex(GET_BLOCK_NUMBER[2:])),
+        ("0x" + "00" * 20, True, bytes.fromhex(GET_ETH_BALANCE[2:]) + b"\x00" * 32),
+    ]
+    make_request("eth_blockNumber", [])
+    make_request("eth_call", [{"to": "0x" + "00" * 20, "data": GET_BLOCK_NUMBER}, "latest"])
+    make_request("eth_call", [{"to": "0x" + "00" * 20, "data": AGGREGATE3_SELECTOR + encode_abi(["(address,bool,bytes)[]"], [aggregated_calls]).hex()}, "latest"])
+    make_request("eth_getLogs", [{}])
+
+    snapshot = rpc_metrics.snapshot()
+    assert {method: histogram["count"] for method, histogram in snapshot["methods"].items()} == {"eth_blockNumber": 1, "eth_call": 2, "eth_getLogs": 1}
+    assert snapshot["methods"]["eth_getLogs"]["errors"] == 1
+    assert snapshot["methods"]["eth_call"]["errors"] == 0
+    assert {function_name: histogram["count"] for function_name, histogram in snapshot["functions"].items()} == {"aggregate3": 1, "getBlockNumber": 1}
+    assert snapshot["aggregated_calls"] == {"getBlockNumber": 1, "getEthBalance": 1}
+    assert sum(snapshot["methods"]["eth_call"]["buckets"].values()) == 2
+
+    assert rpc_metrics.reset() == snapshot
+    assert rpc_metrics.snapshot()["methods"] == {}
+
+# Check both export formats
+def test_export(tmp_path):
+    rpc_metrics = RpcMetrics()
+    make_request = rpc_metrics.middleware(_make_request, None)
+    make_request("eth_blockNumber", [])
+    make_request("eth_getLogs", [{}])
+
+    prometheus_path = str(tmp_path / "metrics.prom")
+    rpc_metrics.export(prometheus_path)
+    content = open(prometheus_path).read()
+    assert 'keeper_rpc_request_duration_seconds_bucket{method="eth_blockNumber",le="+Inf"} 1' in content
+    assert 'keeper_rpc_request_duration_seconds_count{method="eth_getLogs"} 1' in content
+    assert 'keeper_rpc_request_errors_total{method="eth_getLogs"} 1' in content
+
+    json_path = str(tmp_path / "metrics.json")
+    rpc_metrics.export(json_path)
+    assert json.load(open(json_path))["methods"]["eth_blockNumber"]["count"] == 1
@@ -0,0 +1,179 @@
+import pytest
+
+from brownie import accounts, web3
+
+from eth_account import Account
+
+from web3 import Web3
+
+from web3.exceptions import TransactionNotFound
+
+from util.network_functions import get_account
+
+from util.transaction_sender import SpendCapExceeded
+from util.transaction_sender import TransactionSender
+
+# Contracts are deployed once per module and every test runs against a snapshot of the chain which is reverted afterwards
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+# Check that transactions sent back-to-back get consecutive nonces and are all confirmed
+def test_send_back_to_back(rng_witnet):
+    account = get_account()
+    rng_witnet_web3 = web3.eth.contract(address=rng_witnet.address, abi=rng_witnet.abi)
+
+    transaction_sender = TransactionSender(web3, account)
+    start_nonce = account.nonce
+
+    transaction_hashes = [
+        transaction_sender.send(rng_witnet_web3.functions.addAllowedRequester(str(requester)), {})
+        for requester in accounts[1:6]
+    ]
+    receipts = transaction_sender.wait_for_receipts(transaction_hashes)
+
+    assert [receipt["status"] for receipt in receipts] == [1] * 5
+    assert [web3.eth.get_transaction(transaction_hash)["nonce"] for transaction_hash in transaction_hashes] == list(range(start_nonce, start_nonce + 5))
+    assert transaction_sender.next_nonce == start_nonce + 5
+
+# Check that the sender resynchronizes when the account sent transactions outside of it
+def test_resync_nonce(rng_witnet):
+    account = get_account()
+    rng_witnet_web3 = web3.eth.contract(address=rng_witnet.address, abi=rng_witnet.abi)
+
+    transaction_sender = TransactionSender(web3, account)
+    transaction_sender.wait_for_receipts([transaction_sender.send(rng_witnet_web3.functions.setMaxFee(1), {})])
+
+    # Use up the locally assigned nonce through another client
+    rng_witnet.setMaxFee(2, {"from": account})
+
+    receipts = transaction_sender.wait_for_receipts([transaction_sender.send(rng_witnet_web3.functions.setMaxFee(3), {})])
+
+    assert receipts[0]["status"] == 1
+    assert rng_witnet.maxFee() == 3
+    assert transaction_sender.next_nonce == account.nonce
+
+# Node stand-in which advances one block on every block number request and only mines the transaction sent at `mine_index`
+class FakeEth:
+    chain_id = 1
+    account = Account
+
+    def __init__(self, mine_index, already_known=False):
+        self.mine_index = mine_index
+        self.already_known = already_known
+        self.dropped = False
+        self.block_number = 0
+        self.sent = []
+        self.mined = set()
+
+    @property
+    def blockNumber(self):
+        self.block_number += 1
+        return self.block_number
+
+    def get_transaction_count(self, address, block_identifier):
+        return 0
+
+    def send_raw_transaction(self, raw_transaction):
+        transaction_hash = Web3.keccak(raw_transaction)
+        if len(self.sent) == self.mine_index:
+            self.mined.add(transaction_hash.hex())
+        self.sent.append(transaction_hash.hex())
+        if self.already_known:
+            # Like a node which received the transaction before a retried request of it
+            self.already_known = False
+            raise ValueError({"code": -32000, "message": "already known"})
+        return transaction_hash
+
+    def get_transaction(self, transaction_hash):
+        if self.dropped or transaction_hash not in self.sent:
+            raise TransactionNotFound(f"Transaction {transaction_hash} not found")
+        return {"hash": transaction_hash, "blockNumber": None}
+
+    def get_transaction_receipt(self, transaction_hash):
+        if transaction_hash not in self.mined:
+            raise TransactionNotFound(f"Transaction {transaction_hash} not found")
+        return {"transactionHash": transaction_hash, "status": 1, "gasUsed": 21000, "effectiveGasPrice": 10 ** 9}
+
+class FakeWeb3:
+    def __init__(self, mine_index, already_known=False):
+        self.eth = FakeEth(mine_index, already_known)
+
+TRANSACTION = {
+    "to": "0x" + "11" * 20,
+    "value": 0,
+    "gas": 21000,
+    "maxPriorityFeePerGas": 10 ** 9,
+    "maxFeePerGas": 10 ** 10,
+    "chainId": 1,
+}
+
+# Check that a stuck transaction is replaced with the same nonce and at least a 10% fee bump
+def test_replace_stuck_transaction():
+    w3_provider = FakeWeb3(mine_index=1)
+    transaction_sender = TransactionSender(w3_provider, Account.create(), replace_after_blocks=2, poll_interval=0)
+
+    transaction_hash = transaction_sender.send_transaction(TRANSACTION)
+    receipt = transaction_sender.wait_for_receipt(transaction_hash)
+
+    replacement_hash = w3_provider.eth.sent[1]
+    assert receipt["transactionHash"] == replacement_hash
+    assert transaction_sender.nonce_transactions[0] == [transaction_hash, replacement_hash]
+
+    nonce, replacement, _ = transaction_sender.sent_transactions[replacement_hash]
+    assert nonce == 0
+    assert replacement["maxPriorityFeePerGas"] == 11 * 10 ** 8
+    assert replacement["maxFeePerGas"] == 11 * 10 ** 9
+    assert transaction_sender.spent == 21000 * 10 ** 9
+    assert transaction_sender.pending_nonces == set()
+
+# Check that a transaction which the node already holds counts as broadcast, without resynchronizing the nonce
+def test_already_known_transaction():
+    w3_provider = FakeWeb3(mine_index=0, already_known=True)
+    transaction_sender = TransactionSender(w3_provider, Account.create(), poll_interval=0)
+
+    transaction_hash = transaction_sender.send_transaction(TRANSACTION)
+    assert transaction_hash == w3_provider.eth.sent[0]
+    assert transaction_sender.next_nonce == 1
+
+    receipt = transaction_sender.wait_for_receipt(transaction_hash)
+    assert receipt["transactionHash"] == transaction_hash
+    assert len(w3_provider.eth.sent) == 1
+
+# Check that a dropped transaction is abandoned and its nonce is reused by the next transaction
+def test_abandon_dropped_transaction():
+    w3_provider = FakeWeb3(mine_index=None)
+    transaction_sender = TransactionSender(w3_provider, Account.create(), poll_interval=0)
+
+    transaction_hash = transaction_sender.send_transaction(TRANSACTION)
+    assert not transaction_sender.is_dropped(transaction_hash)
+
+    w3_provider.eth.dropped = True
+    assert transaction_sender.is_dropped(transaction_hash)
+
+    transaction_sender.abandon(transaction_hash)
+    assert transaction_sender.pending_nonces == set()
+
+    transaction_hash = transaction_sender.send_transaction({**TRANSACTION, "value": 1})
+    assert transaction_sender.get_nonce(transaction_hash) == 0
+
+# Check that no transaction is sent which could exceed the spend cap
+def test_spend_cap():
+    transaction_sender = TransactionSender(FakeWeb3(mine_index=0), Account.create(), max_spend=21000 * 10 ** 10, poll_interval=0)
+
+    transaction_sender.send_transaction(TRANSACTION)
+
+    # The first transaction is still pending and accounted for at its maximal cost
+    with pytest.raises(SpendCapExceeded):
+        transaction_sender.send_transaction(TRANSACTION)
+
+# Check that a stuck transaction is not replaced if the bump could exceed the spend cap
+def test_spend_cap_prevents_replacement():
+    w3_provider = FakeWeb3(mine_index=None)
+    transaction_sender = TransactionSender(w3_provider, Account.create(), replace_after_blocks=1, max_spend=21000 * 10 ** 10, poll_interval=0)
+
+    transaction_hash = transaction_sender.send_transaction(TRANSACTION)
+    for _ in range(5):
+        assert transaction_sender.get_receipt(transaction_hash) is None
+
+    assert len(w3_provider.eth.sent) == 1
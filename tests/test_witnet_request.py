@@ -0,0 +1,128 @@
+import brownie
+import pytest
+
+from scripts.deploy_witnet_request_randomness import main as deploy_witnet_request_randomness
+
+from util.network_functions import get_account
+
+from util.witnet_request import DEFAULT_WITNESSING_PARAMETERS
+from util.witnet_request import WitnessingParameters
+from util.witnet_request import WitnessingParametersError
+from util.witnet_request import encode_varint
+from util.witnet_request import evaluate_witnessing_parameters
+from util.witnet_request import get_request_hash
+from util.witnet_request import get_total_witnessing_collateral
+from util.witnet_request import get_total_witnessing_fee
+from util.witnet_request import malleate_bytecode
+
+VALID_PARAMETERS = [
+    DEFAULT_WITNESSING_PARAMETERS,
+    WitnessingParameters(8, 75, 10 ** 9, 10 ** 6, 10 ** 3),
+    WitnessingParameters(125, 99, 2 ** 64 // 125, 1, 0),
+    WitnessingParameters(1, 51, 2 ** 64 - 1, 2 ** 64 - 1, 2 ** 63 - 1),
+    WitnessingParameters(125, 51, 10 ** 9, 128, 16383),
+]
+
+INVALID_PARAMETERS = [
+    WitnessingParameters(8, 75, 10 ** 9, 0, 10 ** 3),
+    WitnessingParameters(0, 75, 10 ** 9, 10 ** 6, 10 ** 3),
+    WitnessingParameters(126, 75, 10 ** 9, 10 ** 6, 10 ** 3),
+    WitnessingParameters(127, 51, 10 ** 9, 128, 16383),
+    WitnessingParameters(8, 50, 10 ** 9, 10 ** 6, 10 ** 3),
+    WitnessingParameters(8, 100, 10 ** 9, 10 ** 6, 10 ** 3),
+    WitnessingParameters(8, 75, 10 ** 9 - 1, 10 ** 6, 10 ** 3),
+    WitnessingParameters(0, 0, 0, 0, 0),
+]
+
+# Contracts are deployed once per module and every test runs against a snapshot of the chain which is reverted afterwards
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+@pytest.fixture(scope="module")
+def witnet_request_randomness(module_isolation):
+    return deploy_witnet_request_randomness()
+
+def set_witnessing_parameters(witnet_request_randomness, parameters):
+    return witnet_request_randomness.setWitnessingParameters(
+        parameters.witnessing_collateral,
+        parameters.witnessing_reward,
+        parameters.witnessing_unitary_fee,
+        parameters.num_witnesses,
+        parameters.min_witnessing_consensus,
+        {"from": get_account()},
+    )
+
+# Test the varint encoding against the protocol buffer specification
+def test_encode_varint():
+    assert encode_varint(0x10, 0) == bytes.fromhex("1000")
+    assert encode_varint(0x10, 1) == bytes.fromhex("1001")
+    assert encode_varint(0x10, 127) == bytes.fromhex("107f")
+    assert encode_varint(0x10, 128) == bytes.fromhex("108001")
+    assert encode_varint(0x10, 300) == bytes.fromhex("10ac02")
+    assert encode_varint(0x10, 2 ** 64 - 1) == bytes.fromhex("10ffffffffffffffffff01")
+
+# Test if the bytecode, hash and totals computed offline match the deployed contract
+def test_default_parameters(witnet_request_randomness):
+    bytecode = malleate_bytecode(DEFAULT_WITNESSING_PARAMETERS)
+    assert witnet_request_randomness.bytecode() == "0x" + bytecode.hex()
+    assert witnet_request_randomness.hash() == "0x" + get_request_hash(bytecode).hex()
+    assert tuple(witnet_request_randomness.witnessingParams()) == DEFAULT_WITNESSING_PARAMETERS
+
+@pytest.mark.parametrize("parameters", VALID_PARAMETERS)
+def test_valid_parameters(witnet_request_randomness, parameters):
+    set_witnessing_parameters(witnet_request_randomness, parameters)
+
+    bytecode = malleate_bytecode(parameters)
+    assert witnet_request_randomness.bytecode() == "0x" + bytecode.hex()
+    assert witnet_request_randomness.hash() == "0x" + get_request_hash(bytecode).hex()
+
+    total_witnessing_fee = get_total_witnessing_fee(parameters)
+    if total_witnessing_fee is None:
+        with brownie.reverts():
+            witnet_request_randomness.totalWitnessingFee()
+    else:
+        assert witnet_request_randomness.totalWitnessingFee() == total_witnessing_fee
+
+    total_witnessing_collateral = get_total_witnessing_collateral(parameters)
+    if total_witnessing_collateral is None:
+        with brownie.reverts():
+            witnet_request_randomness.totalWitnessingCollateral()
+    else:
+        assert witnet_request_randomness.totalWitnessingCollateral() == total_witnessing_collateral
+
+# Test if the contract reverts with the same error as the offline validation
+@pytest.mark.parametrize("parameters", INVALID_PARAMETERS)
+def test_invalid_parameters(witnet_request_randomness, parameters):
+    with pytest.raises(WitnessingParametersError) as error:
+        malleate_bytecode(parameters)
+
+    with brownie.reverts(error.value.typed_error):
+        set_witnessing_parameters(witnet_request_randomness, parameters)
+
+# Test evaluating a batch of parameter sets
+def test_evaluate_witnessing_parameters():
+    results = evaluate_witnessing_parameters(VALID_PARAMETERS + INVALID_PARAMETERS)
+
+    assert len(results) == len(VALID_PARAMETERS) + len(INVALID_PARAMETERS)
+    for result, parameters in zip(results, VALID_PARAMETERS):
+        assert result["error"] is None
+        assert result["bytecode"] == malleate_bytecode(parameters)
+        assert result["hash"] == get_request_hash(result["bytecode"])
+    assert [result["error"].error_name for result in results[len(VALID_PARAMETERS):]] == [
+        "noWitnessingReward",
+        "invalidNumWitnesses",
+        "invalidNumWitnesses",
+        "invalidNumWitnesses",
+        "invalidWitnessingConsensus",
+        "invalidWitnessingConsensus",
+        "invalidWitnessingCollateral",
+        "noWitnessingReward",
+    ]
+
+# Values outside of the Solidity types can not be sent to the contract at all
+def test_out_of_range_parameters():
+    with pytest.raises(ValueError):
+        malleate_bytecode(WitnessingParameters(256, 75, 10 ** 9, 10 ** 6, 10 ** 3))
+    with pytest.raises(ValueError):
+        malleate_bytecode(WitnessingParameters(8, 75, 10 ** 9, 2 ** 64, 10 ** 3))
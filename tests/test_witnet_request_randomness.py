@@ -15,8 +15,13 @@ from util.constants import invalidWitnessingCollateral
 
 from util.network_functions import get_account
 
-@pytest.fixture
-def witnet_request_randomness():
+# Contracts are deployed once per module and every test runs against a snapshot of the chain which is reverted afterwards
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+@pytest.fixture(scope="module")
+def witnet_request_randomness(module_isolation):
     return deploy_witnet_request_randomness()
 
 @pytest.fixture
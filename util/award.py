@@ -0,0 +1,285 @@
+import asyncio
+import functools
+import logging
+
+from web3 import Web3
+
+from web3.exceptions import TransactionNotFound
+
+from web3.logs import DISCARD
+
+from util.award_daemon import AWAITING_RNG
+from util.award_daemon import COMPLETING
+from util.award_daemon import IDLE
+from util.award_daemon import STARTING
+from util.award_daemon import AwardDaemon
+from util.award_daemon import get_pending_timeout_blocks
+
+from util.award_journal import get_award_journal
+
+from util.contract_registry import get_contract
+
+from util.helper_functions import to_wei
+
+from util.logger import log_span
+
+from util.multicall import get_multicall_address
+from util.multicall import multicall
+
+from util.request_fee import RequestFeeCurve
+from util.request_fee import get_request_fee_refresh_blocks
+from util.request_fee import get_request_gas_price
+
+from util.request_status import get_requests_to_fetch
+
+from util.rng_watcher import get_poll_interval
+from util.rng_watcher import watch_requests
+
+# The award cycle of the keeper, shared by the brownie script and the web3-only command line interface
+
+# Maximum number of requests settled by a single fetchRandomnessBatch transaction
+FETCH_BATCH_SIZE = 50
+
+def check_prize_strategies(network_config, w3_provider, prize_strategy_addresses, function_name):
+    # Resolve the view function for all prize strategies in one batch
+    calls = [
+        (get_contract(w3_provider, "PrizeStrategy", prize_strategy_address), function_name, [])
+        for prize_strategy_address in prize_strategy_addresses
+    ]
+    results = multicall(w3_provider, calls, get_multicall_address(network_config))
+
+    return dict(zip(prize_strategy_addresses, results))
+
+def start_award(network_config, w3_provider, transaction_sender, transaction_parameters, request_fee_curve=None, award_journal=None):
+    assert len(network_config["prize_strategy_addresses"]) > 0, "At least one prize strategy address is required"
+
+    can_start_awards = check_prize_strategies(network_config, w3_provider, network_config["prize_strategy_addresses"], "canStartAward")
+
+    request_gas_price = get_request_gas_price(w3_provider, transaction_sender) if request_fee_curve is not None else None
+
+    # For each of the prize strategies, check if the award can be started and if so, send the transaction without waiting for it
+    pending_awards = {}
+    for prize_strategy_address, can_start in can_start_awards.items():
+        if not can_start:
+            logging.warning(f"Prize strategy {prize_strategy_address} is not ready for awarding\n")
+            continue
+
+        if request_fee_curve is not None:
+            # Every started award pays for an RNG request, skip the awards of which the request would revert
+            request_error = request_fee_curve.get_request_error(request_gas_price, requests=len(pending_awards) + 1)
+            if request_error is not None:
+                logging.warning(f"Refusing to start award for prize strategy {prize_strategy_address} since the RNG request would revert with {request_error}\n")
+                continue
+
+        prize_strategy = get_contract(w3_provider, "PrizeStrategy", prize_strategy_address)
+        pending_awards[prize_strategy_address] = transaction_sender.send(prize_strategy.functions.startAward(), transaction_parameters)
+        _record_award(award_journal, transaction_sender, prize_strategy_address, STARTING, pending_awards[prize_strategy_address])
+
+    # Wait for all started awards to be confirmed
+    awards_started = set()
+    receipts = transaction_sender.wait_for_receipts(list(pending_awards.values()))
+    for prize_strategy_address, receipt in zip(pending_awards.keys(), receipts):
+        if receipt["status"] == 1:
+            logging.info(f"Started award for prize strategy at {prize_strategy_address}\n")
+            awards_started.add(prize_strategy_address)
+            _record_award(award_journal, transaction_sender, prize_strategy_address, AWAITING_RNG)
+        else:
+            logging.error(f"Starting award for prize strategy at {prize_strategy_address} reverted\n")
+            _record_award(award_journal, transaction_sender, prize_strategy_address, IDLE)
+
+    # Return prize strategies for which an award was started
+    return awards_started
+
+def fetch_randomness(rng_witnet, transaction_sender, transaction_parameters, request_ids):
+    # Settle the requests in batches, requests which are not available are skipped by the contract instead of reverting
+    request_ids = list(request_ids)
+    batches = [request_ids[batch_start:batch_start + FETCH_BATCH_SIZE] for batch_start in range(0, len(request_ids), FETCH_BATCH_SIZE)]
+
+    # Send all batches before waiting for the receipts
+    transaction_hashes = [
+        transaction_sender.send(rng_witnet.functions.fetchRandomnessBatch(batch), transaction_parameters)
+        for batch in batches
+    ]
+
+    for batch, receipt in zip(batches, transaction_sender.wait_for_receipts(transaction_hashes)):
+        if receipt["status"] != 1:
+            logging.error(f"Fetching the random numbers for requests {batch} reverted\n")
+            continue
+        for rng_failed in rng_witnet.events.RandomNumberFailed().processReceipt(receipt, errors=DISCARD):
+            logging.error(f"Fetching the random number for request {rng_failed['args']['requestId']} failed\n")
+        for rng_completed in rng_witnet.events.RandomNumberCompleted().processReceipt(receipt, errors=DISCARD):
+            request_id = rng_completed["args"]["requestId"]
+            random_number = rng_completed["args"]["randomNumber"]
+            logging.info(f"Fetching the random number for request {request_id} succeeded: {random_number:x}\n")
+
+def fetch_random_numbers(network_config, w3_provider, transaction_sender, transaction_parameters):
+    # Grab an RngWitnet deployment
+    assert network_config["rng_witnet_address"] != "", "An RngWitnet contract address is required"
+    rng_witnet_web3 = get_contract(w3_provider, "RngWitnet", network_config["rng_witnet_address"])
+
+    # Get the requests which have not been fetched yet and the requests which failed
+    requests_to_fetch, failed_random_numbers = get_requests_to_fetch(network_config, w3_provider, rng_witnet_web3, get_multicall_address(network_config))
+
+    logging.info(f"Random number requests which failed: {sorted(failed_random_numbers)}\n")
+
+    logging.info(f"Random number requests to fetch: {requests_to_fetch}\n")
+
+    # Wait for all RNG requests at once and fetch each one as soon as it is available
+    asyncio.run(watch_requests(
+        w3_provider,
+        rng_witnet_web3,
+        requests_to_fetch,
+        functools.partial(fetch_randomness, rng_witnet_web3, transaction_sender, transaction_parameters),
+        get_multicall_address(network_config),
+    ))
+
+def complete_award(network_config, w3_provider, awards_started, transaction_sender, transaction_parameters, award_journal=None):
+    can_complete_awards = check_prize_strategies(network_config, w3_provider, list(awards_started), "canCompleteAward")
+
+    # For each of the prize strategies, check if the award can be completed and if so, send the transaction without waiting for it
+    pending_awards = {}
+    awards_waiting = []
+    for prize_strategy_address, can_complete in can_complete_awards.items():
+        if can_complete:
+            prize_strategy = get_contract(w3_provider, "PrizeStrategy", prize_strategy_address)
+            pending_awards[prize_strategy_address] = transaction_sender.send(prize_strategy.functions.completeAward(), transaction_parameters)
+            _record_award(award_journal, transaction_sender, prize_strategy_address, COMPLETING, pending_awards[prize_strategy_address])
+        else:
+            logging.warning(f"Cannot complete award for prize strategy at {prize_strategy_address}\n")
+            awards_waiting.append(prize_strategy_address)
+
+    # Awards which were completed or cancelled by someone else are removed from the journal, the others are resumed by the next run
+    # An award of which the startAward transaction is still pending has no RNG request yet and is kept as well
+    if award_journal is not None and len(awards_waiting) > 0:
+        rng_requested = check_prize_strategies(network_config, w3_provider, awards_waiting, "isRngRequested")
+        pending_records = award_journal.get_pending(transaction_sender.chain_id)
+        for prize_strategy_address, requested in rng_requested.items():
+            if requested:
+                continue
+            record = pending_records.get(Web3.toChecksumAddress(prize_strategy_address))
+            if record is not None and record["state"] == STARTING and _is_transaction_pending(w3_provider, record["transaction_hash"]):
+                logging.info(f"Award for prize strategy at {prize_strategy_address} is still starting in transaction {record['transaction_hash']}\n")
+                continue
+            _record_award(award_journal, transaction_sender, prize_strategy_address, IDLE)
+
+    # Wait for all completed awards to be confirmed
+    receipts = transaction_sender.wait_for_receipts(list(pending_awards.values()))
+    for prize_strategy_address, receipt in zip(pending_awards.keys(), receipts):
+        if receipt["status"] == 1:
+            logging.info(f"Completed award for prize strategy at {prize_strategy_address}\n")
+            _record_award(award_journal, transaction_sender, prize_strategy_address, IDLE)
+        else:
+            logging.error(f"Completing award for prize strategy at {prize_strategy_address} reverted\n")
+            _record_award(award_journal, transaction_sender, prize_strategy_address, AWAITING_RNG)
+
+def _record_award(award_journal, transaction_sender, prize_strategy_address, state, transaction_hash=None):
+    if award_journal is None:
+        return
+    nonce = transaction_sender.get_nonce(transaction_hash) if transaction_hash is not None else None
+    award_journal.record(transaction_sender.chain_id, prize_strategy_address, state, transaction_hash, nonce)
+
+# Whether the node holds the transaction but did not mine it yet
+def _is_transaction_pending(w3_provider, transaction_hash):
+    if transaction_hash is None:
+        return False
+    try:
+        transaction = w3_provider.eth.get_transaction(transaction_hash)
+    except TransactionNotFound:
+        return False
+    return transaction["blockNumber"] is None
+
+# Find the awards which were started but not completed by a previous run from the journal
+# Only the receipts of the transactions which were in flight when that run stopped are requested
+def resume_awards(award_journal, w3_provider, chain_id):
+    awards_started = set()
+    for prize_strategy_address, record in award_journal.get_pending(chain_id).items():
+        state = record["state"]
+        if record["transaction_hash"] is not None:
+            try:
+                receipt = w3_provider.eth.get_transaction_receipt(record["transaction_hash"])
+            except TransactionNotFound:
+                # Still pending, replaced or dropped, whether the award can be completed is checked on-chain
+                receipt = None
+            if receipt is None and _is_transaction_pending(w3_provider, record["transaction_hash"]):
+                # Kept in its state, complete_award does not reset an award which is still starting
+                logging.info(f"Transaction {record['transaction_hash']} for prize strategy at {prize_strategy_address} is still pending\n")
+            if receipt is not None and state == STARTING:
+                state = AWAITING_RNG if receipt["status"] == 1 else IDLE
+            elif receipt is not None and state == COMPLETING:
+                state = IDLE if receipt["status"] == 1 else AWAITING_RNG
+            if state != record["state"]:
+                award_journal.record(chain_id, prize_strategy_address, state)
+
+        if state != IDLE:
+            logging.info(f"Resuming award for prize strategy at {prize_strategy_address} in state {state}\n")
+            awards_started.add(prize_strategy_address)
+    return awards_started
+
+# Run a full cycle of prize awarding: start the awards, fetch the random numbers and complete the awards
+def run_award_cycle(network_config, w3_provider, transaction_sender):
+    # Check if the current gas price does not exceed the configured maximum price
+    current_gas_price = w3_provider.eth.gas_price
+    if current_gas_price > to_wei(network_config["max_gas_price"]):
+        logging.warning(f"Refusing to start award since the gas price is {current_gas_price / 1E9:.3f} gwei\n")
+        return
+
+    # Fees and gas limits are filled in per transaction by the fee estimator
+    transaction_parameters = {}
+
+    # Predict whether the RNG requests of the awards can be paid for
+    assert network_config["rng_witnet_address"] != "", "An RngWitnet contract address is required"
+    request_fee_curve = RequestFeeCurve(
+        w3_provider,
+        get_contract(w3_provider, "RngWitnet", network_config["rng_witnet_address"]),
+        get_multicall_address(network_config),
+    )
+    request_fee_curve.refresh()
+
+    # Awards started by a previous run which stopped before completing them
+    award_journal = get_award_journal(network_config)
+    awards_resumed = resume_awards(award_journal, w3_provider, transaction_sender.chain_id)
+
+    # Every phase is logged as a timing span, transactions are logged as spans of their own by the transaction sender
+    logging.info("Starting awards\n")
+    with log_span("start_award") as span:
+        awards_started = start_award(network_config, w3_provider, transaction_sender, transaction_parameters, request_fee_curve, award_journal)
+        span["awards_started"] = len(awards_started)
+    awards_started = awards_resumed | set(Web3.toChecksumAddress(prize_strategy_address) for prize_strategy_address in awards_started)
+
+    logging.info("Fetch random numbers\n")
+    with log_span("fetch_random_numbers"):
+        fetch_random_numbers(network_config, w3_provider, transaction_sender, transaction_parameters)
+
+    logging.info("Completing awards\n")
+    with log_span("complete_award"):
+        complete_award(network_config, w3_provider, awards_started, transaction_sender, transaction_parameters, award_journal)
+
+# Long-running alternative to run_award_cycle: keeps the provider, nonce and award state warm and acts on every new block
+def run_award_daemon(network_config, w3_provider, transaction_sender):
+    assert network_config["rng_witnet_address"] != "", "An RngWitnet contract address is required"
+    assert len(network_config["prize_strategy_addresses"]) > 0, "At least one prize strategy address is required"
+
+    # Fees and gas limits are filled in per transaction by the fee estimator
+    transaction_parameters = {}
+
+    request_fee_curve = RequestFeeCurve(
+        w3_provider,
+        get_contract(w3_provider, "RngWitnet", network_config["rng_witnet_address"]),
+        get_multicall_address(network_config),
+        refresh_blocks=get_request_fee_refresh_blocks(network_config),
+    )
+
+    award_daemon = AwardDaemon(
+        w3_provider,
+        network_config["rng_witnet_address"],
+        network_config["prize_strategy_addresses"],
+        transaction_sender,
+        transaction_parameters,
+        multicall_address=get_multicall_address(network_config),
+        max_gas_price=to_wei(network_config["max_gas_price"]),
+        request_fee_curve=request_fee_curve,
+        pending_timeout_blocks=get_pending_timeout_blocks(network_config),
+    )
+
+    logging.info(f"Watching {len(network_config['prize_strategy_addresses'])} prize strategies for awards\n")
+    award_daemon.run(poll_interval=get_poll_interval(network_config))
@@ -0,0 +1,278 @@
+import logging
+import time
+
+from web3.logs import DISCARD
+
+from util.contract_registry import get_contract
+
+from util.logger import log_span
+
+from util.multicall import MULTICALL3_ADDRESS
+from util.multicall import multicall
+
+from util.request_fee import get_request_gas_price
+
+from util.request_status import FAILED
+
+from util.rng_watcher import DEFAULT_POLL_INTERVAL
+
+# Award states of a prize strategy
+IDLE = "idle"
+STARTING = "starting"
+AWAITING_RNG = "awaiting_rng"
+COMPLETING = "completing"
+CANCELLING = "cancelling"
+
+# Prize strategy views which are read for every strategy on every new block
+PRIZE_STRATEGY_VIEWS = ["canStartAward", "isRngRequested", "isRngTimedOut", "canCompleteAward", "getLastRngRequestId"]
+
+# Blocks after which a pending transaction which is not replaced is checked for having been dropped by the node
+DEFAULT_PENDING_TIMEOUT_BLOCKS = 20
+
+def get_pending_timeout_blocks(network_config):
+    if "pending_timeout_blocks" in network_config and network_config["pending_timeout_blocks"] != "":
+        return int(network_config["pending_timeout_blocks"])
+    return DEFAULT_PENDING_TIMEOUT_BLOCKS
+
+# Runs canStartAward -> startAward -> fetchRandomnessBatch -> completeAward as a state machine per prize strategy
+# The state of all strategies is refreshed with a single batched eth_call per new block, transactions are sent
+# without waiting for their receipts and their outcome is checked on later blocks
+class AwardDaemon:
+    def __init__(self, w3_provider, rng_witnet_address, prize_strategy_addresses, transaction_sender, transaction_parameters, multicall_address=MULTICALL3_ADDRESS, max_gas_price=None, request_fee_curve=None, pending_timeout_blocks=DEFAULT_PENDING_TIMEOUT_BLOCKS):
+        self.w3_provider = w3_provider
+        self.rng_witnet = get_contract(w3_provider, "RngWitnet", rng_witnet_address)
+        self.prize_strategies = {
+            prize_strategy_address: get_contract(w3_provider, "PrizeStrategy", prize_strategy_address)
+            for prize_strategy_address in prize_strategy_addresses
+        }
+        self.transaction_sender = transaction_sender
+        self.transaction_parameters = transaction_parameters
+        self.multicall_address = multicall_address
+        self.max_gas_price = max_gas_price
+        # Predicts whether the RNG request of startAward can be paid for, its state is read along with the prize strategies
+        self.request_fee_curve = request_fee_curve
+        self.pending_timeout_blocks = pending_timeout_blocks
+
+        self.states = {prize_strategy_address: IDLE for prize_strategy_address in prize_strategy_addresses}
+        # Pending transaction hash per prize strategy
+        self.pending_transactions = {}
+        # Pending fetchRandomnessBatch transaction hash per RNG request id
+        self.pending_fetches = {}
+        # Block at which every pending transaction was sent or last seen pending by the node
+        self.pending_since = {}
+        # RNG requests of which the random number failed, these are never fetched again
+        self.failed_requests = set()
+        self.last_block_number = None
+        self.gas_price_allowed = None
+
+    def run(self, poll_interval=DEFAULT_POLL_INTERVAL, max_blocks=None):
+        processed_blocks = 0
+        while max_blocks is None or processed_blocks < max_blocks:
+            block_number = self.w3_provider.eth.blockNumber
+            if block_number == self.last_block_number:
+                time.sleep(poll_interval)
+                continue
+
+            self.last_block_number = block_number
+            try:
+                with log_span("process_block", block_number=block_number):
+                    self.process_block(block_number)
+            except Exception:
+                # Keep the daemon alive, the next block retries from the on-chain state
+                logging.exception(f"Failed to process block {block_number}")
+            processed_blocks += 1
+
+    def process_block(self, block_number):
+        # The gas price is only fetched once per block and only if an award can be started
+        self.gas_price_allowed = None
+
+        self._check_pending_transactions(block_number)
+
+        views = self._read_prize_strategies(block_number)
+        fetchable_requests = self._read_fetchable_requests(views)
+
+        request_ids_to_fetch = []
+        for prize_strategy_address, state in list(self.states.items()):
+            strategy_views = views[prize_strategy_address]
+
+            if state == IDLE:
+                if strategy_views["isRngRequested"]:
+                    # Started by another keeper or by a previous run of this daemon
+                    self._set_state(prize_strategy_address, AWAITING_RNG)
+                elif strategy_views["canStartAward"] and self._award_allowed():
+                    self._send(prize_strategy_address, "startAward", STARTING, block_number)
+
+            if self.states[prize_strategy_address] == AWAITING_RNG:
+                request_id = strategy_views["getLastRngRequestId"]
+                if strategy_views["canCompleteAward"]:
+                    self._send(prize_strategy_address, "completeAward", COMPLETING, block_number)
+                elif strategy_views["isRngTimedOut"]:
+                    self._send(prize_strategy_address, "cancelAward", CANCELLING, block_number)
+                elif not strategy_views["isRngRequested"]:
+                    self._set_state(prize_strategy_address, IDLE)
+                elif fetchable_requests.get(request_id) and request_id not in self.pending_fetches and request_id not in request_ids_to_fetch:
+                    request_ids_to_fetch.append(request_id)
+
+        # Strategies can share an RNG request, all fetchable requests are settled in a single transaction
+        if len(request_ids_to_fetch) > 0:
+            logging.info(f"Block {block_number}: fetching randomness for requests {request_ids_to_fetch}")
+            transaction_hash = self.transaction_sender.send(
+                self.rng_witnet.functions.fetchRandomnessBatch(request_ids_to_fetch),
+                self.transaction_parameters,
+            )
+            for request_id in request_ids_to_fetch:
+                self.pending_fetches[request_id] = transaction_hash
+            self.pending_since[transaction_hash] = block_number
+
+    def _read_prize_strategies(self, block_number):
+        calls = [
+            (prize_strategy, view, [])
+            for prize_strategy in self.prize_strategies.values()
+            for view in PRIZE_STRATEGY_VIEWS
+        ]
+        if self.request_fee_curve is not None:
+            calls += self.request_fee_curve.get_state_calls()
+        results = multicall(self.w3_provider, calls, self.multicall_address)
+
+        if self.request_fee_curve is not None:
+            strategy_calls = len(self.prize_strategies) * len(PRIZE_STRATEGY_VIEWS)
+            self.request_fee_curve.update(results[strategy_calls:], block_number)
+
+        views = {}
+        for index, prize_strategy_address in enumerate(self.prize_strategies.keys()):
+            strategy_results = results[index * len(PRIZE_STRATEGY_VIEWS):(index + 1) * len(PRIZE_STRATEGY_VIEWS)]
+            views[prize_strategy_address] = dict(zip(PRIZE_STRATEGY_VIEWS, strategy_results))
+        return views
+
+    def _read_fetchable_requests(self, views):
+        # Only check RNG requests of strategies which are waiting for their random number
+        # A failed request stays fetchable, its award is cancelled once the request timed out
+        request_ids = sorted(set(
+            views[prize_strategy_address]["getLastRngRequestId"]
+            for prize_strategy_address, state in self.states.items()
+            if state in (IDLE, AWAITING_RNG) and views[prize_strategy_address]["isRngRequested"]
+        ) - self.failed_requests)
+        if len(request_ids) == 0:
+            return {}
+
+        # The status also covers requests which failed before a restart or were fetched by another keeper
+        # Deployments without getRequestStatuses revert on it, which the multicall returns as None
+        calls = [
+            (self.rng_witnet, function_name, arguments)
+            for request_id in request_ids
+            for function_name, arguments in (("isRngFetchable", [request_id]), ("isRequestComplete", [request_id]), ("getRequestStatuses", [request_id, request_id]))
+        ]
+        results = multicall(self.w3_provider, calls, self.multicall_address)
+
+        fetchable_requests = {}
+        for index, request_id in enumerate(request_ids):
+            fetchable, complete, statuses = results[3 * index:3 * index + 3]
+            if statuses is not None and statuses[0] == FAILED:
+                self.failed_requests.add(request_id)
+                continue
+            fetchable_requests[request_id] = fetchable and not complete
+        return fetchable_requests
+
+    def _check_pending_transactions(self, block_number):
+        for prize_strategy_address, transaction_hash in list(self.pending_transactions.items()):
+            receipt = self.transaction_sender.get_receipt(transaction_hash)
+            if receipt is None:
+                if self._is_dropped(transaction_hash, block_number):
+                    # The next block continues from the on-chain state and sends the transaction again if it is still needed
+                    del self.pending_transactions[prize_strategy_address]
+                    self._set_state(prize_strategy_address, IDLE)
+                continue
+            del self.pending_transactions[prize_strategy_address]
+            self.pending_since.pop(transaction_hash, None)
+
+            state = self.states[prize_strategy_address]
+            if receipt["status"] != 1:
+                logging.error(f"Transaction {transaction_hash} for prize strategy {prize_strategy_address} reverted in state {state}")
+                self._set_state(prize_strategy_address, AWAITING_RNG if state == COMPLETING else IDLE)
+            elif state == STARTING:
+                self._set_state(prize_strategy_address, AWAITING_RNG)
+            else:
+                self._set_state(prize_strategy_address, IDLE)
+
+        receipts = {}
+        dropped = {}
+        for request_id, transaction_hash in list(self.pending_fetches.items()):
+            if transaction_hash not in receipts:
+                receipts[transaction_hash] = self.transaction_sender.get_receipt(transaction_hash)
+            receipt = receipts[transaction_hash]
+            if receipt is None:
+                if transaction_hash not in dropped:
+                    dropped[transaction_hash] = self._is_dropped(transaction_hash, block_number)
+                if dropped[transaction_hash]:
+                    # Fetched again on this block if the request is still fetchable
+                    del self.pending_fetches[request_id]
+                continue
+            del self.pending_fetches[request_id]
+            self.pending_since.pop(transaction_hash, None)
+
+            # A batch skips requests which turned out not to be available, these are fetched again on a later block
+            failed_request_ids = [event["args"]["requestId"] for event in self.rng_witnet.events.RandomNumberFailed().processReceipt(receipt, errors=DISCARD)]
+            completed_request_ids = [event["args"]["requestId"] for event in self.rng_witnet.events.RandomNumberCompleted().processReceipt(receipt, errors=DISCARD)]
+            if receipt["status"] != 1:
+                logging.error(f"Fetching randomness for request {request_id} reverted")
+            elif request_id in failed_request_ids:
+                logging.error(f"Fetching the random number for request {request_id} failed")
+                self.failed_requests.add(request_id)
+            elif request_id in completed_request_ids:
+                logging.info(f"Fetched the random number for request {request_id}")
+            else:
+                logging.warning(f"The random number for request {request_id} was not available yet")
+
+    # Without replacements a transaction which the node dropped would stay pending forever
+    # It is abandoned once it was unknown to the node for pending_timeout_blocks blocks after it was sent
+    def _is_dropped(self, transaction_hash, block_number):
+        if self.transaction_sender.replace_after_blocks is not None:
+            return False
+        if block_number - self.pending_since.get(transaction_hash, block_number) < self.pending_timeout_blocks:
+            return False
+        if not self.transaction_sender.is_dropped(transaction_hash):
+            self.pending_since[transaction_hash] = block_number
+            return False
+
+        logging.warning(f"Transaction {transaction_hash} was dropped after {self.pending_timeout_blocks} blocks")
+        self.transaction_sender.abandon(transaction_hash)
+        del self.pending_since[transaction_hash]
+        return True
+
+    def _award_allowed(self):
+        return self._gas_price_allowed() and self._request_fee_allowed()
+
+    def _gas_price_allowed(self):
+        if self.max_gas_price is None:
+            return True
+        if self.gas_price_allowed is None:
+            gas_price = self.w3_provider.eth.gas_price
+            self.gas_price_allowed = gas_price <= self.max_gas_price
+            if not self.gas_price_allowed:
+                logging.warning(f"Refusing to start award since the gas price is {gas_price / 1E9:.3f} gwei")
+        return self.gas_price_allowed
+
+    def _request_fee_allowed(self):
+        if self.request_fee_curve is None:
+            return True
+        # Awards which were started but not yet mined still have to pay for their RNG request
+        requests = sum(1 for state in self.states.values() if state == STARTING) + 1
+        request_error = self.request_fee_curve.get_request_error(get_request_gas_price(self.w3_provider, self.transaction_sender), requests=requests)
+        if request_error is not None:
+            logging.warning(f"Refusing to start award since the RNG request would revert with {request_error}")
+            return False
+        return True
+
+    def _send(self, prize_strategy_address, function_name, state, block_number):
+        prize_strategy = self.prize_strategies[prize_strategy_address]
+        transaction_hash = self.transaction_sender.send(
+            prize_strategy.functions[function_name](),
+            self.transaction_parameters,
+        )
+        self.pending_transactions[prize_strategy_address] = transaction_hash
+        self.pending_since[transaction_hash] = block_number
+        self._set_state(prize_strategy_address, state)
+
+    def _set_state(self, prize_strategy_address, state):
+        logging.info(f"Prize strategy {prize_strategy_address}: {self.states[prize_strategy_address]} -> {state}")
+        self.states[prize_strategy_address] = state
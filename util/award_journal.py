@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import threading
+
+from web3 import Web3
+
+from util.award_daemon import IDLE
+
+DEFAULT_AWARD_JOURNAL_PATH = "award_journal.jsonl"
+
+_award_journals_lock = threading.Lock()
+_award_journals = {}
+
+def get_award_journal_path(network_config):
+    if "award_journal_path" in network_config and network_config["award_journal_path"] != "":
+        return network_config["award_journal_path"]
+    return DEFAULT_AWARD_JOURNAL_PATH
+
+# Journals are shared per path, so networks which are run in one process append to the same open file
+def get_award_journal(network_config):
+    path = get_award_journal_path(network_config)
+    with _award_journals_lock:
+        if path not in _award_journals:
+            _award_journals[path] = AwardJournal(path)
+        return _award_journals[path]
+
+def _fsync_directory(path):
+    # Makes the rename of the compacted journal durable, not supported on every platform
+    try:
+        directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(directory)
+    except OSError:
+        pass
+    finally:
+        os.close(directory)
+
+# Append-only journal of the award state of every prize strategy and the transaction which is in flight for it
+# Every record is one JSON line holding the complete state of a strategy, so the last record of a strategy wins on replay
+# Records are fsync'd before the keeper continues, a record which was torn by a crash is ignored
+class AwardJournal:
+    def __init__(self, path=DEFAULT_AWARD_JOURNAL_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        # Latest record per (chain id, prize strategy) of the strategies which are not idle
+        self.records = {}
+
+        self._replay()
+        self._compact()
+        self.journal_file = open(path, "a")
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as journal_file:
+            for line_number, line in enumerate(journal_file, start=1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"Ignoring torn record on line {line_number} of award journal {self.path}")
+                    break
+                self._apply(record)
+
+    def _apply(self, record):
+        key = (record["chain_id"], record["prize_strategy"])
+        if record["state"] == IDLE:
+            self.records.pop(key, None)
+        else:
+            self.records[key] = record
+
+    # Rewrite the journal with only the strategies which are not idle, so replaying it is proportional to the pending awards
+    def _compact(self):
+        compacted_path = self.path + ".tmp"
+        with open(compacted_path, "w") as compacted_file:
+            for record in self.records.values():
+                compacted_file.write(json.dumps(record) + "\n")
+            compacted_file.flush()
+            os.fsync(compacted_file.fileno())
+        os.replace(compacted_path, self.path)
+        _fsync_directory(self.path)
+
+    def record(self, chain_id, prize_strategy_address, state, transaction_hash=None, nonce=None):
+        record = {
+            "chain_id": chain_id,
+            "prize_strategy": Web3.toChecksumAddress(prize_strategy_address),
+            "state": state,
+            "transaction_hash": transaction_hash,
+            "nonce": nonce,
+        }
+        with self.lock:
+            self.journal_file.write(json.dumps(record) + "\n")
+            self.journal_file.flush()
+            os.fsync(self.journal_file.fileno())
+            self._apply(record)
+
+    # Latest record of every prize strategy on the chain which is not idle
+    def get_pending(self, chain_id):
+        with self.lock:
+            return {
+                prize_strategy_address: record
+                for (record_chain_id, prize_strategy_address), record in self.records.items()
+                if record_chain_id == chain_id
+            }
+
+    def close(self):
+        with self.lock:
+            self.journal_file.close()
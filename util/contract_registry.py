@@ -0,0 +1,101 @@
+import functools
+import json
+import threading
+import weakref
+
+from eth_abi import decode_abi
+
+from eth_utils import event_abi_to_log_topic
+from eth_utils import function_abi_to_4byte_selector
+from eth_utils import function_signature_to_4byte_selector
+
+# Only exported at the top level of eth-utils from version 2, which web3 5 does not allow
+from eth_utils.abi import collapse_if_tuple
+
+from web3 import Web3
+
+# Where the ABI of every contract used by the scripts is loaded from and under which key it is stored, if any
+ABI_PATHS = {
+    "Multicall3": ("abis/multicall3_abi.json", None),
+    "PrizeStrategy": ("abis/multiple_winners_abi.json", None),
+    "RngWitnet": ("abis/rng_witnet_abi.json", None),
+    "WitnetRequestRandomness": ("build/contracts/WitnetRequestRandomness.json", "abi"),
+}
+
+_lock = threading.Lock()
+_chain_ids = weakref.WeakKeyDictionary()
+
+# Every ABI file is read and parsed only once
+@functools.lru_cache(maxsize=None)
+def load_abi(name):
+    assert name in ABI_PATHS, f"Unknown contract {name}"
+    path, key = ABI_PATHS[name]
+    with open(path) as abi_file:
+        content = json.load(abi_file)
+    return content[key] if key else content
+
+def get_chain_id(w3_provider):
+    with _lock:
+        if w3_provider not in _chain_ids:
+            _chain_ids[w3_provider] = w3_provider.eth.chain_id
+        return _chain_ids[w3_provider]
+
+# Web3 contract objects are memoized per provider, as every contract sends its calls through the provider it was created with
+# The memo is stored on the provider itself: a contract refers to its provider, so a weak mapping keyed on it would never be released
+def get_contract(w3_provider, name, address):
+    key = (name, Web3.toChecksumAddress(address))
+    with _lock:
+        contracts = vars(w3_provider).setdefault("_registry_contracts", {})
+        if key not in contracts:
+            contracts[key] = w3_provider.eth.contract(address=key[1], abi=load_abi(name))
+        return contracts[key]
+
+def _get_abi_entries(name, entry_type):
+    return [entry for entry in load_abi(name) if entry["type"] == entry_type]
+
+# Map the topic0 hash of every event to its ABI
+@functools.lru_cache(maxsize=None)
+def get_event_topics(name):
+    return {
+        "0x" + event_abi_to_log_topic(event_abi).hex(): event_abi
+        for event_abi in _get_abi_entries(name, "event")
+    }
+
+# Map the 4-byte selector of every function to its ABI
+@functools.lru_cache(maxsize=None)
+def get_function_selectors(name):
+    return {
+        "0x" + function_abi_to_4byte_selector(function_abi).hex(): function_abi
+        for function_abi in _get_abi_entries(name, "function")
+    }
+
+# Custom errors are hashed like functions, with tuple arguments collapsed to their component types
+def _get_error_selector(error_abi):
+    signature = f"{error_abi['name']}({','.join(collapse_if_tuple(argument) for argument in error_abi['inputs'])})"
+    return "0x" + function_signature_to_4byte_selector(signature).hex()
+
+# Map the 4-byte selector of every custom error to its ABI
+@functools.lru_cache(maxsize=None)
+def get_error_selectors(name):
+    return {
+        _get_error_selector(error_abi): error_abi
+        for error_abi in _get_abi_entries(name, "error")
+    }
+
+# Whether the code deployed at the address of the contract dispatches the function of the shipped ABI
+# Deployments which predate a function do not compare the call data against its selector, which is pushed with PUSH4
+def has_function(w3_provider, contract, function_name):
+    function_abi = next(entry for entry in contract.abi if entry["type"] == "function" and entry["name"] == function_name)
+    return b"\x63" + function_abi_to_4byte_selector(function_abi) in bytes(w3_provider.eth.get_code(contract.address))
+
+# Decode revert data of a custom error into its name and arguments, returns None for unknown errors
+def decode_error(name, revert_data):
+    if isinstance(revert_data, str):
+        revert_data = bytes.fromhex(revert_data[2:] if revert_data.startswith("0x") else revert_data)
+
+    error_abi = get_error_selectors(name).get("0x" + revert_data[:4].hex())
+    if error_abi is None:
+        return None
+
+    arguments = decode_abi([argument["type"] for argument in error_abi["inputs"]], revert_data[4:])
+    return error_abi["name"], dict(zip([argument["name"] for argument in error_abi["inputs"]], arguments))
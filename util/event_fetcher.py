@@ -0,0 +1,167 @@
+import collections
+import functools
+import logging
+import re
+
+from concurrent.futures import ThreadPoolExecutor
+
+from eth_abi import decode_abi
+
+from eth_utils import event_abi_to_log_topic
+
+from requests.exceptions import Timeout
+
+from web3 import Web3
+
+# Error messages node API providers return when an eth_getLogs range is too large or returns too many logs
+RANGE_ERROR_MESSAGES = [
+    "log response size exceeded",               # Alchemy
+    "query returned more than",                 # Infura: query returned more than 10000 results
+    "block range is too wide",                  # Polygon RPC
+    "exceed maximum block range",               # Polygon / Ankr
+    "block range too large",
+    "range is too large",
+    "response size should not greater than",
+    "limit exceeded",
+    "query timeout exceeded",
+]
+
+# Some providers suggest a block range which will work, e.g. "this block range should work: [0x1, 0x2]"
+SUGGESTED_RANGE = re.compile(r"\[(0x[0-9a-fA-F]+), (0x[0-9a-fA-F]+)\]")
+
+DEFAULT_MAX_WORKERS = 4
+
+# A log decoded without web3's event processing, args holds the event arguments in ABI order
+# Indexed arguments are decoded from the topics, the others from the data only if asked for and are None otherwise
+RawEvent = collections.namedtuple("RawEvent", ["event_name", "block_number", "log_index", "transaction_hash", "args"])
+
+def get_max_workers(network_config):
+    if "log_fetch_concurrency" in network_config and network_config["log_fetch_concurrency"] != "":
+        return int(network_config["log_fetch_concurrency"])
+    return DEFAULT_MAX_WORKERS
+
+# Map the topic0 hash of the given events of a contract ABI to their ABI
+def get_event_abis(abi, event_names):
+    return {
+        "0x" + event_abi_to_log_topic(entry).hex(): entry
+        for entry in abi
+        if entry["type"] == "event" and entry["name"] in event_names
+    }
+
+# Stream the raw logs of several events of a contract with a single eth_getLogs per block range, filtered on topic0
+# Logs are yielded in block order while non-overlapping block ranges are fetched concurrently
+# The logs are not ABI decoded, so large histories are streamed without building web3 event objects
+def iter_raw_logs(w3_provider, address, topics, from_block, to_block, **kwargs):
+    logging.info(f"Fetching logs of {address} from block {from_block} to block {to_block}")
+    log_filter = {"address": address, "topics": [list(topics)]}
+    yield from _iter_ranges(functools.partial(_get_raw_logs, w3_provider, log_filter), address, from_block, to_block, **kwargs)
+
+# Stream the given events of a contract as compact RawEvent tuples in block order
+def iter_raw_events(w3_provider, address, event_abis, from_block, to_block, decode_data=False, **kwargs):
+    for log in iter_raw_logs(w3_provider, address, event_abis.keys(), from_block, to_block, **kwargs):
+        yield decode_raw_log(log, event_abis, decode_data)
+
+def decode_raw_log(log, event_abis, decode_data=False):
+    topics = [_to_bytes(topic) for topic in log["topics"]]
+    event_abi = event_abis["0x" + topics[0].hex()]
+
+    args = []
+    indexed_topics = iter(topics[1:])
+    for argument in event_abi["inputs"]:
+        args.append(_decode_topic(argument["type"], next(indexed_topics)) if argument["indexed"] else None)
+
+    if decode_data:
+        data_arguments = [index for index, argument in enumerate(event_abi["inputs"]) if not argument["indexed"]]
+        if len(data_arguments) > 0:
+            values = decode_abi([event_abi["inputs"][index]["type"] for index in data_arguments], _to_bytes(log["data"]))
+            for index, value in zip(data_arguments, values):
+                args[index] = value
+
+    return RawEvent(
+        event_abi["name"],
+        _to_int(log["blockNumber"]),
+        _to_int(log["logIndex"]),
+        "0x" + _to_bytes(log["transactionHash"]).hex(),
+        tuple(args),
+    )
+
+def _to_bytes(value):
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return bytes(value)
+
+def _to_int(value):
+    return int(value, 16) if isinstance(value, str) else value
+
+def _decode_topic(abi_type, topic):
+    # Dynamic types are indexed by their hash, which is returned as is
+    if abi_type.startswith("uint"):
+        return int.from_bytes(topic, "big")
+    if abi_type.startswith("int"):
+        return int.from_bytes(topic, "big", signed=True)
+    if abi_type == "address":
+        return Web3.toChecksumAddress(topic[-20:])
+    if abi_type == "bool":
+        return topic[-1] != 0
+    return topic
+
+# Fetch logs in block order over concurrent, non-overlapping block ranges
+# The block window grows while responses stay small and shrinks when the provider rejects a range
+def _iter_ranges(get_logs, name, from_block, to_block, max_workers=DEFAULT_MAX_WORKERS, initial_window=100000, min_window=1, max_window=1000000, target_results=2000):
+
+    window = initial_window
+    next_block = from_block
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Ranges are queued in block order so results can be yielded as soon as the oldest range completes
+        pending = collections.deque()
+        while pending or next_block <= to_block:
+            while len(pending) < max_workers and next_block <= to_block:
+                range_end = min(to_block, next_block + window - 1)
+                pending.append((next_block, range_end, executor.submit(get_logs, next_block, range_end)))
+                next_block = range_end + 1
+
+            range_start, range_end, future = pending.popleft()
+            try:
+                events = future.result()
+            except (ValueError, Timeout) as err:
+                if not _is_range_error(err) or range_start == range_end:
+                    raise
+
+                # Split the failed range and retry both halves before any later range
+                split_block = _get_split_block(err, range_start, range_end)
+                window = max(min_window, split_block - range_start + 1)
+                logging.warning(f"Could not fetch {name} logs from block {range_start} to {range_end}, reducing window to {window} blocks")
+
+                lower_half = (range_start, split_block, executor.submit(get_logs, range_start, split_block))
+                upper_half = (split_block + 1, range_end, executor.submit(get_logs, split_block + 1, range_end))
+                pending.extendleft([upper_half, lower_half])
+                continue
+
+            if len(events) < target_results and range_end - range_start + 1 >= window:
+                window = min(max_window, window * 2)
+
+            yield from events
+
+def _get_raw_logs(w3_provider, log_filter, from_block, to_block):
+    return w3_provider.eth.get_logs({**log_filter, "fromBlock": from_block, "toBlock": to_block})
+
+def _get_error_message(err):
+    if len(err.args) > 0 and isinstance(err.args[0], dict) and "message" in err.args[0]:
+        return err.args[0]["message"]
+    return str(err)
+
+def _is_range_error(err):
+    if isinstance(err, Timeout):
+        return True
+    message = _get_error_message(err).lower()
+    return any(range_error in message for range_error in RANGE_ERROR_MESSAGES)
+
+def _get_split_block(err, range_start, range_end):
+    # Prefer the range suggested by the provider if it is a valid split of the failed range
+    if not isinstance(err, Timeout):
+        suggested_range = SUGGESTED_RANGE.search(_get_error_message(err))
+        if suggested_range:
+            suggested_end = int(suggested_range.group(2), 16)
+            if range_start <= suggested_end < range_end:
+                return suggested_end
+    return range_start + (range_end - range_start) // 2
@@ -0,0 +1,135 @@
+import json
+import logging
+import sqlite3
+
+from util.event_fetcher import DEFAULT_MAX_WORKERS
+from util.event_fetcher import get_event_abis
+from util.event_fetcher import iter_raw_events
+
+DEFAULT_EVENT_INDEX_PATH = "event_index.db"
+
+# All RngWitnet events which are kept in the index
+RNG_WITNET_EVENTS = [
+    "RngRequested",
+    "RandomNumberCompleted",
+    "RandomNumberFailed",
+    "RequesterAdded",
+    "RequesterRemoved",
+    "MaxFeeSet",
+]
+
+# Number of blocks below the last scanned block which are rescanned on every sync to handle chain reorganizations
+REORG_DEPTH = 12
+
+def get_event_index_path(network_config):
+    if "event_index_path" in network_config and network_config["event_index_path"] != "":
+        return network_config["event_index_path"]
+    return DEFAULT_EVENT_INDEX_PATH
+
+def open_event_index(path=DEFAULT_EVENT_INDEX_PATH):
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                chain_id INTEGER NOT NULL,
+                address TEXT NOT NULL,
+                first_block INTEGER NOT NULL,
+                last_block INTEGER NOT NULL,
+                PRIMARY KEY (chain_id, address)
+            )
+        """)
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                chain_id INTEGER NOT NULL,
+                address TEXT NOT NULL,
+                block_number INTEGER NOT NULL,
+                log_index INTEGER NOT NULL,
+                transaction_hash TEXT NOT NULL,
+                event TEXT NOT NULL,
+                request_id INTEGER,
+                args TEXT NOT NULL,
+                PRIMARY KEY (chain_id, address, block_number, log_index)
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS events_by_name ON events (chain_id, address, event)")
+    return connection
+
+# Scan only the blocks which were not indexed before, rewinding a few blocks to drop events from reorganized blocks
+# The deploy transaction is only fetched the first time a contract is indexed
+def sync_event_index(connection, chain_id, w3_provider, contract, deploy_transaction, event_names=RNG_WITNET_EVENTS, reorg_depth=REORG_DEPTH, max_workers=DEFAULT_MAX_WORKERS):
+    address = contract.address.lower()
+
+    checkpoint = connection.execute(
+        "SELECT first_block, last_block FROM checkpoints WHERE chain_id = ? AND address = ?",
+        (chain_id, address),
+    ).fetchone()
+    if checkpoint is None:
+        first_block = w3_provider.eth.get_transaction(deploy_transaction)["blockNumber"]
+        from_block = first_block
+    else:
+        first_block, last_block = checkpoint
+        from_block = max(first_block, last_block - reorg_depth + 1)
+
+    to_block = w3_provider.eth.blockNumber
+    if from_block > to_block:
+        logging.info(f"Event index for {address} is up to date at block {to_block}")
+        return
+
+    logging.info(f"Updating event index for {address} from block {from_block} to block {to_block}")
+
+    # All events are fetched with one eth_getLogs per block range and decoded from their topics and data directly
+    event_abis = get_event_abis(contract.abi, event_names)
+    argument_names = {
+        event_abi["name"]: [argument["name"] for argument in event_abi["inputs"]]
+        for event_abi in event_abis.values()
+    }
+
+    rows = []
+    for event in iter_raw_events(w3_provider, contract.address, event_abis, from_block, to_block, decode_data=True, max_workers=max_workers):
+        args = dict(zip(argument_names[event.event_name], event.args))
+        rows.append((
+            chain_id,
+            address,
+            event.block_number,
+            event.log_index,
+            event.transaction_hash,
+            event.event_name,
+            args.get("requestId"),
+            json.dumps(args),
+        ))
+
+    # Replace the rescanned blocks and move the checkpoint atomically
+    with connection:
+        connection.execute(
+            "DELETE FROM events WHERE chain_id = ? AND address = ? AND block_number >= ?",
+            (chain_id, address, from_block),
+        )
+        connection.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        connection.execute(
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?)",
+            (chain_id, address, first_block, to_block),
+        )
+
+    logging.info(f"Indexed {len(rows)} events for {address}")
+
+def get_indexed_events(connection, chain_id, address, event_name):
+    rows = connection.execute(
+        "SELECT block_number, log_index, transaction_hash, args FROM events WHERE chain_id = ? AND address = ? AND event = ? ORDER BY block_number, log_index",
+        (chain_id, address.lower(), event_name),
+    ).fetchall()
+    return [
+        {
+            "blockNumber": block_number,
+            "logIndex": log_index,
+            "transactionHash": transaction_hash,
+            "args": json.loads(args),
+        }
+        for block_number, log_index, transaction_hash, args in rows
+    ]
+
+def get_indexed_request_ids(connection, chain_id, address, event_name):
+    rows = connection.execute(
+        "SELECT DISTINCT request_id FROM events WHERE chain_id = ? AND address = ? AND event = ?",
+        (chain_id, address.lower(), event_name),
+    ).fetchall()
+    return set(request_id for request_id, in rows)
@@ -0,0 +1,232 @@
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+
+from eth_utils import function_abi_to_4byte_selector
+
+from web3 import Web3
+
+from util.contract_registry import get_chain_id
+
+from util.helper_functions import to_wei
+
+# Number of past blocks whose priority fees are sampled
+FEE_HISTORY_BLOCKS = 20
+
+# Priority fee percentile paid to be included within a target number of blocks
+INCLUSION_PERCENTILES = {
+    1: 90,
+    2: 75,
+    3: 60,
+    5: 40,
+    10: 20,
+}
+
+DEFAULT_TARGET_BLOCKS = 3
+
+# Fees are reused for this many seconds so transactions sent back-to-back do not each query the fee history
+FEE_CACHE_SECONDS = 5
+
+# Priority fee used when none of the sampled blocks contained transactions
+DEFAULT_PRIORITY_FEE = to_wei("1 gwei")
+
+DEFAULT_GAS_LIMIT_CACHE_PATH = "gas_limits.json"
+
+# Headroom added on top of the highest gas usage seen for a function
+GAS_LIMIT_MARGIN = 1.25
+
+# Number of receipts per function from which its gas limit is derived
+GAS_LIMIT_SAMPLES = 20
+
+# Gas limits used until a receipt has been seen for a function, since the web3 estimation is off for these functions
+DEFAULT_GAS_LIMITS = {
+    Web3.keccak(text="startAward()")[:4].hex(): 400000,
+    Web3.keccak(text="requestRandomNumber()")[:4].hex(): 300000,
+}
+
+# Functions taking an array of which the gas usage grows with its length, these are always estimated by the node
+VARIABLE_GAS_SELECTORS = {
+    Web3.keccak(text="fetchRandomnessBatch(uint32[])")[:4].hex(),
+    Web3.keccak(text="addAllowedRequesters(address[])")[:4].hex(),
+    Web3.keccak(text="removeAllowedRequesters(address[])")[:4].hex(),
+}
+
+_gas_limit_caches_lock = threading.Lock()
+_gas_limit_caches = {}
+
+# Gas limit caches are shared per path, so networks which are run in one process do not overwrite each other's cache file
+def get_gas_limit_cache(path):
+    with _gas_limit_caches_lock:
+        if path not in _gas_limit_caches:
+            _gas_limit_caches[path] = GasLimitCache(path)
+        return _gas_limit_caches[path]
+
+def get_fee_estimator(network_config, w3_provider):
+    target_blocks = DEFAULT_TARGET_BLOCKS
+    if "fee_target_blocks" in network_config and network_config["fee_target_blocks"] != "":
+        target_blocks = int(network_config["fee_target_blocks"])
+
+    gas_limit_cache_path = DEFAULT_GAS_LIMIT_CACHE_PATH
+    if "gas_limit_cache_path" in network_config and network_config["gas_limit_cache_path"] != "":
+        gas_limit_cache_path = network_config["gas_limit_cache_path"]
+
+    # The configured fees are used as upper bounds for the estimated fees
+    max_priority_fee, max_fee = None, None
+    if network_config["priority_fee"] != "" and network_config["max_fee"] != "":
+        max_priority_fee = to_wei(network_config["priority_fee"])
+        max_fee = to_wei(network_config["max_fee"])
+
+    return FeeEstimator(
+        w3_provider,
+        target_blocks=target_blocks,
+        max_priority_fee=max_priority_fee,
+        max_fee=max_fee,
+        gas_limit_cache=get_gas_limit_cache(gas_limit_cache_path),
+    )
+
+def get_inclusion_percentile(target_blocks):
+    # Use the percentile of the closest target which is not slower than the requested one
+    eligible_targets = [blocks for blocks in INCLUSION_PERCENTILES if blocks <= target_blocks]
+    return INCLUSION_PERCENTILES[max(eligible_targets) if eligible_targets else min(INCLUSION_PERCENTILES)]
+
+def get_function_selector(contract_function):
+    # Contract constructors carry the ABI of the whole contract and have no selector
+    if not isinstance(contract_function.abi, dict):
+        return None
+    return "0x" + function_abi_to_4byte_selector(contract_function.abi).hex()
+
+def get_selector(transaction_data):
+    if isinstance(transaction_data, bytes):
+        transaction_data = "0x" + transaction_data.hex()
+    return transaction_data[:10].lower() if transaction_data and len(transaction_data) >= 10 else None
+
+# Derives EIP-1559 fees from eth_feeHistory and gas limits from the receipts of earlier transactions
+# The priority fee is the median of a reward percentile over recent blocks, the max fee covers the base fee rising in
+# every block until the target inclusion latency is reached. Without fee history the configured fees are used as is.
+class FeeEstimator:
+    def __init__(self, w3_provider, target_blocks=DEFAULT_TARGET_BLOCKS, max_priority_fee=None, max_fee=None, gas_limit_cache=None, fee_history_blocks=FEE_HISTORY_BLOCKS):
+        self.w3_provider = w3_provider
+        self.target_blocks = target_blocks
+        self.max_priority_fee = max_priority_fee
+        self.max_fee = max_fee
+        self.gas_limit_cache = gas_limit_cache
+        self.fee_history_blocks = fee_history_blocks
+
+        self.lock = threading.Lock()
+        self.cached_fees = None
+        self.cached_at = None
+
+    def get_fees(self):
+        with self.lock:
+            if self.cached_fees is None or time.monotonic() - self.cached_at > FEE_CACHE_SECONDS:
+                self.cached_fees = self._estimate_fees()
+                self.cached_at = time.monotonic()
+            return dict(self.cached_fees)
+
+    # Fill in the fees and the gas limit which are not set in the transaction parameters
+    def get_transaction_parameters(self, contract_function, transaction_parameters):
+        transaction_parameters = dict(transaction_parameters)
+        if "gasPrice" not in transaction_parameters and "maxFeePerGas" not in transaction_parameters:
+            transaction_parameters.update(self.get_fees())
+        selector = get_function_selector(contract_function)
+        if "gas" not in transaction_parameters and selector is not None:
+            gas_limit = self.get_gas_limit(contract_function.address, selector)
+            if gas_limit is not None:
+                transaction_parameters["gas"] = gas_limit
+        return transaction_parameters
+
+    # Returns None if the gas limit should be estimated by the node
+    def get_gas_limit(self, to, selector):
+        if self.gas_limit_cache is None or selector in VARIABLE_GAS_SELECTORS:
+            return None
+        return self.gas_limit_cache.get_gas_limit(get_chain_id(self.w3_provider), to, selector)
+
+    def record_gas_used(self, to, selector, gas_used):
+        if self.gas_limit_cache is not None and selector is not None and selector not in VARIABLE_GAS_SELECTORS:
+            self.gas_limit_cache.record(get_chain_id(self.w3_provider), to, selector, gas_used)
+
+    def record_receipt(self, transaction, receipt):
+        # Deployments have no selector
+        if not transaction.get("to"):
+            return
+        selector = get_selector(transaction.get("data"))
+        if receipt["status"] == 1:
+            self.record_gas_used(transaction["to"], selector, receipt["gasUsed"])
+        elif "gas" in transaction and receipt["gasUsed"] >= transaction["gas"]:
+            # Ran out of gas, so the whole limit is learned as used and the next limit is raised by the margin
+            logging.warning(f"Transaction calling {selector} ran out of gas with a limit of {transaction['gas']}, raising its gas limit")
+            self.record_gas_used(transaction["to"], selector, receipt["gasUsed"])
+        # Other reverted transactions stop early and would lower the learned gas limit
+
+    def _estimate_fees(self):
+        percentile = get_inclusion_percentile(self.target_blocks)
+        try:
+            fee_history = self.w3_provider.eth.fee_history(self.fee_history_blocks, "latest", [percentile])
+        except ValueError as err:
+            logging.warning(f"Could not fetch the fee history ({err}), using the configured fees")
+            return self._get_configured_fees()
+
+        # Blocks without transactions report a zero reward and are skipped
+        rewards = [
+            reward[0]
+            for reward, gas_used_ratio in zip(fee_history["reward"], fee_history["gasUsedRatio"])
+            if gas_used_ratio > 0
+        ]
+        priority_fee = int(statistics.median(rewards)) if len(rewards) > 0 else DEFAULT_PRIORITY_FEE
+
+        # The last entry is the base fee of the next block, which can rise by 12.5% in every following block
+        next_base_fee = fee_history["baseFeePerGas"][-1]
+        max_fee = next_base_fee * 9 ** self.target_blocks // 8 ** self.target_blocks + priority_fee
+
+        if self.max_priority_fee is not None:
+            priority_fee = min(priority_fee, self.max_priority_fee)
+        if self.max_fee is not None:
+            max_fee = min(max_fee, self.max_fee)
+        priority_fee = min(priority_fee, max_fee)
+
+        logging.info(f"Estimated fees: priority fee {priority_fee / 1E9:.3f} gwei, max fee {max_fee / 1E9:.3f} gwei")
+
+        return {"maxPriorityFeePerGas": priority_fee, "maxFeePerGas": max_fee}
+
+    def _get_configured_fees(self):
+        if self.max_priority_fee is None or self.max_fee is None:
+            return {}
+        return {"maxPriorityFeePerGas": self.max_priority_fee, "maxFeePerGas": self.max_fee}
+
+# Gas used per chain, contract and function selector, persisted as a JSON file so it is kept between runs
+# The same function can use a different amount of gas per contract, e.g. completeAward of prize strategies with more winners
+class GasLimitCache:
+    def __init__(self, path=None, margin=GAS_LIMIT_MARGIN, samples=GAS_LIMIT_SAMPLES):
+        self.path = path
+        self.margin = margin
+        self.samples = samples
+
+        self.lock = threading.Lock()
+        self.gas_used = {}
+        if path is not None and os.path.exists(path):
+            with open(path) as cache_file:
+                self.gas_used = json.load(cache_file)
+            # Caches written before the gas used was kept per contract store the samples directly per selector, these are relearned
+            for chain_gas_used in self.gas_used.values():
+                for key in [key for key, value in chain_gas_used.items() if isinstance(value, list)]:
+                    del chain_gas_used[key]
+
+    def get_gas_limit(self, chain_id, to, selector):
+        with self.lock:
+            gas_used = self.gas_used.get(str(chain_id), {}).get(Web3.toChecksumAddress(to), {}).get(selector)
+        if not gas_used:
+            return DEFAULT_GAS_LIMITS.get(selector)
+        return int(max(gas_used) * self.margin)
+
+    def record(self, chain_id, to, selector, gas_used):
+        with self.lock:
+            contract_gas_used = self.gas_used.setdefault(str(chain_id), {}).setdefault(Web3.toChecksumAddress(to), {})
+            selector_gas_used = contract_gas_used.setdefault(selector, [])
+            selector_gas_used.append(gas_used)
+            del selector_gas_used[:-self.samples]
+            if self.path is not None:
+                with open(self.path, "w") as cache_file:
+                    json.dump(self.gas_used, cache_file, indent=4)
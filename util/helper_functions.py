@@ -1,70 +1,72 @@
 import logging
 import os
-import time
+
+from decimal import Decimal
 
 from web3 import Web3
 
 from web3.middleware import geth_poa_middleware
 
-# This function is tailored to fetch iterative events from Alchemy and won't work with another node API provider such as Infura
-def get_events_alchemy(event, from_block, to_block):
-    logging.info(f"Fetching {event.event_name} events from block {from_block} to block {to_block}")
-    event_filter = event.createFilter(fromBlock=from_block, toBlock=to_block)
-    try:
-        return event_filter.get_all_entries()
-    except ValueError as err:
-        if "message" in err.args[0] and "Log response size exceeded." in err.args[0]["message"]:
-            logging.warning(f"Could not fetch all {event.event_name} events at once, falling back to iterative event fetching")
-            return _get_events_iteratively_alchemy(event, from_block, to_block)
-        else:
-            raise
+from util.provider import FailoverHTTPProvider
+
+from util.rpc_metrics import RPC_METRICS
+
+# Convert a configured amount such as "0.5 gwei" or "0.01 ether" to wei
+def to_wei(value):
+    if isinstance(value, int):
+        return value
+    amount, unit = value.split() if " " in value.strip() else (value, "wei")
+    return Web3.toWei(Decimal(amount), unit)
+
+# Endpoint templates and the environment variables holding their API keys per network and node API provider
+PROVIDER_ENDPOINTS = {
+    "ethereum": {
+        "infura": ("https://mainnet.infura.io/v3/{}", "WEB3_ETHEREUM_INFURA"),
+        "alchemy": ("https://eth-mainnet.alchemyapi.io/v2/{}", "WEB3_ETHEREUM_ALCHEMY"),
+    },
+    "goerli": {
+        "infura": ("https://goerli.infura.io/v3/{}", "WEB3_GOERLI_INFURA"),
+        "alchemy": ("https://eth-goerli.g.alchemy.com/v2/{}", "WEB3_GOERLI_ALCHEMY"),
+    },
+    "polygon": {
+        "infura": ("https://polygon-mainnet.infura.io/v3/{}", "WEB3_POLYGON_INFURA"),
+        "alchemy": ("https://polygon-mainnet.g.alchemy.com/v2/{}", "WEB3_POLYGON_ALCHEMY"),
+    },
+}
 
-# This function is tailored to fetch iterative events from Alchemy and won't work with another node API provider
-def _get_events_iteratively_alchemy(event, from_block, to_block, blocks_per_call=100000):
-    logging.info(f"Fetching {event.event_name} events iteratively from {from_block} to {to_block} limited to {blocks_per_call} blocks")
-    events = []
-    for block in range(from_block, to_block, blocks_per_call):
-        fetch_until = min(to_block, block + blocks_per_call)
-        logging.info(f"Fetching {event.event_name} events for block {block} to {fetch_until} (fetching until block {to_block})")
-        event_filter = event.createFilter(fromBlock=block, toBlock=fetch_until)
-        try:
-            events.extend(event_filter.get_all_entries())
-        except ValueError as err:
-            if "message" in err.args[0] and "Log response size exceeded." in err.args[0]["message"]:
-                logging.warning(f"Could not fetch all events at once, falling back to iterative event fetching")
-                events.extend(get_events_iteratively(event, block, to_block, blocks_per_call=int(blocks_per_call / 2)))
-                break
-            else:
-                raise
-        time.sleep(0.2)
-    return events
+# Networks which need the proof-of-authority middleware to parse block headers
+POA_NETWORKS = ["polygon"]
 
-def setup_web3_provider(network, provider):
+def get_provider_options(network_config):
+    provider_options = {}
+    if "provider_timeout" in network_config and network_config["provider_timeout"] != "":
+        provider_options["timeout"] = float(network_config["provider_timeout"])
+    if "provider_retries" in network_config and network_config["provider_retries"] != "":
+        provider_options["retries"] = int(network_config["provider_retries"])
+    if "provider_hedge_delay" in network_config and network_config["provider_hedge_delay"] != "":
+        provider_options["hedge_delay"] = float(network_config["provider_hedge_delay"])
+    return provider_options
+
+def get_endpoint_uri(network, provider):
+    # Self-hosted nodes are configured with their full URL
+    if provider.startswith("http://") or provider.startswith("https://"):
+        return provider
+    assert network in PROVIDER_ENDPOINTS and provider in PROVIDER_ENDPOINTS[network], f"Unknown provider {provider} for {network}"
+    endpoint_template, api_key_variable = PROVIDER_ENDPOINTS[network][provider]
+    return endpoint_template.format(os.getenv(api_key_variable))
+
+# The provider can be a single node API provider or an ordered list of providers to fail over between
+# The RPC calls are recorded in the given metrics, which are shared by all providers by default
+def setup_web3_provider(network, provider, rpc_metrics=RPC_METRICS, **provider_options):
     logging.info(f"Setting up web3 provider for {network}")
 
-    w3_provider = None
-    if network == "ethereum":
-        if provider == "infura":
-            WEB3_ETHEREUM_INFURA = os.getenv("WEB3_ETHEREUM_INFURA")
-            w3_provider = Web3(Web3.HTTPProvider(f"https://mainnet.infura.io/v3/{WEB3_ETHEREUM_INFURA}"))
-        elif provider == "alchemy":
-            WEB3_ETHEREUM_ALCHEMY = os.getenv("WEB3_ETHEREUM_ALCHEMY")
-            w3_provider = Web3(Web3.HTTPProvider(f"https://eth-mainnet.alchemyapi.io/v2/{WEB3_ETHEREUM_ALCHEMY}"))
-    elif network == "goerli":
-        if provider == "infura":
-            WEB3_GOERLI_INFURA = os.getenv("WEB3_GOERLI_INFURA")
-            w3_provider = Web3(Web3.HTTPProvider(f"https://goerli.infura.io/v3/{WEB3_GOERLI_INFURA}"))
-        elif provider == "alchemy":
-            WEB3_GOERLI_ALCHEMY = os.getenv("WEB3_GOERLI_ALCHEMY")
-            w3_provider = Web3(Web3.HTTPProvider(f"https://eth-goerli.g.alchemy.com/v2/{WEB3_GOERLI_ALCHEMY}"))
-    elif network == "polygon":
-        if provider == "infura":
-            WEB3_POLYGON_INFURA = os.getenv("WEB3_POLYGON_INFURA")
-            w3_provider = Web3(Web3.HTTPProvider(f"https://polygon-mainnet.infura.io/v3/{WEB3_POLYGON_INFURA}"))
-        elif provider == "alchemy":
-            WEB3_POLYGON_ALCHEMY = os.getenv("WEB3_POLYGON_ALCHEMY")
-            w3_provider = Web3(Web3.HTTPProvider(f"https://polygon-mainnet.g.alchemy.com/v2/{WEB3_POLYGON_ALCHEMY}"))
+    providers = provider if isinstance(provider, list) else [provider]
+    endpoint_uris = [get_endpoint_uri(network, provider) for provider in providers]
+    assert len(endpoint_uris) > 0, "Could not configure Web3 provider"
+
+    w3_provider = Web3(FailoverHTTPProvider(endpoint_uris, **provider_options))
+    if network in POA_NETWORKS:
         w3_provider.middleware_onion.inject(geth_poa_middleware, layer=0)
+    w3_provider.middleware_onion.add(rpc_metrics.middleware, "rpc_metrics")
 
-    assert w3_provider, "Could not configure Web3 provider"
     return w3_provider
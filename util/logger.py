@@ -1,18 +1,108 @@
+import atexit
+import contextlib
+import copy
+import json
 import logging
+import logging.handlers
+import queue
 import sys
 import time
 
-def setup_stdout_logger():
+# Attributes every log record has, anything else was passed through the extra argument of a log call
+LOG_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+# Formats log records as a single JSON object per line, extra fields such as the ones of timing spans are included as is
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "thread": record.threadName,
+            "message": record.getMessage().strip(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in LOG_RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Exceptions of queued records were formatted by _RecordQueueHandler
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+# QueueHandler formats records before queueing them, which merges the exception into the message and drops exc_info
+# This handler only resolves the message arguments and the exception to text and leaves the formatting to the listener
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def get_log_format(network_config):
+    if "log_format" in network_config and network_config["log_format"] != "":
+        return network_config["log_format"]
+    return "text"
+
+def get_log_queue(network_config):
+    if "log_queue" in network_config and network_config["log_queue"] != "":
+        log_queue = network_config["log_queue"]
+        # Also accept the value as a string, e.g. when it is templated from an environment variable
+        if isinstance(log_queue, str):
+            return log_queue.strip().lower() in ("true", "1", "yes")
+        return bool(log_queue)
+    return False
+
+def get_logger_options(network_config):
+    return {
+        "log_format": get_log_format(network_config),
+        "log_queue": get_log_queue(network_config),
+    }
+
+# Configure the root logger to write to stdout, either as text or as JSON lines
+# With log_queue, records are put on a queue and formatted and written by a listener thread so logging never blocks on I/O
+# Returns the listener, which is stopped and flushed when the process exits
+def setup_stdout_logger(log_format="text", log_queue=False):
     # Configure logger
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
     # Add header formatting of the log message
     logging.Formatter.converter = time.gmtime
-    formatter = logging.Formatter("[%(levelname)-8s] [%(asctime)s] %(message)s", datefmt="%Y/%m/%d %H:%M:%S")
+    if log_format == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("[%(levelname)-8s] [%(asctime)s] %(message)s", datefmt="%Y/%m/%d %H:%M:%S")
 
     # Add console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
     console_handler.setLevel(logging.INFO)
-    logger.addHandler(console_handler)
+
+    if not log_queue:
+        logger.addHandler(console_handler)
+        return None
+
+    log_records = queue.SimpleQueue()
+    logger.addHandler(_RecordQueueHandler(log_records))
+    listener = logging.handlers.QueueListener(log_records, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+# Log how long an operation took as a timing span with the given fields
+def log_duration(span, duration, level=logging.INFO, **fields):
+    logging.log(level, f"{span} took {duration:.3f}s", extra={"span": span, "duration": round(duration, 6), **fields})
+
+# Time the enclosed block and log it as a timing span
+# Fields can be added to the yielded dictionary inside the block, a block which raises is logged with the exception type
+@contextlib.contextmanager
+def log_span(span, **fields):
+    start_time = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as err:
+        log_duration(span, time.perf_counter() - start_time, level=logging.ERROR, error=type(err).__name__, **fields)
+        raise
+    log_duration(span, time.perf_counter() - start_time, **fields)
@@ -0,0 +1,83 @@
+import logging
+
+from eth_abi import decode_abi
+
+from web3._utils.abi import get_abi_output_types
+from web3._utils.contracts import find_matching_fn_abi
+
+from util.contract_registry import get_contract
+
+# Multicall3 is deployed at the same address on Ethereum, Polygon, Goerli and most other EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# Number of calls aggregated in a single eth_call, kept well below the gas limit providers apply to eth_call
+MULTICALL_BATCH_SIZE = 500
+
+def get_multicall_address(network_config):
+    if "multicall_address" in network_config and network_config["multicall_address"] != "":
+        return network_config["multicall_address"]
+    return MULTICALL3_ADDRESS
+
+# Aggregate a list of (web3 contract, function name, arguments) tuples into as few eth_calls as possible
+# The result is a list with the decoded return value of every call, or None if that call reverted
+def multicall(w3_provider, calls, multicall_address=MULTICALL3_ADDRESS, batch_size=MULTICALL_BATCH_SIZE, block_identifier="latest"):
+    multicall_contract = get_contract(w3_provider, "Multicall3", multicall_address)
+
+    results = []
+    for batch_start in range(0, len(calls), batch_size):
+        batch = calls[batch_start:batch_start + batch_size]
+        logging.info(f"Aggregating calls {batch_start} to {batch_start + len(batch)} of {len(calls)} in one eth_call")
+
+        aggregated_calls = [
+            (contract.address, True, contract.encodeABI(fn_name=function_name, args=arguments))
+            for contract, function_name, arguments in batch
+        ]
+        responses = multicall_contract.functions.aggregate3(aggregated_calls).call(block_identifier=block_identifier)
+
+        for (contract, function_name, arguments), (success, return_data) in zip(batch, responses):
+            if success and len(return_data) > 0:
+                results.append(_decode_return_data(contract, function_name, arguments, return_data))
+            else:
+                results.append(None)
+
+    return results
+
+# Call the same function on one contract for every set of arguments in a single batch
+def batch_call(w3_provider, contract, function_name, arguments_list, multicall_address=MULTICALL3_ADDRESS):
+    return multicall(
+        w3_provider,
+        [(contract, function_name, arguments) for arguments in arguments_list],
+        multicall_address,
+    )
+
+# Resolve isRequestComplete and isRngFetchable (and optionally randomNumber) for all request ids at once
+def get_request_states(w3_provider, rng_witnet, request_ids, multicall_address=MULTICALL3_ADDRESS, include_random_number=False):
+    request_ids = list(request_ids)
+
+    function_names = ["isRequestComplete", "isRngFetchable"]
+    if include_random_number:
+        function_names.append("randomNumber")
+
+    calls = [(rng_witnet, function_name, [request_id]) for request_id in request_ids for function_name in function_names]
+    results = multicall(w3_provider, calls, multicall_address)
+
+    request_states = {}
+    for index, request_id in enumerate(request_ids):
+        request_results = results[index * len(function_names):(index + 1) * len(function_names)]
+        request_states[request_id] = {
+            "complete": request_results[0],
+            "fetchable": request_results[1],
+        }
+        if include_random_number:
+            request_states[request_id]["random_number"] = request_results[2]
+
+    return request_states
+
+def _decode_return_data(contract, function_name, arguments, return_data):
+    # Overloaded functions such as getRequestFee are resolved by their arguments
+    function_abi = find_matching_fn_abi(contract.abi, contract.web3.codec, function_name, arguments)
+    decoded = decode_abi(get_abi_output_types(function_abi), return_data)
+    # Unwrap functions with a single return value
+    if len(decoded) == 1:
+        return decoded[0]
+    return decoded
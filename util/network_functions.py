@@ -1,4 +1,4 @@
-from brownie import accounts, config, network
+from brownie import accounts, config, network, web3
 
 LOCAL_BLOCKCHAINS = [
     "ethereum-fork-infura",
@@ -37,3 +37,14 @@ def get_account(index=0):
         else:
             accounts.add(config["wallets"]["from_key_mainnet"])
         return accounts[0]
+
+# Deploy a contract through a transaction sender, so a stuck deployment is replaced, and publish its source
+def deploy_and_publish(transaction_sender, contract_container, *arguments):
+    contract_factory = web3.eth.contract(abi=contract_container.abi, bytecode=contract_container.bytecode)
+    transaction_hash = transaction_sender.send(contract_factory.constructor(*arguments), {})
+    receipt = transaction_sender.wait_for_receipt(transaction_hash)
+    assert receipt["status"] == 1, f"Deployment transaction {transaction_hash} reverted"
+
+    contract = contract_container.at(receipt["contractAddress"])
+    contract_container.publish_source(contract)
+    return contract
@@ -0,0 +1,138 @@
+import logging
+import random
+import time
+
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from web3.providers import JSONBaseProvider
+
+# HTTP status codes for which the same endpoint is retried after a backoff
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Read-only methods which can be sent to several endpoints at once without side effects
+HEDGED_METHODS = {
+    "eth_blockNumber",
+    "eth_call",
+    "eth_chainId",
+    "eth_estimateGas",
+    "eth_feeHistory",
+    "eth_gasPrice",
+    "eth_getBalance",
+    "eth_getBlockByNumber",
+    "eth_getCode",
+    "eth_getLogs",
+    "eth_getTransactionByHash",
+    "eth_getTransactionCount",
+    "eth_getTransactionReceipt",
+    "eth_maxPriorityFeePerGas",
+    "net_version",
+}
+
+class RetryableHTTPError(requests.exceptions.HTTPError):
+    pass
+
+# JSON-RPC provider for an ordered list of endpoints sharing one pooled keep-alive session
+# Every endpoint is retried with a jittered exponential backoff on rate limiting and server errors before failing over
+# to the next endpoint. If a hedge delay is set, reads which did not return within that delay are also sent to the
+# next endpoint and the first successful response is used.
+class FailoverHTTPProvider(JSONBaseProvider):
+    def __init__(self, endpoint_uris, timeout=10, retries=3, backoff=0.5, max_backoff=8, hedge_delay=None, pool_size=16):
+        super().__init__()
+        assert len(endpoint_uris) > 0, "At least one endpoint is required"
+        self.endpoint_uris = endpoint_uris
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_delay = hedge_delay
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(endpoint_uris), pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        self.executor = ThreadPoolExecutor(max_workers=pool_size) if hedge_delay is not None else None
+
+    def __str__(self):
+        return f"Failover HTTP connection {self.endpoint_uris}"
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        if self.executor is not None and method in HEDGED_METHODS and len(self.endpoint_uris) > 1:
+            return self._hedged_request(method, request_data)
+        return self._failover_request(method, request_data)
+
+    def isConnected(self):
+        try:
+            response = self.make_request("web3_clientVersion", [])
+        except (requests.exceptions.RequestException, OSError):
+            return False
+        return "error" not in response
+
+    def _failover_request(self, method, request_data):
+        for index, endpoint_uri in enumerate(self.endpoint_uris):
+            try:
+                return self._post(endpoint_uri, request_data)
+            except requests.exceptions.RequestException as err:
+                if index == len(self.endpoint_uris) - 1:
+                    raise
+                logging.warning(f"Request {method} to endpoint {index} failed ({err}), failing over to the next endpoint")
+
+    def _hedged_request(self, method, request_data):
+        endpoint_uris = iter(self.endpoint_uris)
+        pending = set()
+        last_error = None
+
+        def hedge():
+            endpoint_uri = next(endpoint_uris, None)
+            if endpoint_uri is not None:
+                pending.add(self.executor.submit(self._post, endpoint_uri, request_data))
+
+        hedge()
+        while pending:
+            done, not_done = wait(pending, timeout=self.hedge_delay, return_when=FIRST_COMPLETED)
+            pending.difference_update(done)
+            for future in done:
+                if future.exception() is None:
+                    _cancel(not_done)
+                    return future.result()
+                last_error = future.exception()
+                logging.warning(f"Request {method} failed ({last_error}), failing over to the next endpoint")
+            # Send the request to the next endpoint when no endpoint answered within the hedge delay or one failed
+            hedge()
+
+        raise last_error
+
+    def _post(self, endpoint_uri, request_data):
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.post(endpoint_uri, data=request_data, timeout=self.timeout)
+                if response.status_code in RETRY_STATUS_CODES:
+                    raise RetryableHTTPError(f"{response.status_code} response from endpoint", response=response)
+                response.raise_for_status()
+                return self.decode_rpc_response(response.content)
+            except (RetryableHTTPError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self._get_backoff(attempt, err))
+
+    def _get_backoff(self, attempt, err):
+        # Respect the delay requested by a rate limiting endpoint
+        response = getattr(err, "response", None)
+        if response is not None and "Retry-After" in response.headers:
+            try:
+                return min(self.max_backoff, float(response.headers["Retry-After"]))
+            except ValueError:
+                pass
+        return min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+def _cancel(futures):
+    for future in futures:
+        future.cancel()
@@ -0,0 +1,118 @@
+import fractions
+import logging
+
+from util.contract_registry import get_contract
+
+from util.multicall import MULTICALL3_ADDRESS
+from util.multicall import multicall
+
+# Gas prices in wei at which getRequestFee is sampled to fit the reward model
+REQUEST_FEE_SAMPLE_GAS_PRICES = (10 ** 9, 10 ** 10, 10 ** 11)
+
+# Number of blocks after which the fee curve is sampled again even if no change was seen
+# The Witnet Request Board is an upgradable proxy, so its reward model can change without its address changing
+DEFAULT_REQUEST_FEE_REFRESH_BLOCKS = 7200
+
+def get_request_fee_refresh_blocks(network_config):
+    if "request_fee_refresh_blocks" in network_config and network_config["request_fee_refresh_blocks"] != "":
+        return int(network_config["request_fee_refresh_blocks"])
+    return DEFAULT_REQUEST_FEE_REFRESH_BLOCKS
+
+# requestRandomNumber pays the reward for the gas price of the transaction, which never exceeds the max fee per gas
+def get_request_gas_price(w3_provider, transaction_sender):
+    if transaction_sender.fee_estimator is not None:
+        fees = transaction_sender.fee_estimator.get_fees()
+        if "maxFeePerGas" in fees:
+            return fees["maxFeePerGas"]
+        if "gasPrice" in fees:
+            return fees["gasPrice"]
+    return w3_provider.eth.gas_price
+
+# Local model of RngWitnet.getRequestFee(gasPrice) = slope * gasPrice + intercept together with the maxFee and balance of RngWitnet
+# The model is fitted from a few samples and sampled again when the Request Board or the randomness request changes,
+# so whether requestRandomNumber will revert with maxFeeTooLow or balanceTooLow can be predicted without any eth_call
+class RequestFeeCurve:
+    def __init__(self, w3_provider, rng_witnet, multicall_address=MULTICALL3_ADDRESS, sample_gas_prices=REQUEST_FEE_SAMPLE_GAS_PRICES, refresh_blocks=DEFAULT_REQUEST_FEE_REFRESH_BLOCKS):
+        assert len(sample_gas_prices) >= 2, "At least two gas prices are required to fit the request fee"
+
+        self.w3_provider = w3_provider
+        self.rng_witnet = rng_witnet
+        self.multicall_address = multicall_address
+        self.sample_gas_prices = sample_gas_prices
+        self.refresh_blocks = refresh_blocks
+
+        # Request Board and randomness request addresses the curve was fitted for
+        self.key = None
+        self.sampled_block = None
+        self.slope = None
+        self.intercept = None
+
+        self.max_fee = None
+        self.balance = None
+
+    # Views which detect changes of the fee curve and read the funds of RngWitnet
+    # These can be aggregated with other views which are read on every block
+    def get_state_calls(self):
+        multicall_contract = get_contract(self.w3_provider, "Multicall3", self.multicall_address)
+        return [
+            (self.rng_witnet, "witnet", []),
+            (self.rng_witnet, "witnetRandomnessRequest", []),
+            (self.rng_witnet, "maxFee", []),
+            (multicall_contract, "getEthBalance", [self.rng_witnet.address]),
+        ]
+
+    # Read the state and sample the fee curve in a single batch
+    def refresh(self, block_number=None):
+        sample_calls = [(self.rng_witnet, "getRequestFee", [gas_price]) for gas_price in self.sample_gas_prices]
+        results = multicall(self.w3_provider, self.get_state_calls() + sample_calls, self.multicall_address)
+        block_number = block_number if block_number is not None else self.w3_provider.eth.blockNumber
+
+        key = self._set_state(results[:4])
+        self._fit(results[4:], block_number)
+        self.key = key
+
+    # Update the state from the results of get_state_calls and only sample the fee curve again if it changed or is stale
+    def update(self, results, block_number):
+        key = self._set_state(results)
+        if key != self.key or self.sampled_block is None or block_number - self.sampled_block >= self.refresh_blocks:
+            self.refresh(block_number)
+
+    def get_request_fee(self, gas_price):
+        if self.slope is None:
+            # The samples did not fit the model, ask the contract
+            return self.rng_witnet.functions.getRequestFee(gas_price).call()
+        fee = self.slope * gas_price + self.intercept
+        return fee.numerator // fee.denominator + (1 if fee.denominator > 1 else 0)
+
+    # Returns the error requestRandomNumber would revert with, or None if it is expected to succeed
+    # With multiple requests, every request is checked against the balance left after the previous ones
+    def get_request_error(self, gas_price, requests=1):
+        request_fee = self.get_request_fee(gas_price)
+        if request_fee >= self.max_fee:
+            return f"maxFeeTooLow({self.max_fee}, {request_fee})"
+        if self.balance < requests * request_fee:
+            return f"balanceTooLow({self.balance - (requests - 1) * request_fee}, {request_fee})"
+        return None
+
+    def _set_state(self, results):
+        witnet, witnet_randomness_request, self.max_fee, self.balance = results
+        return (witnet, witnet_randomness_request)
+
+    def _fit(self, request_fees, block_number):
+        self.slope = self.intercept = None
+        self.sampled_block = block_number
+
+        samples = list(zip(self.sample_gas_prices, request_fees))
+        if any(request_fee is None for _, request_fee in samples):
+            logging.warning("Could not sample the request fee, falling back to eth_call")
+            return
+
+        (first_gas_price, first_fee), (last_gas_price, last_fee) = samples[0], samples[-1]
+        slope = fractions.Fraction(last_fee - first_fee, last_gas_price - first_gas_price)
+        intercept = first_fee - slope * first_gas_price
+        if any(slope * gas_price + intercept != request_fee for gas_price, request_fee in samples):
+            logging.warning(f"The request fee is not affine in the gas price: {samples}, falling back to eth_call")
+            return
+
+        self.slope, self.intercept = slope, intercept
+        logging.info(f"Request fee model: {float(slope):.1f} * gas price + {float(intercept):.0f}")
@@ -0,0 +1,70 @@
+import logging
+
+from web3.exceptions import BadFunctionCallOutput
+from web3.exceptions import ContractLogicError
+
+from util.event_fetcher import get_max_workers
+
+from util.event_index import get_event_index_path
+from util.event_index import get_indexed_request_ids
+from util.event_index import open_event_index
+from util.event_index import sync_event_index
+
+from util.multicall import MULTICALL3_ADDRESS
+from util.multicall import get_request_states
+
+# Values of the RequestStatus enum of RngWitnet
+NOT_REQUESTED = 0
+PENDING = 1
+FETCHABLE = 2
+COMPLETED = 3
+FAILED = 4
+
+# Number of request ids of which the status is read in a single eth_call
+REQUEST_STATUS_RANGE_SIZE = 5000
+
+# Read the status of the requests from_id up to and including to_id with one eth_call per range
+# Returns None for RngWitnet deployments which predate getRequestStatuses
+def get_request_statuses(rng_witnet, from_id, to_id, range_size=REQUEST_STATUS_RANGE_SIZE):
+    request_statuses = {}
+    for range_start in range(from_id, to_id + 1, range_size):
+        range_end = min(range_start + range_size - 1, to_id)
+        try:
+            statuses = rng_witnet.functions.getRequestStatuses(range_start, range_end).call()
+        except (BadFunctionCallOutput, ContractLogicError, ValueError) as err:
+            logging.info(f"Could not read the request statuses ({err}), RngWitnet does not implement getRequestStatuses")
+            return None
+        request_statuses.update(zip(range(range_start, range_end + 1), statuses))
+    return request_statuses
+
+# Find the requests of which the random number still has to be fetched and the requests which failed
+# Deployments without getRequestStatuses do not record failures, so these are read from the local event index
+def get_requests_to_fetch(network_config, w3_provider, rng_witnet, multicall_address=MULTICALL3_ADDRESS):
+    request_count = rng_witnet.functions.requestCount().call()
+
+    request_statuses = get_request_statuses(rng_witnet, 1, request_count)
+    if request_statuses is not None:
+        requests_to_fetch = [request_id for request_id, status in request_statuses.items() if status in (PENDING, FETCHABLE)]
+        failed_request_ids = set(request_id for request_id, status in request_statuses.items() if status == FAILED)
+        return requests_to_fetch, failed_request_ids
+
+    # Update the local event index with all blocks since the last run and get events for which random numbers failed
+    chain_id = w3_provider.eth.chain_id
+    event_index = open_event_index(get_event_index_path(network_config))
+    sync_event_index(
+        event_index,
+        chain_id,
+        w3_provider,
+        rng_witnet,
+        network_config["rng_witnet_deploy_transaction"],
+        max_workers=get_max_workers(network_config),
+    )
+    failed_request_ids = get_indexed_request_ids(event_index, chain_id, rng_witnet.address, "RandomNumberFailed")
+
+    # Check which requests have not been fetched yet
+    request_states = get_request_states(w3_provider, rng_witnet, range(1, request_count + 1), multicall_address)
+    requests_to_fetch = [
+        request_id for request_id, request_state in request_states.items()
+        if not request_state["complete"] and request_id not in failed_request_ids
+    ]
+    return requests_to_fetch, failed_request_ids
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+
+from util.multicall import MULTICALL3_ADDRESS
+from util.multicall import batch_call
+
+# Seconds between checks for a new block
+DEFAULT_POLL_INTERVAL = 5
+
+def get_poll_interval(network_config):
+    if "poll_interval" in network_config and network_config["poll_interval"] != "":
+        return float(network_config["poll_interval"])
+    return DEFAULT_POLL_INTERVAL
+
+# Track all pending requests at once and check isRngFetchable for all of them in one batch per new block
+# As soon as one or more requests become fetchable, on_fetchable is called with their ids in a background thread
+# while the remaining requests are still being watched
+# Returns the request ids which did not become fetchable before the timeout expired
+async def watch_requests(w3_provider, rng_witnet, request_ids, on_fetchable, multicall_address=MULTICALL3_ADDRESS, poll_interval=DEFAULT_POLL_INTERVAL, timeout=None):
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+
+    pending = set(request_ids)
+    last_block_number = None
+    submissions = []
+
+    # Transactions are submitted from a single thread so they never race for the same nonce
+    submitter = ThreadPoolExecutor(max_workers=1)
+    try:
+        while pending:
+            block_number = await loop.run_in_executor(None, lambda: w3_provider.eth.blockNumber)
+            if block_number != last_block_number:
+                last_block_number = block_number
+
+                request_ids_to_check = sorted(pending)
+                fetchable = await loop.run_in_executor(
+                    None,
+                    batch_call,
+                    w3_provider,
+                    rng_witnet,
+                    "isRngFetchable",
+                    [[request_id] for request_id in request_ids_to_check],
+                    multicall_address,
+                )
+                fetchable_request_ids = [request_id for request_id, is_fetchable in zip(request_ids_to_check, fetchable) if is_fetchable]
+
+                logging.info(f"Block {block_number}: {len(fetchable_request_ids)} of {len(pending)} pending RNG requests are fetchable")
+
+                if len(fetchable_request_ids) > 0:
+                    pending.difference_update(fetchable_request_ids)
+                    submissions.append(loop.run_in_executor(submitter, on_fetchable, fetchable_request_ids))
+
+            if not pending:
+                break
+
+            if timeout is not None and loop.time() - start_time > timeout:
+                logging.warning(f"Stopped watching RNG requests {sorted(pending)} after {timeout} seconds")
+                break
+
+            await asyncio.sleep(poll_interval)
+
+        # Wait until all fetch transactions have been confirmed
+        await asyncio.gather(*submissions)
+    finally:
+        submitter.shutdown(wait=True)
+
+    return pending
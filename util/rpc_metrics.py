@@ -0,0 +1,184 @@
+import atexit
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+from eth_abi import decode_abi
+
+from eth_utils import function_signature_to_4byte_selector
+
+from util.contract_registry import ABI_PATHS
+from util.contract_registry import get_function_selectors
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Methods of which the called contract function is recorded as well
+CONTRACT_CALL_METHODS = ("eth_call", "eth_estimateGas")
+
+# Hashed like the selectors of the contract registry, which resolves it to aggregate3
+AGGREGATE3_SELECTOR = "0x" + function_signature_to_4byte_selector("aggregate3((address,bool,bytes)[])").hex()
+
+class Histogram:
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, seconds, error):
+        bucket = next((index for index, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        self.bucket_counts[bucket] += 1
+        self.count += 1
+        self.errors += int(error)
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def to_json(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "sum_seconds": self.sum,
+            "max_seconds": self.max,
+            "buckets": dict(zip([str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"], self.bucket_counts)),
+        }
+
+# Resolve a 4-byte selector to the function name of any contract in the registry, unknown selectors are kept as is
+@functools.lru_cache(maxsize=None)
+def get_function_name(selector):
+    for name in ABI_PATHS:
+        try:
+            function_selectors = get_function_selectors(name)
+        except FileNotFoundError:
+            # Contracts which were not compiled
+            continue
+        if selector in function_selectors:
+            return function_selectors[selector]["name"]
+    return selector
+
+def _get_call_data(method, params):
+    if method not in CONTRACT_CALL_METHODS or len(params) == 0 or not isinstance(params[0], dict):
+        return None
+    call_data = params[0].get("data") or params[0].get("input")
+    if not call_data or len(call_data) < 10:
+        return None
+    return call_data
+
+def _get_aggregated_selectors(call_data):
+    calls, = decode_abi(["(address,bool,bytes)[]"], bytes.fromhex(call_data[10:]))
+    return ["0x" + call[2][:4].hex() for call in calls]
+
+# Counts, error counts and latency histograms per JSON-RPC method and per called contract function
+# Calls aggregated by Multicall3 are counted per contract function as well
+class RpcMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.methods = {}
+        self.functions = {}
+        self.aggregated_calls = {}
+
+    def middleware(self, make_request, w3_provider):
+        def record_request(method, params):
+            start_time = time.perf_counter()
+            error = True
+            try:
+                response = make_request(method, params)
+                error = "error" in response
+                return response
+            finally:
+                self.observe(method, params, time.perf_counter() - start_time, error)
+        return record_request
+
+    def observe(self, method, params, seconds, error):
+        call_data = _get_call_data(method, params)
+        function_name = get_function_name(call_data[:10]) if call_data is not None else None
+
+        aggregated_function_names = []
+        if call_data is not None and call_data[:10] == AGGREGATE3_SELECTOR:
+            aggregated_function_names = [get_function_name(selector) for selector in _get_aggregated_selectors(call_data)]
+
+        with self.lock:
+            self.methods.setdefault(method, Histogram()).observe(seconds, error)
+            if function_name is not None:
+                self.functions.setdefault(function_name, Histogram()).observe(seconds, error)
+            for aggregated_function_name in aggregated_function_names:
+                self.aggregated_calls[aggregated_function_name] = self.aggregated_calls.get(aggregated_function_name, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "methods": {method: histogram.to_json() for method, histogram in sorted(self.methods.items())},
+                "functions": {function_name: histogram.to_json() for function_name, histogram in sorted(self.functions.items())},
+                "aggregated_calls": dict(sorted(self.aggregated_calls.items())),
+            }
+
+    # Return the metrics recorded so far and start recording from scratch
+    def reset(self):
+        snapshot = self.snapshot()
+        with self.lock:
+            self.methods, self.functions, self.aggregated_calls = {}, {}, {}
+        return snapshot
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = []
+        for metric, label, histograms in (
+            ("keeper_rpc_request", "method", snapshot["methods"]),
+            ("keeper_contract_call", "function", snapshot["functions"]),
+        ):
+            lines.append(f"# TYPE {metric}_duration_seconds histogram")
+            for value, histogram in histograms.items():
+                cumulative_count = 0
+                for bound, bucket_count in histogram["buckets"].items():
+                    cumulative_count += bucket_count
+                    lines.append(f'{metric}_duration_seconds_bucket{{{label}="{value}",le="{bound}"}} {cumulative_count}')
+                lines.append(f'{metric}_duration_seconds_sum{{{label}="{value}"}} {histogram["sum_seconds"]}')
+                lines.append(f'{metric}_duration_seconds_count{{{label}="{value}"}} {histogram["count"]}')
+            lines.append(f"# TYPE {metric}_errors_total counter")
+            for value, histogram in histograms.items():
+                lines.append(f'{metric}_errors_total{{{label}="{value}"}} {histogram["errors"]}')
+
+        lines.append("# TYPE keeper_aggregated_calls_total counter")
+        for function_name, count in snapshot["aggregated_calls"].items():
+            lines.append(f'keeper_aggregated_calls_total{{function="{function_name}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+    # Files ending in .prom are written in the Prometheus textfile format, all others as a JSON snapshot
+    # The file is replaced atomically so a collector never reads a partial export
+    def export(self, path):
+        content = self.to_prometheus() if path.endswith(".prom") else json.dumps(self.snapshot(), indent=4)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as metrics_file:
+            metrics_file.write(content)
+        os.replace(temporary_path, path)
+
+# Metrics of all providers created by setup_web3_provider
+RPC_METRICS = RpcMetrics()
+
+# Export the metrics at the end of the run and, if an interval is configured, periodically while running
+def start_metrics_export(network_config, rpc_metrics=RPC_METRICS):
+    if "metrics_path" not in network_config or network_config["metrics_path"] == "":
+        return
+
+    path = network_config["metrics_path"]
+    atexit.register(rpc_metrics.export, path)
+
+    if "metrics_interval" in network_config and network_config["metrics_interval"] != "":
+        interval = float(network_config["metrics_interval"])
+
+        def export_periodically():
+            while True:
+                time.sleep(interval)
+                try:
+                    rpc_metrics.export(path)
+                except OSError:
+                    logging.exception(f"Failed to export RPC metrics to {path}")
+
+        threading.Thread(target=export_periodically, daemon=True).start()
+
+    logging.info(f"Exporting RPC metrics to {path}")
@@ -0,0 +1,352 @@
+import logging
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from web3 import Web3
+
+from web3.exceptions import TimeExhausted
+from web3.exceptions import TransactionNotFound
+
+from util.fee_estimator import get_fee_estimator
+
+from util.helper_functions import to_wei
+
+from util.logger import log_duration
+
+# Errors returned when the locally assigned nonce does not match the nonce the node expects
+NONCE_ERRORS = [
+    "nonce too low",
+    "nonce too high",
+    "invalid nonce",
+]
+
+# Errors returned when the node already holds the exact signed transaction, which means it was broadcast
+KNOWN_TRANSACTION_ERRORS = [
+    "already known",
+    "known transaction",
+]
+
+# Nodes only accept a replacement transaction if its fees are at least 10% higher than those of the replaced one
+REPLACEMENT_FEE_BUMP = 10
+
+# Seconds between checks for a receipt of a pending transaction
+DEFAULT_RECEIPT_POLL_INTERVAL = 1
+
+class SpendCapExceeded(Exception):
+    pass
+
+def get_transaction_sender(network_config, w3_provider, account):
+    replace_after_blocks = None
+    if "replace_after_blocks" in network_config and network_config["replace_after_blocks"] != "":
+        replace_after_blocks = int(network_config["replace_after_blocks"])
+
+    max_spend = None
+    if "max_spend" in network_config and network_config["max_spend"] != "":
+        max_spend = to_wei(network_config["max_spend"])
+
+    return TransactionSender(
+        w3_provider,
+        account,
+        fee_estimator=get_fee_estimator(network_config, w3_provider),
+        replace_after_blocks=replace_after_blocks,
+        max_spend=max_spend,
+    )
+
+def _get_error_message(err):
+    if len(err.args) > 0 and isinstance(err.args[0], dict) and "message" in err.args[0]:
+        return err.args[0]["message"]
+    return str(err)
+
+def _is_known_transaction_error(err):
+    message = _get_error_message(err).lower()
+    return any(error in message for error in KNOWN_TRANSACTION_ERRORS)
+
+def _is_nonce_error(err):
+    message = _get_error_message(err).lower()
+    return any(nonce_error in message for nonce_error in NONCE_ERRORS)
+
+def _get_private_key(account):
+    # Brownie accounts expose a hex encoded private key, eth_account accounts expose it as bytes
+    # Unlocked accounts on a local chain have no private key and are signed by the node
+    if getattr(account, "private_key", None):
+        return account.private_key
+    if getattr(account, "key", None):
+        return account.key
+    return None
+
+def _bump_fee(fee):
+    # Round up so the bumped fee is never below the minimum the node accepts
+    return (fee * (100 + REPLACEMENT_FEE_BUMP) + 99) // 100
+
+# The most a transaction can cost if it is mined
+def get_max_cost(transaction):
+    max_fee = transaction.get("maxFeePerGas", transaction.get("gasPrice", 0))
+    return transaction.get("gas", 0) * max_fee + transaction.get("value", 0)
+
+# Signs and broadcasts transactions back-to-back with locally assigned nonces and waits for their receipts together
+# The chain id and the account's nonce are only fetched once and kept in sync when the node reports a mismatch
+# If a fee estimator is given, it fills in the fees and gas limits which are not set and learns from the receipts
+# Transactions which are not mined within `replace_after_blocks` blocks are replaced with the same nonce and the
+# smallest fee bump the node accepts. If `max_spend` is set, no transaction or replacement is sent which could make
+# the total cost of all transactions sent by this sender exceed it.
+class TransactionSender:
+    def __init__(self, w3_provider, account, receipt_timeout=600, max_workers=16, fee_estimator=None, replace_after_blocks=None, max_spend=None, poll_interval=DEFAULT_RECEIPT_POLL_INTERVAL):
+        self.w3_provider = w3_provider
+        self.address = Web3.toChecksumAddress(str(account.address))
+        self.private_key = _get_private_key(account)
+        self.chain_id = w3_provider.eth.chain_id
+        self.receipt_timeout = receipt_timeout
+        self.max_workers = max_workers
+        self.fee_estimator = fee_estimator
+        self.replace_after_blocks = replace_after_blocks
+        self.max_spend = max_spend
+        self.poll_interval = poll_interval
+
+        self.lock = threading.Lock()
+        self.next_nonce = None
+        # Every transaction sent by this sender, mapped by hash, so they can be rebroadcast if a node drops them
+        self.sent_transactions = {}
+        # Hashes of the original transaction and all its replacements per nonce, the last one is the current one
+        self.nonce_transactions = {}
+        # Nonces of which no transaction has been mined yet
+        self.pending_nonces = set()
+        # Block number at which the current transaction of a pending nonce was first seen pending
+        self.pending_since = {}
+        # Amount paid for mined transactions
+        self.spent = 0
+        # Time at which the first transaction of a pending nonce was broadcast and how long building and broadcasting it took
+        self.sent_at = {}
+
+    def sync_nonce(self):
+        self.next_nonce = self.w3_provider.eth.get_transaction_count(self.address, "pending")
+        logging.info(f"Next nonce for {self.address} is {self.next_nonce}")
+
+    # Build the transaction for a web3 contract function call (or constructor) and broadcast it without waiting
+    def send(self, contract_function, transaction_parameters):
+        start_time = time.monotonic()
+        if self.fee_estimator is not None:
+            transaction_parameters = self.fee_estimator.get_transaction_parameters(contract_function, transaction_parameters)
+        transaction = contract_function.buildTransaction({
+            **transaction_parameters,
+            "from": self.address,
+            "chainId": self.chain_id,
+        })
+        return self.send_transaction(transaction, start_time)
+
+    def send_transaction(self, transaction, start_time=None):
+        if start_time is None:
+            start_time = time.monotonic()
+
+        with self.lock:
+            self._check_spend(get_max_cost(transaction))
+
+            if self.next_nonce is None:
+                self.sync_nonce()
+
+            try:
+                transaction_hash, raw_transaction = self._broadcast(transaction, self.next_nonce)
+            except ValueError as err:
+                if not _is_nonce_error(err):
+                    # Nothing was broadcast, so the nonce is reused by the next transaction and no gap is created
+                    raise
+                logging.warning(f"Nonce {self.next_nonce} was rejected ({_get_error_message(err)}), resynchronizing")
+                self.sync_nonce()
+                transaction_hash, raw_transaction = self._broadcast(transaction, self.next_nonce)
+
+            self.sent_transactions[transaction_hash] = (self.next_nonce, transaction, raw_transaction)
+            self.nonce_transactions[self.next_nonce] = [transaction_hash]
+            self.pending_nonces.add(self.next_nonce)
+            self.sent_at[self.next_nonce] = (time.monotonic(), time.monotonic() - start_time)
+            logging.info(f"Sent transaction {transaction_hash} with nonce {self.next_nonce}")
+            self.next_nonce += 1
+
+        return transaction_hash
+
+    # Nonce of a transaction sent by this sender, which is kept by all its replacements
+    def get_nonce(self, transaction_hash):
+        return self.sent_transactions[transaction_hash][0]
+
+    # Wait for the receipts of all given transactions at once, in the order of the given hashes
+    def wait_for_receipts(self, transaction_hashes):
+        if len(transaction_hashes) == 0:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(transaction_hashes))) as executor:
+            return list(executor.map(self.wait_for_receipt, transaction_hashes))
+
+    # Wait until the transaction or one of its replacements is mined and return that receipt
+    def wait_for_receipt(self, transaction_hash):
+        nonce = self.sent_transactions[transaction_hash][0]
+        start_time = time.monotonic()
+        rebroadcast = False
+
+        while True:
+            receipt = self._get_nonce_receipt(nonce)
+            if receipt is not None:
+                return receipt
+
+            if time.monotonic() - start_time > self.receipt_timeout:
+                # The node dropped the transaction: rebroadcast it once to fill the nonce gap it leaves for later transactions
+                if rebroadcast or self._is_known(self.nonce_transactions[nonce][-1]):
+                    raise TimeExhausted(f"Transaction {transaction_hash} is not mined after {self.receipt_timeout} seconds")
+                self._rebroadcast(nonce)
+                start_time, rebroadcast = time.monotonic(), True
+
+            if self.replace_after_blocks is not None:
+                self._replace_if_stuck(nonce)
+
+            time.sleep(self.poll_interval)
+
+    # Non-blocking variant of wait_for_receipt, returns None if neither the transaction nor a replacement was mined yet
+    def get_receipt(self, transaction_hash):
+        nonce = self.sent_transactions[transaction_hash][0]
+        receipt = self._get_nonce_receipt(nonce)
+        if receipt is None and self.replace_after_blocks is not None:
+            self._replace_if_stuck(nonce)
+        return receipt
+
+    # Whether the node knows neither the transaction nor any of its replacements and none of them was mined
+    def is_dropped(self, transaction_hash):
+        nonce = self.get_nonce(transaction_hash)
+        if self._get_nonce_receipt(nonce) is not None:
+            return False
+        with self.lock:
+            transaction_hashes = list(self.nonce_transactions[nonce])
+        return not any(self._is_known(known_hash) for known_hash in transaction_hashes)
+
+    # Stop waiting for a dropped transaction, the nonce is synchronized again so the next transaction fills its gap
+    def abandon(self, transaction_hash):
+        nonce = self.get_nonce(transaction_hash)
+        with self.lock:
+            self.pending_nonces.discard(nonce)
+            self.pending_since.pop(nonce, None)
+            self.sent_at.pop(nonce, None)
+            self.next_nonce = None
+        logging.warning(f"Abandoned the dropped transaction {transaction_hash} with nonce {nonce}")
+
+    def _get_nonce_receipt(self, nonce):
+        with self.lock:
+            transaction_hashes = list(self.nonce_transactions[nonce])
+
+        for transaction_hash in transaction_hashes:
+            try:
+                receipt = self.w3_provider.eth.get_transaction_receipt(transaction_hash)
+            except TransactionNotFound:
+                continue
+            self._record_receipt(nonce, transaction_hash, receipt)
+            return receipt
+        return None
+
+    def _record_receipt(self, nonce, transaction_hash, receipt):
+        transaction = self.sent_transactions[transaction_hash][1]
+        with self.lock:
+            if nonce not in self.pending_nonces:
+                # Already recorded by another waiter
+                return
+            self.pending_nonces.discard(nonce)
+            self.pending_since.pop(nonce, None)
+            gas_price = receipt.get("effectiveGasPrice", transaction.get("maxFeePerGas", transaction.get("gasPrice", 0)))
+            self.spent += receipt["gasUsed"] * gas_price
+            sent_time, send_duration = self.sent_at.pop(nonce, (None, None))
+        if sent_time is not None:
+            # Timing span from broadcasting the transaction until it or one of its replacements was mined
+            log_duration(
+                "transaction",
+                time.monotonic() - sent_time,
+                transaction_hash=transaction_hash,
+                nonce=nonce,
+                status=receipt["status"],
+                gas_used=receipt["gasUsed"],
+                send_duration=round(send_duration, 6),
+            )
+        if self.fee_estimator is not None:
+            self.fee_estimator.record_receipt(transaction, receipt)
+
+    def _replace_if_stuck(self, nonce):
+        block_number = self.w3_provider.eth.blockNumber
+        with self.lock:
+            if nonce not in self.pending_nonces:
+                return
+            pending_since = self.pending_since.setdefault(nonce, block_number)
+            if block_number - pending_since < self.replace_after_blocks:
+                return
+
+            _, transaction, _ = self.sent_transactions[self.nonce_transactions[nonce][-1]]
+            replacement = self._get_replacement(transaction)
+            try:
+                self._check_spend(get_max_cost(replacement) - get_max_cost(transaction))
+            except SpendCapExceeded as err:
+                logging.warning(f"Not replacing the transaction with nonce {nonce}: {err}")
+                self.pending_since[nonce] = block_number
+                return
+
+            try:
+                transaction_hash, raw_transaction = self._broadcast(replacement, nonce)
+            except ValueError as err:
+                # The nonce was used in the meantime, the receipt is picked up on the next check
+                logging.warning(f"Replacing the transaction with nonce {nonce} failed ({_get_error_message(err)})")
+                self.pending_since[nonce] = block_number
+                return
+
+            self.sent_transactions[transaction_hash] = (nonce, replacement, raw_transaction)
+            self.nonce_transactions[nonce].append(transaction_hash)
+            self.pending_since[nonce] = block_number
+            logging.info(f"Replaced the transaction with nonce {nonce} after {self.replace_after_blocks} blocks by {transaction_hash}")
+
+    def _get_replacement(self, transaction):
+        # Use the current fee estimate if that is higher than the minimal bump
+        estimated_fees = self.fee_estimator.get_fees() if self.fee_estimator is not None else {}
+        if "gasPrice" in transaction:
+            return {**transaction, "gasPrice": max(_bump_fee(transaction["gasPrice"]), estimated_fees.get("maxFeePerGas", 0))}
+        return {
+            **transaction,
+            "maxPriorityFeePerGas": max(_bump_fee(transaction["maxPriorityFeePerGas"]), estimated_fees.get("maxPriorityFeePerGas", 0)),
+            "maxFeePerGas": max(_bump_fee(transaction["maxFeePerGas"]), estimated_fees.get("maxFeePerGas", 0)),
+        }
+
+    # Must be called with the lock held
+    def _check_spend(self, additional_cost):
+        if self.max_spend is None:
+            return
+        # Pending transactions are accounted for at their maximal cost
+        pending_cost = sum(
+            get_max_cost(self.sent_transactions[self.nonce_transactions[nonce][-1]][1])
+            for nonce in self.pending_nonces
+        )
+        if self.spent + pending_cost + additional_cost > self.max_spend:
+            raise SpendCapExceeded(f"spending {additional_cost / 1E18:.6f} more would exceed the cap of {self.max_spend / 1E18:.6f} (spent {self.spent / 1E18:.6f}, pending {pending_cost / 1E18:.6f})")
+
+    def _rebroadcast(self, nonce):
+        transaction_hash = self.nonce_transactions[nonce][-1]
+        _, transaction, raw_transaction = self.sent_transactions[transaction_hash]
+        logging.warning(f"Transaction {transaction_hash} with nonce {nonce} was dropped, rebroadcasting it")
+        with self.lock:
+            if raw_transaction is not None:
+                self.w3_provider.eth.send_raw_transaction(raw_transaction)
+            else:
+                self.w3_provider.eth.send_transaction({**transaction, "nonce": nonce})
+
+    def _is_known(self, transaction_hash):
+        try:
+            self.w3_provider.eth.get_transaction(transaction_hash)
+            return True
+        except TransactionNotFound:
+            return False
+
+    def _broadcast(self, transaction, nonce):
+        transaction = {**transaction, "nonce": nonce}
+        if self.private_key is None:
+            transaction_hash = self.w3_provider.eth.send_transaction(transaction)
+            return transaction_hash.hex(), None
+
+        signed_transaction = self.w3_provider.eth.account.sign_transaction(transaction, self.private_key)
+        try:
+            transaction_hash = self.w3_provider.eth.send_raw_transaction(signed_transaction.rawTransaction)
+        except ValueError as err:
+            if not _is_known_transaction_error(err):
+                raise
+            # E.g. a retried request of which the first attempt reached the node, the hash follows from the signed transaction
+            logging.info(f"Transaction with nonce {nonce} was already known to the node")
+            transaction_hash = Web3.keccak(signed_transaction.rawTransaction)
+        return transaction_hash.hex(), signed_transaction.rawTransaction
@@ -0,0 +1,117 @@
+import functools
+import hashlib
+
+from collections import namedtuple
+
+from util import constants
+
+# Bytecode template of WitnetRequestRandomness, without any witnessing parameters
+WITNET_RANDOMNESS_TEMPLATE = bytes.fromhex("0a0f120508021a01801a0210022202100b")
+
+# Witnessing parameters in the order of the WitnetRequestWitnessingParams struct returned by witnessingParams()
+WitnessingParameters = namedtuple(
+    "WitnessingParameters",
+    ["num_witnesses", "min_witnessing_consensus", "witnessing_collateral", "witnessing_reward", "witnessing_unitary_fee"],
+)
+
+# Parameters set by WitnetRequestMalleableBase._initialize
+DEFAULT_WITNESSING_PARAMETERS = WitnessingParameters(2, 51, 10 ** 9, 5 * 10 ** 5, 25 * 10 ** 4)
+
+# Protocol buffer tags of the witnessing parameters appended to the template
+WITNESSING_REWARD_TAG = 0x10
+NUM_WITNESSES_TAG = 0x18
+WITNESSING_UNITARY_FEE_TAG = 0x20
+MIN_WITNESSING_CONSENSUS_TAG = 0x28
+WITNESSING_COLLATERAL_TAG = 0x30
+
+UINT8_MAX = 2 ** 8 - 1
+UINT64_MAX = 2 ** 64 - 1
+
+# Raised for parameters the contract rejects, carrying the same custom error the contract reverts with
+class WitnessingParametersError(ValueError):
+    def __init__(self, error_name, value=None):
+        super().__init__(error_name if value is None else f"{error_name}({value})")
+        self.error_name = error_name
+        self.value = value
+
+    # The revert message brownie reports for the custom error
+    @property
+    def typed_error(self):
+        selector = getattr(constants, self.error_name)
+        return f"typed error: {selector}" + (f"{self.value:064x}" if self.value is not None else "")
+
+# Tagged protocol buffer varint, as encoded by _uint64varint and _uint8varint
+# Encodings are cached since parameter sweeps reuse the same few values for every field
+@functools.lru_cache(maxsize=4096)
+def encode_varint(tag, value):
+    encoded = bytearray([tag])
+    while value > 0x7F:
+        encoded.append(0x80 | (value & 0x7F))
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+# Apply the checks of _malleateBytecode in the same order, so the same error is raised as on-chain
+def validate_witnessing_parameters(parameters):
+    for name in ("num_witnesses", "min_witnessing_consensus"):
+        if not 0 <= getattr(parameters, name) <= UINT8_MAX:
+            raise ValueError(f"{name} does not fit in an uint8")
+    for name in ("witnessing_collateral", "witnessing_reward", "witnessing_unitary_fee"):
+        if not 0 <= getattr(parameters, name) <= UINT64_MAX:
+            raise ValueError(f"{name} does not fit in an uint64")
+
+    if parameters.witnessing_reward == 0:
+        raise WitnessingParametersError("noWitnessingReward")
+    if parameters.num_witnesses > 125 or parameters.num_witnesses == 0:
+        raise WitnessingParametersError("invalidNumWitnesses", parameters.num_witnesses)
+    if parameters.min_witnessing_consensus < 51 or parameters.min_witnessing_consensus > 99:
+        raise WitnessingParametersError("invalidWitnessingConsensus", parameters.min_witnessing_consensus)
+    if parameters.witnessing_collateral < 10 ** 9:
+        raise WitnessingParametersError("invalidWitnessingCollateral", parameters.witnessing_collateral)
+
+def malleate_bytecode(parameters, template=WITNET_RANDOMNESS_TEMPLATE):
+    validate_witnessing_parameters(parameters)
+    return b"".join((
+        template,
+        encode_varint(WITNESSING_REWARD_TAG, parameters.witnessing_reward),
+        encode_varint(NUM_WITNESSES_TAG, parameters.num_witnesses),
+        encode_varint(WITNESSING_UNITARY_FEE_TAG, parameters.witnessing_unitary_fee),
+        encode_varint(MIN_WITNESSING_CONSENSUS_TAG, parameters.min_witnessing_consensus),
+        encode_varint(WITNESSING_COLLATERAL_TAG, parameters.witnessing_collateral),
+    ))
+
+# Witnet request hashes are the SHA256 digest of the bytecode
+def get_request_hash(bytecode):
+    return hashlib.sha256(bytecode).digest()
+
+# The views compute in uint64 and revert on overflow, in which case None is returned
+def get_total_witnessing_fee(parameters):
+    total_witnessing_fee = parameters.num_witnesses * (2 * parameters.witnessing_unitary_fee + parameters.witnessing_reward)
+    if 2 * parameters.witnessing_unitary_fee > UINT64_MAX or total_witnessing_fee > UINT64_MAX:
+        return None
+    return total_witnessing_fee
+
+def get_total_witnessing_collateral(parameters):
+    total_witnessing_collateral = parameters.num_witnesses * parameters.witnessing_collateral
+    return total_witnessing_collateral if total_witnessing_collateral <= UINT64_MAX else None
+
+# Evaluate many candidate parameter sets in one pass without touching the chain
+# Every result holds either the error the contract would revert with, or the resulting bytecode, hash and totals
+def evaluate_witnessing_parameters(parameter_sets, template=WITNET_RANDOMNESS_TEMPLATE):
+    results = []
+    for parameters in parameter_sets:
+        parameters = WitnessingParameters(*parameters)
+        try:
+            bytecode = malleate_bytecode(parameters, template)
+        except WitnessingParametersError as err:
+            results.append({"parameters": parameters, "error": err})
+            continue
+        results.append({
+            "parameters": parameters,
+            "error": None,
+            "bytecode": bytecode,
+            "hash": get_request_hash(bytecode),
+            "total_witnessing_fee": get_total_witnessing_fee(parameters),
+            "total_witnessing_collateral": get_total_witnessing_collateral(parameters),
+        })
+    return results